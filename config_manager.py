@@ -6,6 +6,36 @@ import yaml
 from pathlib import Path
 
 
+# 屏幕识别相关的默认配置
+DEFAULT_DETECTION_CONFIG = {
+    'capture_backend': 'auto',  # 截图后端: auto / mss / pyautogui / file
+    'capture_files': [],  # file后端回放的PNG文件或目录
+    'capture_window': False,  # 是否只截取游戏窗口客户区（找不到窗口时截取整个屏幕）
+    'background_capture': False,  # 是否在后台线程中持续截图，检测时直接读取最新一帧
+    'capture_fps': 10,  # 后台截图的帧率
+    'capture_ring_size': 4,  # 后台截图环形缓冲区保存的帧数
+    'pyramid': False,  # 是否使用由粗到精的金字塔匹配
+    'roi': True,  # 是否优先在上次命中位置附近搜索
+    'roi_margin': 50,  # ROI在上次命中区域四周扩展的像素数
+    'layout_cache': True,  # 按分辨率把界面元素位置保存到layout_cache.yaml，下次启动时优先在该位置附近搜索
+    'grayscale': False,  # 是否使用单通道灰度匹配
+    'detection_scale': 1.0,  # 在按此比例缩小的画面上检测（如0.5为半分辨率），点击位置仍在原始分辨率上确定
+    'backend': 'opencv',  # 匹配后端: opencv / fft / auto（按模板尺寸自动选择）
+    'masked': True,  # 是否使用模板透明通道作为掩码（透明像素不参与匹配）
+    'scene_cache': True,  # 画面未变化时复用上次的检测结果
+    'scene_cache_size': 32,  # 检测结果缓存的最大条目数
+    'change_gate': True,  # 与上次匹配时的画面比较，只对发生变化的区域重新匹配
+    'change_threshold': 12,  # 低分辨率灰度画面中视为变化的最小亮度差（0-255）
+    'in_game_heuristic': False,  # 没有HUD模板时，已运行的游戏长时间不出现登录界面是否视为已登录
+    'parallel': True,  # 是否在线程池中并行匹配多个模板
+    'max_workers': None,  # 并行匹配的线程数，为空时使用CPU核心数
+    'multi_scale': False,  # 是否按分辨率自动缩放模板（非1080p或窗口化客户端）
+    'scale_min': 0.5,  # 多尺度搜索的最小缩放比例
+    'scale_max': 2.0,  # 多尺度搜索的最大缩放比例
+    'scale_step': 0.05,  # 多尺度搜索的比例步长
+}
+
+
 class ConfigManager:
     """配置文件管理器"""
     
@@ -147,6 +177,19 @@ class ConfigManager:
         self.set('yuan_shen_path', path)
         return self.save_config()
     
+    def get_detection_config(self):
+        """
+        获取屏幕识别配置（config.yaml中的detection节），缺省项使用默认值
+        
+        Returns:
+            dict: 屏幕识别配置
+        """
+        detection_config = dict(DEFAULT_DETECTION_CONFIG)
+        user_config = self.get('detection', {})
+        if isinstance(user_config, dict):
+            detection_config.update(user_config)
+        return detection_config
+    
     def validate_game_path(self, path):
         """
         验证游戏路径是否有效
@@ -0,0 +1,116 @@
+"""
+屏幕识别缓存模块
+"""
+import threading
+import yaml
+from pathlib import Path
+from logger import get_logger
+
+
+class YamlCache:
+    """保存在YAML文件中的字典缓存
+
+    读写都持有同一把锁，可以在并行匹配的线程中更新。
+    """
+
+    # 日志中使用的缓存名称
+    description = "缓存"
+
+    def __init__(self, cache_path):
+        self.logger = get_logger()
+        self.cache_path = Path(cache_path)
+        self._lock = threading.RLock()
+        self.data = self._load()
+
+    def _load(self):
+        """从文件加载缓存"""
+        try:
+            if self.cache_path.exists():
+                with open(self.cache_path, 'r', encoding='utf-8') as f:
+                    data = yaml.safe_load(f)
+                    if isinstance(data, dict):
+                        return data
+        except Exception as e:
+            self.logger.warning(f"加载{self.description}失败: {e}")
+        return {}
+
+    def save(self):
+        """保存缓存到文件"""
+        with self._lock:
+            try:
+                self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.cache_path, 'w', encoding='utf-8') as f:
+                    yaml.dump(self.data, f, default_flow_style=False, allow_unicode=True)
+                return True
+            except Exception as e:
+                self.logger.error(f"保存{self.description}失败: {e}")
+                return False
+
+    def clear(self):
+        """清除所有记录"""
+        with self._lock:
+            self.data = {}
+            return self.save()
+
+
+class ScaleCache(YamlCache):
+    """按屏幕（或窗口）分辨率保存模板缩放比例
+
+    多尺度匹配第一次在某个分辨率下找到模板时记录缩放比例，
+    之后的运行直接复用，不再搜索比例。
+    """
+
+    description = "缩放比例缓存"
+
+    @staticmethod
+    def get_resolution_key(image_shape):
+        """根据图片尺寸生成分辨率键，如 2560x1440"""
+        h, w = image_shape[:2]
+        return f"{w}x{h}"
+
+    def get(self, resolution_key):
+        """获取分辨率对应的缩放比例，没有记录时返回None"""
+        with self._lock:
+            return self.data.get(resolution_key)
+
+    def set(self, resolution_key, scale):
+        """记录分辨率对应的缩放比例并保存"""
+        with self._lock:
+            self.data[resolution_key] = float(scale)
+            return self.save()
+
+
+class LayoutCache(YamlCache):
+    """按屏幕（或窗口）分辨率保存各界面元素上次出现的位置
+
+    每条记录同时保存模板内容哈希，替换模板图片后旧位置自动失效。
+    新进程启动时先在记录的位置附近搜索，找不到时再全图搜索。
+    """
+
+    description = "界面布局缓存"
+
+    def get(self, image_shape, name, template_hash):
+        """获取模板在该分辨率下记录的位置 (x0, y0, x1, y1)，没有记录或模板已变化时返回None"""
+        resolution_key = ScaleCache.get_resolution_key(image_shape)
+        with self._lock:
+            entry = self.data.get(resolution_key, {}).get(name)
+        if not isinstance(entry, dict) or entry.get('hash') != template_hash:
+            return None
+        box = entry.get('box')
+        if not isinstance(box, (list, tuple)) or len(box) != 4:
+            return None
+        return tuple(int(value) for value in box)
+
+    def set(self, image_shape, name, template_hash, top_left, bottom_right):
+        """记录模板在该分辨率下的位置，位置有变化时保存到文件"""
+        resolution_key = ScaleCache.get_resolution_key(image_shape)
+        entry = {
+            'hash': template_hash,
+            'box': [int(top_left[0]), int(top_left[1]), int(bottom_right[0]), int(bottom_right[1])],
+        }
+        with self._lock:
+            layout = self.data.setdefault(resolution_key, {})
+            if layout.get(name) == entry:
+                return True
+            layout[name] = entry
+            return self.save()
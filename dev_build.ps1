@@ -105,6 +105,7 @@ $pyinstallerArgs = @(
     "--hidden-import=numpy",
     "--hidden-import=PIL",
     "--hidden-import=pyautogui",
+    "--hidden-import=mss",
     "--collect-all=cv2",
     "--collect-all=numpy",
     "main.py"
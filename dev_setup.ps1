@@ -78,7 +78,7 @@ foreach ($dep in $coreDeps) {
 
 # 安装开发依赖
 Write-Host "安装开发依赖..." -ForegroundColor Cyan
-$devDeps = @("opencv-python", "pillow", "pyautogui", "numpy")
+$devDeps = @("opencv-python", "pillow", "pyautogui", "numpy", "mss")
 foreach ($dep in $devDeps) {
     Write-Host "安装 $dep..." -ForegroundColor Yellow
     & $UV_EXE pip install $dep
@@ -61,6 +61,6 @@ Write-Host "安装开发依赖..." -ForegroundColor Yellow
 
 # 安装屏幕识别依赖
 Write-Host "安装屏幕识别依赖..." -ForegroundColor Yellow
-& $UV_EXE pip install numpy
+& $UV_EXE pip install numpy mss
 
 Write-Host "依赖同步完成！" -ForegroundColor Green
@@ -2,12 +2,116 @@
 原神游戏管理核心逻辑模块
 """
 import os
+import asyncio
+import functools
 import psutil
 import subprocess
 import time
+import cv2
+from concurrent.futures import ThreadPoolExecutor
 from config_manager import ConfigManager
 from logger import get_logger
 from screen_recognition import ScreenRecognition
+from template_registry import TemplateRegistry, TEMPLATE_BASE_HEIGHT
+from screen_capture import create_capture_backend, BackgroundCapture
+from scene_detection import SceneResult, TemplateMatch, SceneCache, ChangeGate, frame_fingerprint, is_blank_frame
+from template_matcher import (pyramid_match, to_grayscale, scale_image, RoiTracker,
+                              get_candidate_scales, search_template_scale, refine_template_scale)
+from detection_cache import ScaleCache, LayoutCache
+from matching_backends import get_backend
+from wait_utils import PollPolicy, wait_until, CancelToken, OperationCancelled
+from login_state_machine import LoginState, LoginStateMachine
+from timeline import Timeline, timeline_step
+
+
+# 等待登录界面出现的最长时间（秒）：切换到已运行的游戏 / 新启动游戏
+SWITCH_READY_TIMEOUT = 90
+LAUNCH_READY_TIMEOUT = 180
+
+# 自动登录流程的最长时间（秒）
+LOGIN_FLOW_TIMEOUT = 120
+
+# 操作后等待界面变化的最长时间（秒）：按钮/弹窗消失、输入框获得焦点
+ACTION_CONFIRM_TIMEOUT = 5.0
+FOCUS_CONFIRM_TIMEOUT = 0.5
+
+# 操作后确认界面变化时的轮询间隔
+ACTION_POLL_POLICY = PollPolicy(initial=0.05, max_interval=0.3, backoff=1.5)
+
+# 确认界面变化时在匹配区域四周多截取的像素数
+ACTION_REGION_MARGIN = 10
+
+# 区域平均亮度差超过该值时视为发生了变化（0-255）
+REGION_CHANGE_THRESHOLD = 2.0
+
+# 登录界面的所有元素，全部消失后视为已离开登录界面
+LOGIN_UI_TEMPLATES = ['agree', 'circle', 'enter_game', 'input_username', 'input_password']
+
+# 游戏内HUD元素模板的名称前缀（如 assets/hud_paimon.png），出现任意一个即视为已在游戏中
+IN_GAME_TEMPLATE_PREFIX = 'hud_'
+
+# 开启in_game_heuristic且没有HUD模板时，已运行的游戏持续显示非登录界面的画面这么久即视为已登录（秒）
+# 启动中的客户端会依次显示健康提示、标题和加载画面，时间太短会把这些画面误判为游戏内
+IN_GAME_SETTLE_TIME = 30.0
+
+# 等待界面时的轮询间隔：刚开始频繁检查，之后逐渐放慢
+LOGIN_POLL_POLICY = PollPolicy(initial=1.0, max_interval=5.0, backoff=1.5)
+
+# 等待新启动的游戏窗口和第一帧画面时的轮询间隔
+LAUNCH_POLL_POLICY = PollPolicy(initial=0.2, max_interval=1.0, backoff=1.5)
+
+# 只截取游戏窗口时，找不到窗口后重新查找的最短间隔（秒）
+WINDOW_LOOKUP_INTERVAL = 5.0
+
+# 多尺度模式下某个分辨率未能确定缩放比例后，再次搜索前的等待时间（秒），每次失败后加倍
+SCALE_SEARCH_RETRY_INTERVAL = 5.0
+SCALE_SEARCH_MAX_INTERVAL = 60.0
+
+# 各模板的默认匹配阈值
+TEMPLATE_THRESHOLDS = {
+    'enter_game': 0.8,
+    'circle': 0.7,
+    'agree': 0.7,
+    'input_username': 0.7,
+    'input_password': 0.7,
+}
+
+
+def _describe_capture(result, *args, **kwargs):
+    """截图步骤的时间线信息"""
+    image = result[0]
+    if image is None:
+        return {'outcome': 'failed'}
+    return {'shape': list(image.shape)}
+
+
+def _describe_scene(result, *args, **kwargs):
+    """场景检测步骤的时间线信息"""
+    if result is None:
+        return {'outcome': 'failed'}
+    return {'found': result.found_names()}
+
+
+def _describe_match(result, screenshot, name, template, threshold, mask=None, region=None):
+    """单个模板匹配步骤的时间线信息"""
+    top_left, _, similarity, _ = result
+    return {
+        'outcome': 'found' if top_left is not None else 'not_found',
+        'template': name,
+        'similarity': round(float(similarity), 4),
+        'threshold': threshold,
+        'partial': region is not None,
+    }
+
+
+def _describe_click(result, scene, name, label):
+    """点击步骤的时间线信息"""
+    return {'target': name, 'similarity': round(float(scene.similarity(name)), 4) if scene is not None else 0.0}
+
+
+def _describe_confirm(result, action, confirm, timeout=None, description="界面变化"):
+    """操作确认步骤的时间线信息"""
+    return {'description': description}
 
 
 class GameManager:
@@ -16,7 +120,34 @@ class GameManager:
     def __init__(self):
         self.config_manager = ConfigManager()
         self.logger = get_logger()
-        self.screen_recognition = ScreenRecognition()
+        self.detection_config = self.config_manager.get_detection_config()
+        self.capture_backend = create_capture_backend(
+            self.detection_config.get('capture_backend', 'auto'),
+            self.detection_config.get('capture_files'),
+        )
+        self.screen_recognition = ScreenRecognition(self.capture_backend)
+        self.template_registry = TemplateRegistry()
+        self.roi_tracker = RoiTracker(self.detection_config.get('roi_margin', 50))
+        self.matching_backend = get_backend(self.detection_config.get('backend', 'opencv'))
+        self.scale_cache = ScaleCache(self.config_manager.get_config_path().parent / 'scale_cache.yaml')
+        self.layout_cache = LayoutCache(self.config_manager.get_config_path().parent / 'layout_cache.yaml')
+        self.scene_cache = SceneCache(self.detection_config.get('scene_cache_size', 32))
+        self.change_gate = ChangeGate(diff_threshold=self.detection_config.get('change_threshold', 12))
+        self._match_executor = None
+        self._scale_search_retries = {}
+        self._login_executor = None
+        self.cancel_token = CancelToken()
+        self.progress_callback = None
+        self.game_hwnd = None
+        self._window_lookup_time = 0.0
+        self.background_capture = None
+        self._last_click_time = 0.0
+        self.login_state_times = {}
+        self.login_outcome = None
+        self.game_process = None
+        self.launch_time = None
+        self.launch_metrics = {}
+        self.timeline = Timeline()
         
         # 初始化屏幕识别模板
         self._init_screen_recognition()
@@ -24,13 +155,16 @@ class GameManager:
     def _init_screen_recognition(self):
         """初始化屏幕识别模板"""
         try:
+            # 一次性加载assets目录下的所有模板
+            self.template_registry.load_all()
+            
             # 查找进入游戏按钮模板
-            template_path = os.path.join(os.path.dirname(__file__), 'assets', 'enter_game.png')
-            if os.path.exists(template_path):
-                self.screen_recognition.load_template(template_path)
+            template = self.template_registry.get('enter_game')
+            if template is not None:
+                self.screen_recognition.set_template(template, self.template_registry.get_path('enter_game'))
                 self.logger.info("✅ 屏幕识别模板加载成功")
             else:
-                self.logger.warning(f"⚠️ 屏幕识别模板不存在: {template_path}")
+                self.logger.warning("⚠️ 屏幕识别模板未加载: enter_game.png")
         except Exception as e:
             self.logger.error(f"初始化屏幕识别失败: {e}")
     
@@ -52,13 +186,13 @@ class GameManager:
                 continue
         return False
     
+    @timeline_step('switch_to_game_window')
     def switch_to_game_window(self):
         """切换到游戏窗口"""
         try:
             import win32gui
             import win32con
             import ctypes
-            import psutil
             
             def set_foreground_window_with_retry(hwnd, logger):
                 """尝试将窗口设置为前台，失败时先最小化再恢复"""
@@ -77,58 +211,7 @@ class GameManager:
                         raise Exception("Failed to set window foreground")
             
             # 尝试多种方式查找游戏窗口
-            hwnd = None
-            found_method = ""
-            
-            # 方法1: 通过窗口标题查找
-            def enum_windows_callback(hwnd_test, windows):
-                if win32gui.IsWindowVisible(hwnd_test):
-                    window_title = win32gui.GetWindowText(hwnd_test)
-                    window_class = win32gui.GetClassName(hwnd_test)
-                    self.logger.debug(f"发现窗口: 标题='{window_title}', 类名='{window_class}', HWND={hwnd_test}")
-                    if ('原神' in window_title or 'Genshin Impact' in window_title or 
-                        'YuanShen' in window_title or 'genshin' in window_title.lower()):
-                        windows.append((hwnd_test, window_title, window_class))
-                return True
-            
-            windows = []
-            win32gui.EnumWindows(enum_windows_callback, windows)
-            
-            if windows:
-                hwnd, title, class_name = windows[0]
-                found_method = f"窗口标题: {title}"
-                self.logger.info(f"✅ 通过窗口标题找到游戏窗口: {title}")
-            else:
-                self.logger.warning("❌ 通过窗口标题未找到游戏窗口，尝试通过进程查找...")
-                
-                # 方法2: 通过进程名查找
-                yuan_shen_processes = []
-                for proc in psutil.process_iter(['pid', 'name']):
-                    try:
-                        if proc.info['name'] and 'YuanShen.exe' in proc.info['name']:
-                            yuan_shen_processes.append(proc.info['pid'])
-                            self.logger.debug(f"找到YuanShen进程: PID={proc.info['pid']}")
-                    except (psutil.NoSuchProcess, psutil.AccessDenied):
-                        continue
-                
-                if yuan_shen_processes:
-                    # 通过进程ID查找窗口
-                    for pid in yuan_shen_processes:
-                        def enum_windows_by_pid(hwnd_test, target_pid):
-                            if win32gui.IsWindowVisible(hwnd_test):
-                                _, found_pid = win32gui.GetWindowThreadProcessId(hwnd_test)
-                                if found_pid == target_pid:
-                                    window_title = win32gui.GetWindowText(hwnd_test)
-                                    window_class = win32gui.GetClassName(hwnd_test)
-                                    self.logger.debug(f"通过进程ID找到窗口: PID={target_pid}, 标题='{window_title}', 类名='{window_class}', HWND={hwnd_test}")
-                                    return (hwnd_test, window_title, window_class)
-                            return None
-                        
-                        result = win32gui.EnumWindows(enum_windows_by_pid, pid)
-                        if result:
-                            hwnd, title, class_name = result
-                            found_method = f"进程ID: {pid}"
-                            break
+            hwnd, found_method = self._find_game_window()
             
             if hwnd:
                 self.logger.debug(f"尝试激活窗口: HWND={hwnd}, 方法={found_method}")
@@ -157,6 +240,121 @@ class GameManager:
             self.logger.error(f"❌ 切换窗口失败: {e}")
         return False
     
+    def _find_game_window(self):
+        """查找游戏窗口
+        
+        Returns:
+            tuple: (HWND, 查找方式)，未找到时HWND为None
+        """
+        import win32gui
+        import psutil
+        
+        hwnd = None
+        found_method = ""
+        
+        # 方法1: 通过窗口标题查找
+        def enum_windows_callback(hwnd_test, windows):
+            if win32gui.IsWindowVisible(hwnd_test):
+                window_title = win32gui.GetWindowText(hwnd_test)
+                window_class = win32gui.GetClassName(hwnd_test)
+                self.logger.debug(f"发现窗口: 标题='{window_title}', 类名='{window_class}', HWND={hwnd_test}")
+                if ('原神' in window_title or 'Genshin Impact' in window_title or 
+                    'YuanShen' in window_title or 'genshin' in window_title.lower()):
+                    windows.append((hwnd_test, window_title, window_class))
+            return True
+        
+        windows = []
+        win32gui.EnumWindows(enum_windows_callback, windows)
+        
+        if windows:
+            hwnd, title, class_name = windows[0]
+            found_method = f"窗口标题: {title}"
+            self.logger.info(f"✅ 通过窗口标题找到游戏窗口: {title}")
+        else:
+            self.logger.warning("❌ 通过窗口标题未找到游戏窗口，尝试通过进程查找...")
+            
+            # 方法2: 通过进程名查找
+            yuan_shen_processes = []
+            for proc in psutil.process_iter(['pid', 'name']):
+                try:
+                    if proc.info['name'] and 'YuanShen.exe' in proc.info['name']:
+                        yuan_shen_processes.append(proc.info['pid'])
+                        self.logger.debug(f"找到YuanShen进程: PID={proc.info['pid']}")
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+            
+            if yuan_shen_processes:
+                # 通过进程ID查找窗口
+                for pid in yuan_shen_processes:
+                    def enum_windows_by_pid(hwnd_test, target_pid):
+                        if win32gui.IsWindowVisible(hwnd_test):
+                            _, found_pid = win32gui.GetWindowThreadProcessId(hwnd_test)
+                            if found_pid == target_pid:
+                                window_title = win32gui.GetWindowText(hwnd_test)
+                                window_class = win32gui.GetClassName(hwnd_test)
+                                self.logger.debug(f"通过进程ID找到窗口: PID={target_pid}, 标题='{window_title}', 类名='{window_class}', HWND={hwnd_test}")
+                                return (hwnd_test, window_title, window_class)
+                        return None
+                    
+                    result = win32gui.EnumWindows(enum_windows_by_pid, pid)
+                    if result:
+                        hwnd, title, class_name = result
+                        found_method = f"进程ID: {pid}"
+                        break
+        
+        if hwnd:
+            self.game_hwnd = hwnd
+        return hwnd, found_method
+    
+    def get_game_window_rect(self):
+        """获取游戏窗口客户区在屏幕上的位置
+        
+        Returns:
+            tuple: (left, top, width, height)，找不到窗口或窗口已最小化时返回None
+        """
+        import win32gui
+        
+        hwnd = self.game_hwnd
+        if not hwnd or not win32gui.IsWindow(hwnd):
+            self.game_hwnd = None
+            # 窗口查找需要枚举所有窗口，找不到时限制重试频率
+            now = time.time()
+            if now - self._window_lookup_time < WINDOW_LOOKUP_INTERVAL:
+                return None
+            self._window_lookup_time = now
+            hwnd, _ = self._find_game_window()
+        if not hwnd or win32gui.IsIconic(hwnd):
+            return None
+        
+        left, top, right, bottom = win32gui.GetClientRect(hwnd)
+        width, height = right - left, bottom - top
+        if width <= 0 or height <= 0:
+            return None
+        screen_left, screen_top = win32gui.ClientToScreen(hwnd, (left, top))
+        return screen_left, screen_top, width, height
+    
+    def _update_capture_region(self):
+        """只截取游戏窗口时，把截图区域更新为窗口当前位置，找不到窗口时截取整个屏幕"""
+        if not self.detection_config.get('capture_window', False):
+            return
+        try:
+            region = self.get_game_window_rect()
+        except ImportError:
+            self.logger.warning("❌ 需要安装pywin32库来只截取游戏窗口，改为截取整个屏幕")
+            self.detection_config['capture_window'] = False
+            region = None
+        except Exception as e:
+            self.logger.debug(f"获取游戏窗口位置失败，截取整个屏幕: {e}")
+            region = None
+        
+        if region != self.capture_backend.region:
+            if region is None:
+                self.logger.info("未找到游戏窗口，截取整个屏幕")
+            else:
+                self.logger.info(f"✅ 只截取游戏窗口: 位置=({region[0]}, {region[1]}), 大小={region[2]}x{region[3]}")
+            self.capture_backend.set_region(region)
+    
+    @timeline_step('launch_game')
     def launch_game(self, game_path=None):
         """启动游戏"""
         if game_path is None:
@@ -171,29 +369,207 @@ class GameManager:
             return False
         
         try:
-            subprocess.Popen([game_path], cwd=os.path.dirname(game_path))
-            self.logger.info("游戏启动成功")
+            self.game_process = subprocess.Popen([game_path], cwd=os.path.dirname(game_path))
+            self.launch_time = time.monotonic()
+            self.launch_metrics = {}
+            self.logger.info(f"游戏启动成功: PID={self.game_process.pid}")
             return True
         except Exception as e:
             self.logger.error(f"启动游戏失败: {e}")
             return False
     
+    def _get_launched_pids(self):
+        """启动的游戏进程及其子进程的PID，进程已退出时返回空集合"""
+        if self.game_process is None or self.game_process.poll() is not None:
+            return set()
+        pids = {self.game_process.pid}
+        try:
+            pids.update(child.pid for child in psutil.Process(self.game_process.pid).children(recursive=True))
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+        return pids
+    
+    def _find_launched_window(self):
+        """查找启动的游戏进程创建的顶层窗口
+        
+        Returns:
+            int: 窗口HWND，窗口尚未出现时返回None
+        """
+        import win32gui
+        
+        pids = self._get_launched_pids()
+        if not pids:
+            # 启动器在拉起游戏后退出时，按窗口标题查找
+            hwnd, _ = self._find_game_window()
+            return hwnd
+        
+        def enum_windows_callback(hwnd_test, windows):
+            if win32gui.IsWindowVisible(hwnd_test):
+                _, found_pid = win32gui.GetWindowThreadProcessId(hwnd_test)
+                if found_pid in pids:
+                    windows.append(hwnd_test)
+            return True
+        
+        windows = []
+        win32gui.EnumWindows(enum_windows_callback, windows)
+        if windows:
+            self.game_hwnd = windows[0]
+            return windows[0]
+        return None
+    
+    def _is_launched_game_alive(self):
+        """启动的游戏进程（或启动器拉起的游戏）是否仍在运行"""
+        if self.game_process is not None and self.game_process.poll() is None:
+            return True
+        return self.is_game_running()
+    
+    def _is_game_frame_rendered(self):
+        """游戏窗口是否已渲染出第一帧非纯色画面"""
+        image, origin = self._capture_frame(grayscale=True)
+        if image is None:
+            return False
+        rect = self.get_game_window_rect()
+        if rect is not None:
+            # 截取整个屏幕时只检查游戏窗口所在的区域
+            left, top = rect[0] - origin[0], rect[1] - origin[1]
+            window = image[max(top, 0):max(top + rect[3], 0), max(left, 0):max(left + rect[2], 0)]
+            if window.size:
+                image = window
+        return not is_blank_frame(image)
+    
+    @timeline_step('wait_for_game_ready')
+    def _wait_for_game_ready(self, timeout, poll_policy=LAUNCH_POLL_POLICY):
+        """等待新启动的游戏窗口出现并渲染出第一帧画面
+        
+        Args:
+            timeout: 最长等待时间（秒）
+            poll_policy: 轮询间隔策略
+            
+        Returns:
+            bool: 游戏是否已就绪，耗时记录在launch_metrics中
+        """
+        start = self.launch_time or time.monotonic()
+        deadline = time.monotonic() + timeout
+        metrics = self.launch_metrics
+        
+        def window_or_exit():
+            if not self._is_launched_game_alive():
+                return 'exited'
+            return self._find_launched_window()
+        
+        try:
+            hwnd = wait_until(window_or_exit, timeout, poll_policy, description="游戏窗口（或进程退出）",
+                              cancel_token=self.cancel_token)
+        except ImportError:
+            self.logger.warning("❌ 需要安装pywin32库来检测游戏窗口，直接等待登录界面")
+            return False
+        if hwnd == 'exited':
+            metrics['exit_code'] = self.game_process.poll() if self.game_process is not None else None
+            self.timeline.add_metrics(launch_exit_code=metrics['exit_code'])
+            self.logger.error(f"❌ 游戏进程已退出，退出码: {metrics['exit_code']}")
+            return False
+        if hwnd is None:
+            return False
+        metrics['window'] = round(time.monotonic() - start, 3)
+        self.timeline.add_metrics(launch_to_window=metrics['window'])
+        self.logger.info(f"✅ 游戏窗口已出现: HWND={hwnd}，启动后 {metrics['window']:.1f}s")
+        
+        rendered = wait_until(self._is_game_frame_rendered, max(deadline - time.monotonic(), 0),
+                              poll_policy, description="游戏首帧画面", cancel_token=self.cancel_token)
+        if not rendered:
+            return False
+        metrics['first_frame'] = round(time.monotonic() - start, 3)
+        self.timeline.add_metrics(launch_to_ready=metrics['first_frame'])
+        self.logger.info(f"✅ 游戏已就绪: 窗口出现 {metrics['window']:.1f}s，"
+                         f"首帧画面 {metrics['first_frame']:.1f}s")
+        return True
+    
     def handle_login(self, username=None, password=None, game_path=None):
-        """统一的登录处理方法，支持GUI和命令行"""
+        """统一的登录处理方法，支持GUI和命令行（handle_login_async的同步封装）"""
+        try:
+            return asyncio.run(self.handle_login_async(username, password, game_path))
+        except asyncio.CancelledError:
+            self.logger.warning("⚠️ 登录已取消")
+            return False
+    
+    async def handle_login_async(self, username=None, password=None, game_path=None):
+        """异步登录处理方法
+        
+        截图识别、窗口操作和键鼠输入等阻塞步骤依次在登录线程中执行，等待期间事件循环可以处理其它任务。
+        任务被取消（或调用cancel_login）时，正在执行的步骤会在下一次检查时停止，随后抛出CancelledError。
+        这里不清除取消状态，登录开始前的cancel_login同样生效；再次登录前调用prepare_login。
+        
+        Returns:
+            bool: 是否成功切换到或启动了游戏
+        """
+        # 每次登录记录一条新的时间线，结束后保存到logs目录
+        self.timeline.reset()
+        self.login_outcome = None
+        try:
+            return await self._handle_login_async(username, password, game_path)
+        finally:
+            await self._run_step(self.timeline.save)
+    
+    def prepare_login(self):
+        """清除上一次登录的取消状态，应在允许取消之前调用（例如创建登录线程时）"""
+        self.cancel_token.reset()
+    
+    def cancel_login(self):
+        """取消正在进行的登录，可以在任意线程中调用"""
+        self.cancel_token.cancel()
+    
+    def _report_progress(self, message):
+        """通知登录进度，progress_callback会在登录线程中被调用"""
+        if self.progress_callback is None:
+            return
+        try:
+            self.progress_callback(message)
+        except Exception as e:
+            self.logger.debug(f"进度回调失败: {e}")
+    
+    def _get_login_executor(self):
+        """登录步骤使用的单线程线程池，保证键鼠操作按顺序在同一线程中执行"""
+        if self._login_executor is None:
+            self._login_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='login')
+        return self._login_executor
+    
+    async def _run_step(self, func, *args, **kwargs):
+        """在登录线程中执行阻塞步骤并等待结果
+        
+        任务被取消时通知该步骤停止，等它退出后再抛出CancelledError，避免留下仍在操作键鼠的线程。
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._get_login_executor(), functools.partial(func, *args, **kwargs))
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            self.cancel_token.cancel()
+            try:
+                await future
+            except (Exception, OperationCancelled):
+                pass
+            raise
+        except OperationCancelled:
+            raise asyncio.CancelledError()
+    
+    @timeline_step('handle_login')
+    async def _handle_login_async(self, username=None, password=None, game_path=None):
+        """登录处理流程"""
+        if self.detection_config.get('background_capture', False):
+            await self._run_step(self.start_background_capture)
         try:
             # 检查游戏是否已在运行
-            if self.is_game_running():
+            if await self._run_step(self.is_game_running):
                 self.logger.info("原神游戏已在运行，正在切换到游戏窗口...")
-                success = self.switch_to_game_window()
+                self._report_progress("正在切换到游戏窗口...")
+                success = await self._run_step(self.switch_to_game_window)
                 if success:
                     self.logger.info("✅ 已成功切换到游戏窗口！")
                     
-                    # 切换窗口后等待30秒
-                    self.logger.info("等待30秒让游戏完全加载...")
-                    time.sleep(30)
-                    
-                    # 检测是否需要登录
-                    self._check_and_handle_login(username, password)
+                    # 检测是否需要登录，登录界面出现后立即处理，出现HUD元素时立即结束
+                    self._report_progress("正在检测登录界面...")
+                    await self._run_step(self._check_and_handle_login, username, password, SWITCH_READY_TIMEOUT,
+                                         allow_in_game_heuristic=self.detection_config.get('in_game_heuristic', False))
                     return True
                 else:
                     self.logger.warning("❌ 无法切换到游戏窗口，请手动切换")
@@ -202,15 +578,15 @@ class GameManager:
                 # 游戏未运行，需要启动游戏
                 # 使用提供的路径或默认路径
                 if game_path:
-                    self.set_game_path(game_path)
+                    await self._run_step(self.set_game_path, game_path)
                 
-                current_path = self.get_game_path()
+                current_path = await self._run_step(self.get_game_path)
                 if not current_path:
                     self.logger.error("错误: 未找到游戏路径配置")
                     return False
                 
                 # 验证游戏路径
-                is_valid, message = self.validate_game_path(current_path)
+                is_valid, message = await self._run_step(self.validate_game_path, current_path)
                 if not is_valid:
                     self.logger.error(f"游戏路径无效: {message}")
                     return False
@@ -221,16 +597,21 @@ class GameManager:
                 else:
                     self.logger.info("启动原神游戏...")
                 
-                success = self.launch_game(current_path)
+                self._report_progress("正在启动游戏...")
+                success = await self._run_step(self.launch_game, current_path)
                 if success:
                     self.logger.info("✅ 游戏启动成功！")
                     
-                    # 游戏启动后等待60秒
-                    self.logger.info("等待60秒让游戏完全加载...")
-                    time.sleep(60)
-                    
-                    # 检测是否需要登录
-                    self._check_and_handle_login(username, password)
+                    # 游戏窗口渲染出画面后立即开始检测登录界面
+                    self._report_progress("正在等待游戏窗口...")
+                    ready = await self._run_step(self._wait_for_game_ready, LAUNCH_READY_TIMEOUT)
+                    if not ready and not await self._run_step(self._is_launched_game_alive):
+                        self.logger.error("❌ 游戏进程已退出")
+                        return False
+                    elapsed = time.monotonic() - self.launch_time
+                    self._report_progress("正在检测登录界面...")
+                    await self._run_step(self._check_and_handle_login, username, password,
+                                         max(LAUNCH_READY_TIMEOUT - elapsed, SWITCH_READY_TIMEOUT))
                     return True
                 else:
                     self.logger.error("❌ 游戏启动失败")
@@ -239,77 +620,153 @@ class GameManager:
         except Exception as e:
             self.logger.error(f"登录处理失败: {e}")
             return False
+        finally:
+            # 停止截图线程需要等待线程退出，同样在登录线程中执行
+            await self._run_step(self.stop_background_capture)
+            stats = self.get_change_gate_stats()
+            if stats['skipped'] or stats['partial']:
+                self.logger.info(f"帧差分门控: 跳过 {stats['skipped']} 次匹配, 局部匹配 {stats['partial']} 次, "
+                                 f"全图匹配 {stats['full']} 次, 节省约 {stats['time_saved']:.2f}s")
     
-    def _check_and_handle_login(self, username=None, password=None):
-        """检测并处理登录（带重试机制）"""
-        max_retries = 2  # 最多重试2次
-        retry_interval = 30  # 重试间隔30秒
+    @timeline_step('check_and_handle_login', lambda result, *args, **kwargs: {'outcome': result or 'error'})
+    def _check_and_handle_login(self, username=None, password=None, timeout=SWITCH_READY_TIMEOUT,
+                                allow_in_game_heuristic=False):
+        """检测并处理登录（在截止时间内轮询等待登录界面或游戏内画面）
         
-        for attempt in range(max_retries + 1):  # 0, 1, 2 共3次尝试
-            try:
-                if attempt > 0:
-                    self.logger.info(f"🔄 第 {attempt + 1} 次尝试检测登录窗口...")
-                else:
-                    self.logger.info("开始检测屏幕内容...")
-                
-                # 先检测并点击同意按钮（如果有的话）
-                if self._detect_and_click_agree():
-                    self.logger.info("⏰ 已点击同意按钮，等待5秒让界面加载...")
-                    time.sleep(5)
+        Args:
+            username: 用户名
+            password: 密码
+            timeout: 最长等待时间（秒）
+            allow_in_game_heuristic: 没有HUD模板时，是否把持续不出现登录界面的画面视为已在游戏中
+            
+        Returns:
+            str: 登录结果 already_logged_in / logged_in / login_failed / manual_login / no_login_ui，
+                出错时返回None
+        """
+        try:
+            self.logger.info(f"开始检测屏幕内容，最多等待 {timeout} 秒登录界面...")
+            
+            # 轮询检测登录界面和游戏内画面，出现任意一个即开始处理
+            scene = self._wait_for_login_ui(timeout, detect_in_game=True,
+                                            allow_in_game_heuristic=allow_in_game_heuristic)
+            if scene is None:
+                self.logger.info("✅ 等待期间未出现登录界面，确认无需登录")
+                return self._set_login_outcome('no_login_ui')
+            
+            if not self._is_login_ui(scene):
+                self.logger.info("✅ 已在游戏中，无需登录")
+                return self._set_login_outcome('already_logged_in')
+            
+            if username and password:
+                # 登录状态机会处理同意按钮、登录表单和进入游戏按钮
+                self.logger.info(f"🔍 检测到登录界面，开始自动登录流程，用户名: {username}")
+                login_success = self._perform_auto_login(username, password)
                 
-                # 检测是否存在进入游戏按钮
-                if self._detect_enter_game_button():
-                    self.logger.info("🔍 检测到进入游戏按钮，需要登录")
-                    
-                    if username and password:
-                        self.logger.info(f"开始自动登录流程，用户名: {username}")
-                        login_success = self._perform_auto_login(username, password)
-                        
-                        if login_success:
-                            self.logger.info("🎉 自动登录完成！程序将在3秒后退出...")
-                            time.sleep(3)
-                            self.logger.info("程序退出")
-                            import sys
-                            sys.exit(0)
-                        else:
-                            self.logger.error("❌ 自动登录失败")
-                            return  # 登录失败直接返回，不重试
-                    else:
-                        self.logger.warning("⚠️ 检测到需要登录，但未提供用户名和密码")
-                        self.logger.info("请手动登录或使用 -u 和 -p 参数提供账号信息")
-                        return  # 没有账号密码直接返回
-                else:
-                    if attempt < max_retries:
-                        self.logger.info(f"❌ 第 {attempt + 1} 次检测未发现登录窗口")
-                        self.logger.info(f"⏰ 等待 {retry_interval} 秒后进行第 {attempt + 2} 次检测...")
-                        time.sleep(retry_interval)
-                    else:
-                        self.logger.info("✅ 经过多次检测，确认无需登录")
-                        return
-                    
-            except Exception as e:
-                self.logger.error(f"第 {attempt + 1} 次检测登录状态失败: {e}")
-                if attempt < max_retries:
-                    self.logger.info(f"⏰ 等待 {retry_interval} 秒后重试...")
-                    time.sleep(retry_interval)
+                if login_success:
+                    self._set_login_outcome('logged_in')
+                    self.logger.info("🎉 自动登录完成！程序将在3秒后退出...")
+                    self.cancel_token.sleep(3)
+                    self.logger.info("程序退出")
+                    import sys
+                    sys.exit(0)
                 else:
-                    self.logger.error("❌ 所有检测尝试均失败")
-                    return
+                    self.logger.error("❌ 自动登录失败")
+                return self._set_login_outcome('login_failed')
+            
+            # 没有账号密码时只处理同意按钮（如果有的话）
+            if scene.found('agree'):
+                self._act_and_confirm(
+                    lambda: self._detect_and_click_agree(scene),
+                    lambda: not self._is_template_visible(scene, 'agree'),
+                    description="同意协议弹窗消失",
+                )
+                scene = self.detect_scene(['enter_game'])
+            
+            # 检测是否存在进入游戏按钮
+            if self._detect_enter_game_button(scene=scene):
+                self.logger.warning("⚠️ 检测到需要登录，但未提供用户名和密码")
+                self.logger.info("请手动登录或使用 -u 和 -p 参数提供账号信息")
+                return self._set_login_outcome('manual_login')
+            self.logger.info("✅ 未发现进入游戏按钮，无需登录")
+            return self._set_login_outcome('no_login_ui')
+                
+        except Exception as e:
+            self.logger.error(f"检测登录状态失败: {e}")
+            return None
+    
+    def _set_login_outcome(self, outcome):
+        """记录本次登录的结果"""
+        self.login_outcome = outcome
+        self.timeline.add_metrics(login_outcome=outcome)
+        return outcome
     
-    def _detect_enter_game_button(self, threshold=0.8):
+    def _get_in_game_templates(self):
+        """assets目录中的游戏内HUD模板名称"""
+        return [name for name in self.template_registry.names() if name.startswith(IN_GAME_TEMPLATE_PREFIX)]
+    
+    def _is_in_game(self, scene):
+        """检测结果中是否出现了游戏内HUD元素"""
+        return any(scene.found(name) for name in self._get_in_game_templates())
+    
+    def _is_login_ui(self, scene):
+        """检测结果中是否出现了登录界面元素"""
+        return any(scene.found(name) for name in LOGIN_UI_TEMPLATES)
+    
+    @timeline_step('wait_for_login_ui', lambda result, *args, **kwargs: {'outcome': 'ready' if result else 'timeout'})
+    def _wait_for_login_ui(self, timeout, poll_policy=None, detect_in_game=False, allow_in_game_heuristic=False):
+        """轮询检测直到出现同意按钮或进入游戏按钮
+        
+        Args:
+            timeout: 最长等待时间（秒）
+            poll_policy: 轮询间隔策略
+            detect_in_game: 出现游戏内HUD元素时也立即返回
+            allow_in_game_heuristic: 没有HUD模板时，画面持续IN_GAME_SETTLE_TIME秒
+                不是纯色且没有登录界面元素也视为已在游戏中
+        
+        Returns:
+            SceneResult: 出现登录界面（或游戏内画面）时的检测结果，超时返回None
+        """
+        names = ['agree', 'enter_game']
+        hud_names = self._get_in_game_templates() if detect_in_game else []
+        use_heuristic = detect_in_game and allow_in_game_heuristic and not hud_names
+        settled = {'since': None}
+        
+        def login_ui_visible():
+            scene = self.detect_scene(names + hud_names)
+            if scene is None:
+                return None
+            if scene.found('agree') or scene.found('enter_game'):
+                return scene
+            if hud_names and self._is_in_game(scene):
+                self.logger.info(f"✅ 检测到游戏内界面: {', '.join(n for n in hud_names if scene.found(n))}")
+                return scene
+            if use_heuristic:
+                # 画面持续显示非登录界面的内容时视为已在游戏中
+                if scene.screenshot is None or is_blank_frame(scene.screenshot):
+                    settled['since'] = None
+                elif settled['since'] is None:
+                    settled['since'] = time.monotonic()
+                elif time.monotonic() - settled['since'] >= IN_GAME_SETTLE_TIME:
+                    self.logger.info(f"✅ 画面持续 {IN_GAME_SETTLE_TIME:g} 秒未出现登录界面，视为已在游戏中")
+                    return scene
+            return None
+        
+        description = "登录界面或游戏内画面" if detect_in_game else "登录界面"
+        return wait_until(login_ui_visible, timeout, poll_policy or LOGIN_POLL_POLICY, description=description,
+                          cancel_token=self.cancel_token)
+    
+    def _detect_enter_game_button(self, threshold=0.8, scene=None):
         """检测屏幕中是否存在进入游戏按钮"""
         try:
             self.logger.info("开始检测进入游戏按钮...")
             
-            # 截取屏幕
-            screenshot = self._capture_screen()
-            if screenshot is None:
+            # 没有传入场景结果时单独截屏检测
+            if scene is None:
+                scene = self.detect_scene(['enter_game'], thresholds={'enter_game': threshold})
+            if scene is None:
                 return False
             
-            # 查找模板
-            top_left, bottom_right = self._find_template_in_screen(screenshot, threshold)
-            
-            if top_left is not None and bottom_right is not None:
+            if scene.found('enter_game'):
                 self.logger.info("✅ 检测到进入游戏按钮，需要登录")
                 return True
             else:
@@ -320,27 +777,447 @@ class GameManager:
             self.logger.error(f"检测进入游戏按钮失败: {e}")
             return False
     
-    def _capture_screen(self):
-        """截取屏幕"""
+    def start_background_capture(self):
+        """启动后台截图线程，之后的检测直接读取缓冲区中的最新一帧"""
         try:
-            import pyautogui
-            import numpy as np
-            import cv2
-            
-            # 使用pyautogui截取屏幕
-            screenshot = pyautogui.screenshot()
-            # 转换为OpenCV格式
-            screenshot_cv = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
-            return screenshot_cv
+            if self.background_capture is not None and self.background_capture.is_running():
+                return True
+            self.background_capture = BackgroundCapture(
+                self.capture_backend,
+                fps=self.detection_config.get('capture_fps', 10),
+                ring_size=self.detection_config.get('capture_ring_size', 4),
+                grayscale=self.detection_config.get('grayscale', False),
+                before_grab=self._update_capture_region,
+            )
+            self.background_capture.start()
+            return True
+        except Exception as e:
+            self.logger.error(f"启动后台截图线程失败: {e}")
+            self.background_capture = None
+            return False
+    
+    def stop_background_capture(self):
+        """停止后台截图线程"""
+        if self.background_capture is not None:
+            self.background_capture.stop()
+            self.background_capture = None
+    
+    @timeline_step('capture', _describe_capture)
+    def _capture_frame(self, grayscale=False, newer_than=None):
+        """截取一帧
+        
+        Args:
+            grayscale: 是否返回灰度图
+            newer_than: 后台截图时只接受截取时间晚于该时间戳的帧，默认晚于最后一次点击
+            
+        Returns:
+            tuple: (截图, 截图左上角的屏幕坐标)，失败时截图为None
+        """
+        if self.background_capture is not None and self.background_capture.is_running():
+            # 不使用点击之前截取的画面
+            newer_than = max(newer_than or 0.0, self._last_click_time)
+            frame = self.background_capture.wait_for_frame(newer_than)
+            if frame is None:
+                self.logger.error("等待后台截图超时")
+                return None, (0, 0)
+            image = frame.image
+            if grayscale:
+                image = to_grayscale(image)
+            elif image.ndim == 2:
+                image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+            return image, frame.origin
+        
+        # 使用配置的截图后端截取屏幕（或游戏窗口）
+        self._update_capture_region()
+        return self.capture_backend.grab(grayscale), self.capture_backend.get_origin()
+    
+    def _capture_screen(self, grayscale=False):
+        """截取屏幕，grayscale为True时直接返回灰度图"""
+        try:
+            return self._capture_frame(grayscale)[0]
         except Exception as e:
             self.logger.error(f"截取屏幕失败: {e}")
             return None
     
-    def find_template_in_image(self, target_image, template_image, threshold=0.8):
-        """在目标图片中查找模板图片（抽象方法）"""
+    @timeline_step('detect_scene', _describe_scene)
+    def detect_scene(self, names=None, screenshot=None, thresholds=None, newer_than=None):
+        """截取一帧屏幕并匹配所有（或指定的）已注册模板
+        
+        Args:
+            names: 要匹配的模板名称列表，为None时匹配注册表中的全部模板
+            screenshot: 已有的截图，为None时截取当前屏幕
+            thresholds: 覆盖默认阈值的字典 {模板名称: 阈值}
+            newer_than: 后台截图时只使用截取时间晚于该时间戳的帧
+            
+        Returns:
+            SceneResult: 各模板的相似度和匹配区域，截屏失败时返回None
+        """
         try:
-            import cv2
+            # 灰度模式下截图后端直接从原始像素格式转换为灰度，省去中间的BGR帧
+            grayscale = self.detection_config.get('grayscale', False)
+            
+            # 匹配坐标基于截图，只截取游戏窗口时需要加上窗口位置才是屏幕坐标
+            origin = (0, 0)
+            if screenshot is None:
+                screenshot, origin = self._capture_frame(grayscale, newer_than)
+            if screenshot is None:
+                self.logger.error("无法截取屏幕")
+                return None
+            
+            if names is None:
+                names = self.template_registry.names()
+            
+            # 画面与之前检测过的帧相同时直接返回缓存结果
+            cache_key = None
+            if self.detection_config.get('scene_cache', True):
+                cache_key = self._get_scene_cache_key(screenshot, names, thresholds)
+                cached = self.scene_cache.get(cache_key)
+                if cached is not None:
+                    cached_scales, cached_matches = cached
+                    scene = SceneResult(screenshot, time.time(), origin, *cached_scales)
+                    for match in cached_matches:
+                        scene.add(match)
+                    self.logger.debug(f"画面未变化，使用缓存的检测结果: {scene.summary()}")
+                    return scene
             
+            # 灰度模式下每帧只转换一次（截图已是灰度时不再转换），所有模板共用
+            match_image = to_grayscale(screenshot) if grayscale else screenshot
+            
+            # 缩小分辨率检测：在缩小的画面上用同比例缩小的模板匹配，原始截图只用于点击前精确定位
+            detection_scale = self.detection_config.get('detection_scale', 1.0)
+            match_image = scale_image(match_image, detection_scale)
+            
+            # 多尺度模式下按分辨率缩放模板
+            scale = detection_scale
+            if self.detection_config.get('multi_scale', False):
+                scale = self._get_template_scale(match_image, names, grayscale, thresholds)
+            
+            masked = self.detection_config.get('masked', True)
+            
+            # 帧差分门控：与各模板上次匹配时的画面比较，只对发生变化的区域重新匹配
+            gate = self.change_gate if self.detection_config.get('change_gate', True) else None
+            thumb = None
+            uniform = False
+            if gate is not None:
+                options = (grayscale, masked, self.detection_config.get('pyramid'), scale, detection_scale,
+                           self.matching_backend.name)
+                if gate.options != options:
+                    gate.reset(options)
+                thumb = gate.thumbnail(match_image)
+                uniform = gate.is_uniform(thumb)
+                if uniform:
+                    gate.uniform_frames += 1
+            
+            matches = {}
+            jobs = []
+            for name in names:
+                template = self.template_registry.get_scaled(name, scale, grayscale)
+                if template is None:
+                    self.logger.warning(f"模板未加载: {name}.png")
+                    continue
+                mask = self.template_registry.get_scaled_mask(name, scale) if masked else None
+                threshold = self._get_template_threshold(name, thresholds)
+                
+                region = None
+                if gate is not None:
+                    key = (name, threshold)
+                    if uniform:
+                        # 纯色画面（加载中）不可能包含界面元素
+                        gate.record_skip(key)
+                        matches[name] = TemplateMatch(name, 0.0, None, None, threshold)
+                        gate.remember(key, thumb, matches[name])
+                        continue
+                    
+                    previous = gate.get_previous(key, thumb)
+                    if previous is not None and previous.found:
+                        box = previous.top_left + previous.bottom_right
+                        if gate.get_changed_box(key, thumb, match_image.shape, box) is None:
+                            gate.record_skip(key)
+                            matches[name] = previous
+                            continue
+                    elif previous is not None:
+                        changed = gate.get_changed_box(key, thumb, match_image.shape)
+                        if changed is None:
+                            gate.record_skip(key)
+                            matches[name] = previous
+                            continue
+                        # 模板可能与变化区域部分重叠，按模板尺寸向外扩展
+                        image_h, image_w = match_image.shape[:2]
+                        template_h, template_w = template.shape[:2]
+                        region = (
+                            max(changed[0] - template_w, 0),
+                            max(changed[1] - template_h, 0),
+                            min(changed[2] + template_w, image_w),
+                            min(changed[3] + template_h, image_h),
+                        )
+                
+                jobs.append((name, template, threshold, mask, region))
+            
+            # cv2.matchTemplate会释放GIL，多个模板可以在线程池中并行匹配
+            if self.detection_config.get('parallel', True) and len(jobs) > 1:
+                executor = self._get_match_executor()
+                futures = [
+                    executor.submit(self._run_match_job, match_image, name, template, threshold, mask, region)
+                    for name, template, threshold, mask, region in jobs
+                ]
+                results = [future.result() for future in futures]
+            else:
+                results = [
+                    self._run_match_job(match_image, name, template, threshold, mask, region)
+                    for name, template, threshold, mask, region in jobs
+                ]
+            
+            for (name, _, threshold, _, region), (top_left, bottom_right, similarity, elapsed) in zip(jobs, results):
+                matches[name] = TemplateMatch(name, similarity, top_left, bottom_right, threshold)
+                if gate is not None:
+                    key = (name, threshold)
+                    if region is None:
+                        gate.record_full(key, elapsed)
+                    else:
+                        gate.record_partial(key, elapsed)
+                    gate.remember(key, thumb, matches[name])
+            
+            # 匹配坐标换算回原始分辨率
+            scene = SceneResult(screenshot, time.time(), origin, detection_scale, scale / detection_scale)
+            for name in names:
+                if name in matches:
+                    scene.add(matches[name].rescale(1.0 / detection_scale))
+            
+            if cache_key is not None:
+                self.scene_cache.put(cache_key, ((scene.detection_scale, scene.template_scale),
+                                                 list(scene.matches.values())))
+            
+            self.logger.debug(f"场景检测结果: {scene.summary()}")
+            return scene
+            
+        except Exception as e:
+            self.logger.error(f"场景检测失败: {e}")
+            return None
+    
+    def _get_scene_cache_key(self, screenshot, names, thresholds=None):
+        """生成检测结果缓存键：帧指纹 + 模板集合及阈值 + 影响结果的匹配选项"""
+        templates = tuple((name, self._get_template_threshold(name, thresholds)) for name in names)
+        options = tuple(
+            self.detection_config.get(key)
+            for key in ('grayscale', 'masked', 'pyramid', 'multi_scale', 'detection_scale')
+        )
+        return frame_fingerprint(screenshot), templates, options, self.matching_backend.name
+    
+    def get_scene_cache_stats(self):
+        """获取检测结果缓存的命中统计"""
+        return self.scene_cache.get_stats()
+    
+    def get_change_gate_stats(self):
+        """获取帧差分门控跳过的匹配次数和节省的时间"""
+        return self.change_gate.get_stats()
+    
+    def _get_match_executor(self):
+        """获取模板匹配线程池，线程数默认与CPU核心数相同"""
+        if self._match_executor is None:
+            max_workers = self.detection_config.get('max_workers') or os.cpu_count() or 1
+            self._match_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='template-match')
+        return self._match_executor
+    
+    def _get_template_threshold(self, name, thresholds=None):
+        """获取模板的匹配阈值"""
+        if thresholds and name in thresholds:
+            return thresholds[name]
+        return TEMPLATE_THRESHOLDS.get(name, 0.8)
+    
+    def _get_template_scale(self, image, names, grayscale=False, thresholds=None):
+        """获取当前分辨率下的模板缩放比例，没有缓存时搜索一次并保存
+        
+        纯色画面不搜索；搜索失败后按SCALE_SEARCH_RETRY_INTERVAL开始加倍的间隔重试，期间使用按高度估算的比例。
+        """
+        resolution_key = ScaleCache.get_resolution_key(image.shape)
+        scale = self.scale_cache.get(resolution_key)
+        if scale is not None:
+            return scale
+        
+        # 模板截取自1080p截图，以高度比例作为搜索起点
+        base_scale = round(image.shape[0] / TEMPLATE_BASE_HEIGHT, 3)
+        
+        # 纯色的加载画面上不可能找到模板，不做搜索
+        if is_blank_frame(image):
+            return base_scale
+        # 上次搜索失败后等待一段时间再重试，避免每次轮询都重复完整的比例搜索
+        retry = self._scale_search_retries.get(resolution_key)
+        if retry is not None and time.monotonic() < retry[1]:
+            return base_scale
+        
+        scales = get_candidate_scales(
+            base_scale,
+            self.detection_config.get('scale_min', 0.5),
+            self.detection_config.get('scale_max', 2.0),
+            self.detection_config.get('scale_step', 0.05),
+        )
+        
+        # 大模板特征更多，优先用于确定比例
+        templates = []
+        for name in names:
+            template = self.template_registry.get_gray(name) if grayscale else self.template_registry.get(name)
+            if template is not None:
+                templates.append((name, template))
+        templates.sort(key=lambda item: item[1].shape[0] * item[1].shape[1], reverse=True)
+        
+        start = time.perf_counter()
+        for name, template in templates:
+            coarse_scale, _ = search_template_scale(image, template, scales)
+            if coarse_scale is None:
+                continue
+            
+            # 在原始分辨率上细化并确认搜索到的比例
+            best_scale, similarity, _ = refine_template_scale(
+                image, template, coarse_scale, self.detection_config.get('scale_step', 0.05)
+            )
+            if similarity >= self._get_template_threshold(name, thresholds):
+                elapsed = time.perf_counter() - start
+                self.logger.info(f"✅ 分辨率 {resolution_key} 的模板缩放比例为 {best_scale}"
+                                 f"（由 {name} 确认, 相似度={similarity:.3f}, 耗时={elapsed:.2f}s）")
+                self.scale_cache.set(resolution_key, best_scale)
+                self._scale_search_retries.pop(resolution_key, None)
+                return best_scale
+        
+        interval = SCALE_SEARCH_RETRY_INTERVAL
+        if retry is not None:
+            interval = min(retry[0] * 2, SCALE_SEARCH_MAX_INTERVAL)
+        self._scale_search_retries[resolution_key] = (interval, time.monotonic() + interval)
+        self.logger.debug(f"分辨率 {resolution_key} 下暂未确定模板缩放比例，使用 {base_scale}，"
+                          f"{interval:.0f}s 后再次搜索（本次耗时 {time.perf_counter() - start:.2f}s）")
+        return base_scale
+    
+    @timeline_step('match', _describe_match)
+    def _run_match_job(self, screenshot, name, template, threshold, mask=None, region=None):
+        """执行一个模板匹配任务，region不为空时只在该区域内搜索
+        
+        Returns:
+            tuple: (左上角, 右下角, 相似度, 耗时秒数)
+        """
+        start = time.perf_counter()
+        if region is None:
+            top_left, bottom_right, similarity = self._find_named_template(screenshot, name, template, threshold, mask)
+        else:
+            top_left, bottom_right, similarity = self.find_template_in_image(
+                screenshot, template, threshold, roi=region, mask=mask
+            )
+            if top_left is not None and self.detection_config.get('roi', True):
+                self._remember_position(screenshot, name, top_left, bottom_right)
+        return top_left, bottom_right, similarity, time.perf_counter() - start
+    
+    def _find_named_template(self, screenshot, name, template, threshold, mask=None):
+        """查找已注册模板，优先搜索上次命中位置附近的ROI，失败后全图搜索"""
+        use_roi = self.detection_config.get('roi', True)
+        
+        if use_roi:
+            roi = self.roi_tracker.get_roi(name, screenshot.shape)
+            if roi is None:
+                roi = self._get_cached_layout_roi(screenshot, name)
+            if roi is not None:
+                top_left, bottom_right, similarity = self.find_template_in_image(
+                    screenshot, template, threshold, roi=roi, mask=mask
+                )
+                self.roi_tracker.record(name, top_left is not None)
+                if top_left is not None:
+                    return top_left, bottom_right, similarity
+                self.logger.debug(f"{name} 未在ROI内命中，改为全图搜索")
+        
+        top_left, bottom_right, similarity = self.find_template_in_image(
+            screenshot, template, threshold, mask=mask
+        )
+        if use_roi and top_left is not None:
+            self._remember_position(screenshot, name, top_left, bottom_right)
+        return top_left, bottom_right, similarity
+    
+    def _get_cached_layout_roi(self, screenshot, name):
+        """用之前运行时记录的界面布局生成ROI，没有记录或模板已变化时返回None"""
+        if not self.detection_config.get('layout_cache', True):
+            return None
+        box = self.layout_cache.get(screenshot.shape, name, self.template_registry.get_hash(name))
+        if box is None:
+            return None
+        self.logger.debug(f"{name} 使用界面布局缓存中的位置: {box}")
+        self.roi_tracker.learn(name, box[:2], box[2:])
+        return self.roi_tracker.get_roi(name, screenshot.shape)
+    
+    def _remember_position(self, screenshot, name, top_left, bottom_right):
+        """记录模板命中位置：更新本次运行的ROI，并写入界面布局缓存供下次启动使用"""
+        self.roi_tracker.learn(name, top_left, bottom_right)
+        template_hash = self.template_registry.get_hash(name)
+        if self.detection_config.get('layout_cache', True) and template_hash is not None:
+            self.layout_cache.set(screenshot.shape, name, template_hash, top_left, bottom_right)
+    
+    def get_roi_stats(self):
+        """获取ROI快速路径的命中统计"""
+        return self.roi_tracker.get_stats()
+    
+    @timeline_step('click', _describe_click)
+    def _click_scene_match(self, scene, name, label):
+        """点击场景检测结果中指定模板的中心点"""
+        import pyautogui
+        
+        match = scene.get(name) if scene is not None else None
+        if match is None or not match.found:
+            similarity = match.similarity if match is not None else 0.0
+            self.logger.debug(f"未找到{label}，最大相似度: {similarity:.3f}")
+            return False
+        
+        if scene.detection_scale != 1.0:
+            self._refine_scene_match(scene, name)
+        
+        center_x, center_y = scene.screen_center(name)
+        self.logger.info(f"✅ 找到{label}！位置: ({center_x}, {center_y}), 相似度: {match.similarity:.3f}")
+        
+        pyautogui.click(center_x, center_y)
+        self._last_click_time = time.time()
+        self.logger.info(f"✅ 已点击{label}: ({center_x}, {center_y})")
+        return True
+    
+    def _refine_scene_match(self, scene, name):
+        """缩小分辨率检测的结果在原始分辨率截图上精确定位，只搜索匹配区域附近"""
+        match = scene.get(name)
+        screenshot = scene.screenshot
+        template = self.template_registry.get_scaled(name, scene.template_scale, screenshot.ndim == 2)
+        if template is None:
+            return match
+        
+        # 缩小后一个像素对应原图的若干像素，按此扩展搜索区域
+        margin = int(round(1.0 / scene.detection_scale)) + 2
+        image_h, image_w = screenshot.shape[:2]
+        roi = (
+            max(match.top_left[0] - margin, 0),
+            max(match.top_left[1] - margin, 0),
+            min(match.bottom_right[0] + margin, image_w),
+            min(match.bottom_right[1] + margin, image_h),
+        )
+        mask = self.template_registry.get_scaled_mask(name, scene.template_scale) \
+            if self.detection_config.get('masked', True) else None
+        top_left, bottom_right, similarity = self.find_template_in_image(
+            screenshot, template, match.threshold, pyramid=False, roi=roi, mask=mask
+        )
+        if top_left is None:
+            self.logger.debug(f"{name} 原始分辨率精确定位失败，使用缩小画面上的位置")
+            return match
+        
+        refined = TemplateMatch(name, similarity, top_left, bottom_right, match.threshold)
+        scene.add(refined)
+        return refined
+    
+    def find_template_in_image(self, target_image, template_image, threshold=0.8, pyramid=None, roi=None,
+                               grayscale=None, backend=None, mask=None):
+        """在目标图片中查找模板图片（抽象方法）
+        
+        Args:
+            target_image: 目标图片
+            template_image: 模板图片
+            threshold: 相似度阈值
+            pyramid: 是否使用金字塔匹配，为None时使用配置文件中的设置
+            roi: 只在 (x0, y0, x1, y1) 区域内搜索，返回的坐标仍相对于目标图片
+            grayscale: 是否使用单通道匹配，为None时使用配置文件中的设置；
+                已经是单通道的图片不会重复转换
+            backend: 匹配后端（MatchingBackend实例），为None时使用配置文件中的设置
+            mask: 模板的透明度掩码，透明像素不参与匹配
+        """
+        try:
             if target_image is None:
                 self.logger.error("目标图片为空")
                 return None, None, 0.0
@@ -349,11 +1226,32 @@ class GameManager:
                 self.logger.error("模板图片为空")
                 return None, None, 0.0
             
-            # 使用模板匹配
-            result = cv2.matchTemplate(target_image, template_image, cv2.TM_CCOEFF_NORMED)
+            if pyramid is None:
+                pyramid = self.detection_config.get('pyramid', False)
+            if grayscale is None:
+                grayscale = self.detection_config.get('grayscale', False)
+            if backend is None:
+                backend = self.matching_backend
             
-            # 查找匹配位置
-            min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
+            if grayscale:
+                target_image = to_grayscale(target_image)
+                template_image = to_grayscale(template_image)
+            
+            # 限定搜索区域
+            offset_x, offset_y = 0, 0
+            if roi is not None:
+                x0, y0, x1, y1 = roi
+                h, w = template_image.shape[:2]
+                if x1 - x0 >= w and y1 - y0 >= h:
+                    target_image = target_image[y0:y1, x0:x1]
+                    offset_x, offset_y = x0, y0
+            
+            # 使用模板匹配
+            if pyramid:
+                max_val, max_loc = pyramid_match(target_image, template_image, match_func=backend.match, mask=mask)
+            else:
+                max_val, max_loc = backend.match(target_image, template_image, mask)
+            max_loc = (max_loc[0] + offset_x, max_loc[1] + offset_y)
             
             self.logger.debug(f"模板匹配结果: 最大相似度={max_val:.3f}, 阈值={threshold}")
             
@@ -402,65 +1300,176 @@ class GameManager:
             self.logger.error(f"屏幕模板匹配失败: {e}")
             return None, None
     
-    def _perform_auto_login(self, username, password):
-        """执行自动登录"""
+    @timeline_step('perform_auto_login')
+    def _perform_auto_login(self, username, password, timeout=LOGIN_FLOW_TIMEOUT):
+        """执行自动登录：按屏幕上实际出现的界面逐步处理，直到进入游戏"""
         try:
             self.logger.info("开始执行自动登录...")
             
-            # 等待一下让界面稳定
-            time.sleep(2)
-            
-            # 表单填写前：检测并点击同意按钮
-            if self._detect_and_click_agree():
-                time.sleep(1)
-            
-            # 1. 检测并点击圆圈（如果存在）
-            if self._detect_and_click_circle():
-                time.sleep(1)
-            
-            # 2. 点击进入游戏按钮（如果存在）
-            if self._click_enter_game_button():
-                time.sleep(1)
-            
-            # 3. 查找并点击账号输入框
-            if self._click_account_field():
-                time.sleep(0.5)
-                # 清空输入框并输入账号
-                self._secretly_write(username)
-                time.sleep(0.5)
-            
-            # 4. 查找并点击密码输入框
-            if self._click_password_field():
-                time.sleep(0.5)
-                # 清空输入框并输入密码
-                self._secretly_write(password)
-                time.sleep(0.5)
-            
-            # 5. 点击登录按钮
-            if self._click_login_button():
-                self.logger.info("✅ 登录信息输入完成，等待登录处理...")
-                time.sleep(5)  # 等待登录处理
-                
-                # 表单填写后：检测并点击同意按钮
-                if self._detect_and_click_agree():
-                    time.sleep(5)
-                
-                # 6. 再次点击进入游戏按钮（登录后可能需要再次点击）
-                if self._click_enter_game_button():
-                    self.logger.info("✅ 已点击进入游戏按钮，登录流程完成")
-                    time.sleep(2)  # 等待游戏启动
-                    return True
-                else:
-                    self.logger.warning("⚠️ 未找到进入游戏按钮，但登录信息已输入")
-                    return True
-            else:
-                self.logger.warning("❌ 未找到登录按钮")
-                return False
+            machine = LoginStateMachine(
+                self._build_login_states(username, password), self.detect_scene, LOGIN_POLL_POLICY,
+                self.cancel_token, lambda state: self._report_progress(f"自动登录: {state.label}"),
+            )
+            final_state = machine.run(timeout)
+            machine.log_summary()
+            self.login_state_times = machine.get_state_times()
+            
+            if final_state in ('in_game', 'in_game_hud'):
+                self.logger.info("✅ 已进入游戏，登录流程完成")
+                return True
+            if machine.visits.get('login_form'):
+                self.logger.warning("⚠️ 未确认进入游戏，但登录信息已输入")
+                return True
+            return False
                 
         except Exception as e:
             self.logger.error(f"自动登录失败: {e}")
             return False
     
+    def _build_login_states(self, username, password):
+        """登录流程的状态定义，按判定优先级排列"""
+        progress = {'entered': False}
+        
+        def click_enter_game(scene):
+            def click():
+                if not self._click_enter_game_button(scene=scene):
+                    return False
+                # 服务器较慢或加载过渡时按钮可能在确认超时之后才消失，点击成功即记录已进入
+                progress['entered'] = True
+                return True
+            
+            # 按钮消失说明点击已生效
+            return self._act_and_confirm(
+                click,
+                lambda: not self._is_template_visible(scene, 'enter_game'),
+                description="进入游戏按钮消失",
+            )
+        
+        def click_agree(scene):
+            return self._act_and_confirm(
+                lambda: self._detect_and_click_agree(scene),
+                lambda: not self._is_template_visible(scene, 'agree'),
+                description="同意协议弹窗消失",
+            )
+        
+        # 每个操作都会等待预期的界面变化，不需要额外的固定等待
+        return [
+            # 出现游戏内HUD元素时立即结束
+            LoginState('in_game_hud', '游戏内（HUD）', self._is_in_game, terminal=True),
+            # 同意协议弹窗会遮挡其它界面，优先处理
+            LoginState('agree', '同意协议', lambda scene: scene.found('agree'), click_agree, settle=0),
+            # 输入框模板为空输入框，已填写的表单不会进入该状态
+            LoginState('login_form', '登录表单',
+                       lambda scene: scene.found('input_username') or scene.found('input_password'),
+                       lambda scene: self._fill_login_form(scene, username, password), settle=0, max_visits=2),
+            LoginState('enter_game', '进入游戏', lambda scene: scene.found('enter_game'), click_enter_game,
+                       settle=0),
+            # 点击进入游戏后登录界面元素全部消失，视为已进入游戏
+            LoginState('in_game', '游戏内',
+                       lambda scene: progress['entered'] and not self._is_login_ui(scene),
+                       terminal=True, confirmations=3),
+        ]
+    
+    def _fill_login_form(self, scene, username, password):
+        """勾选协议并填写画面上出现的空输入框"""
+        # 勾选不会改变其它元素的位置，继续使用同一次检测结果；
+        # 确认勾选和焦点时会重新截图，先复制画面，避免截图缓冲区被覆盖后截取到新画面作为参照
+        scene.keep_screenshot()
+        if scene.found('circle'):
+            reference = self._crop_match_region(scene.screenshot, scene.get('circle'))
+            self._act_and_confirm(
+                lambda: self._detect_and_click_circle(scene),
+                lambda: self._is_region_changed(scene, 'circle', reference),
+                FOCUS_CONFIRM_TIMEOUT, "勾选状态变化",
+            )
+        
+        filled = True
+        # 输入账号不会改变密码输入框的位置
+        if scene.found('input_username'):
+            filled = self._fill_field(scene, 'input_username', self._click_account_field, username) and filled
+        if scene.found('input_password'):
+            filled = self._fill_field(scene, 'input_password', self._click_password_field, password) and filled
+        return filled
+    
+    def _fill_field(self, scene, name, click, text):
+        """点击输入框并输入文字，确认输入框的占位内容消失后返回True"""
+        reference = self._crop_match_region(scene.screenshot, scene.get(name))
+        if not click(scene):
+            return False
+        
+        # 等待输入框获得焦点（外观变化），超时后仍然尝试输入
+        wait_until(lambda: self._is_region_changed(scene, name, reference), FOCUS_CONFIRM_TIMEOUT,
+                   ACTION_POLL_POLICY, description="输入框获得焦点", cancel_token=self.cancel_token)
+        if not self._secretly_write(text):
+            return False
+        
+        # 输入成功后空输入框的占位内容会消失
+        if wait_until(lambda: not self._is_template_visible(scene, name), ACTION_CONFIRM_TIMEOUT,
+                      ACTION_POLL_POLICY, description="输入内容显示", cancel_token=self.cancel_token) is None:
+            self.logger.warning(f"⚠️ 输入后 {name} 仍为空，输入可能未生效")
+            return False
+        return True
+    
+    @timeline_step('confirm', _describe_confirm)
+    def _act_and_confirm(self, action, confirm, timeout=ACTION_CONFIRM_TIMEOUT, description="界面变化"):
+        """执行操作并等待预期的界面变化
+        
+        Args:
+            action: 执行操作的函数，返回是否成功
+            confirm: 检查预期变化是否出现的函数
+            timeout: 等待变化的最长时间（秒）
+            description: 日志中使用的变化描述
+            
+        Returns:
+            bool: 操作成功且在超时前观察到了预期变化
+        """
+        if not action():
+            return False
+        if wait_until(confirm, timeout, ACTION_POLL_POLICY, description=description,
+                      cancel_token=self.cancel_token) is None:
+            self.logger.warning(f"⚠️ 操作后未观察到{description}，点击可能未生效")
+            return False
+        return True
+    
+    def _crop_match_region(self, image, match, margin=ACTION_REGION_MARGIN):
+        """截取匹配区域及其四周margin像素的画面"""
+        image_h, image_w = image.shape[:2]
+        x0 = max(match.top_left[0] - margin, 0)
+        y0 = max(match.top_left[1] - margin, 0)
+        x1 = min(match.bottom_right[0] + margin, image_w)
+        y1 = min(match.bottom_right[1] + margin, image_h)
+        return image[y0:y1, x0:x1].copy()
+    
+    def _capture_match_region(self, scene, name):
+        """重新截图并截取模板上次匹配位置附近的画面，与检测时使用相同的颜色格式"""
+        frame, _ = self._capture_frame(grayscale=scene.screenshot.ndim == 2)
+        if frame is None:
+            return None
+        return self._crop_match_region(frame, scene.get(name))
+    
+    def _is_template_visible(self, scene, name):
+        """在模板上次匹配位置附近重新匹配，判断模板是否仍然可见"""
+        region = self._capture_match_region(scene, name)
+        template = self.template_registry.get_scaled(name, scene.template_scale, scene.screenshot.ndim == 2)
+        if region is None or template is None:
+            # 无法判断时视为仍然可见，继续等待
+            return True
+        if region.shape[0] < template.shape[0] or region.shape[1] < template.shape[1]:
+            return False
+        
+        match = scene.get(name)
+        top_left, _, _ = self.find_template_in_image(region, template, match.threshold, pyramid=False)
+        return top_left is not None
+    
+    def _is_region_changed(self, scene, name, reference):
+        """模板上次匹配位置附近的画面与reference相比是否发生了变化"""
+        region = self._capture_match_region(scene, name)
+        if region is None:
+            return False
+        if region.shape != reference.shape:
+            return True
+        return float(cv2.absdiff(region, reference).mean()) > REGION_CHANGE_THRESHOLD
+    
     def _ensure_IME_lang_en(self):
         """切换输入法语言/键盘语言至英文"""
         try:
@@ -483,6 +1492,7 @@ class GameManager:
             self.logger.error(f"切换输入法失败: {e}")
             return False
     
+    @timeline_step('type')
     def _secretly_write(self, text, interval=0.1):
         """模拟键盘输入字符串（不输出具体内容到日志）"""
         try:
@@ -500,26 +1510,16 @@ class GameManager:
             self.logger.error(f"键盘输入失败: {e}")
             return False
     
-    def _click_enter_game_button(self, threshold=0.8):
+    def _click_enter_game_button(self, threshold=0.8, scene=None):
         """点击进入游戏按钮"""
         try:
-            import pyautogui
-            
             self.logger.info("尝试点击进入游戏按钮...")
             
             # 查找按钮位置
-            top_left, bottom_right = self._find_template_in_screen(threshold=threshold)
+            if scene is None:
+                scene = self.detect_scene(['enter_game'], thresholds={'enter_game': threshold})
             
-            if top_left is not None and bottom_right is not None:
-                # 计算按钮中心点
-                center_x = (top_left[0] + bottom_right[0]) // 2
-                center_y = (top_left[1] + bottom_right[1]) // 2
-                
-                self.logger.info(f"点击按钮中心位置: ({center_x}, {center_y})")
-                
-                # 点击按钮
-                pyautogui.click(center_x, center_y)
-                self.logger.info("✅ 已点击进入游戏按钮")
+            if self._click_scene_match(scene, 'enter_game', '进入游戏按钮'):
                 return True
             else:
                 self.logger.warning("❌ 未找到进入游戏按钮，无法点击")
@@ -537,219 +1537,61 @@ class GameManager:
         """验证游戏路径是否有效"""
         return self.config_manager.validate_game_path(path)
     
-    def _click_account_field(self):
+    def _click_account_field(self, scene=None):
         """点击账号输入框"""
         try:
-            import pyautogui
-            import cv2
-            
             self.logger.info("尝试点击账号输入框...")
             
-            # 加载账号输入框模板
-            username_template_path = os.path.join(os.path.dirname(__file__), 'assets', 'input_username.png')
-            if not os.path.exists(username_template_path):
-                self.logger.warning(f"账号输入框模板不存在: {username_template_path}")
-                return False
-            
-            username_template = cv2.imread(username_template_path, cv2.IMREAD_COLOR)
-            if username_template is None:
-                self.logger.error("无法加载账号输入框模板")
-                return False
-            
-            # 截取屏幕
-            screenshot = self._capture_screen()
-            if screenshot is None:
-                self.logger.error("无法截取屏幕")
-                return False
-            
-            # 使用模板匹配查找账号输入框
-            top_left, bottom_right, similarity = self.find_template_in_image(
-                screenshot, username_template, threshold=0.7
-            )
+            # 没有传入场景结果时单独截屏检测
+            if scene is None:
+                scene = self.detect_scene(['input_username'])
             
-            if top_left is not None and bottom_right is not None:
-                # 计算输入框中心点
-                center_x = (top_left[0] + bottom_right[0]) // 2
-                center_y = (top_left[1] + bottom_right[1]) // 2
-                
-                self.logger.info(f"✅ 找到账号输入框！位置: ({center_x}, {center_y}), 相似度: {similarity:.3f}")
-                
-                # 点击输入框
-                pyautogui.click(center_x, center_y)
-                self.logger.info(f"✅ 已点击账号输入框: ({center_x}, {center_y})")
-                return True
-            else:
-                self.logger.debug(f"未找到账号输入框，最大相似度: {similarity:.3f}")
-                return False
+            return self._click_scene_match(scene, 'input_username', '账号输入框')
                 
         except Exception as e:
             self.logger.error(f"点击账号输入框失败: {e}")
             return False
     
-    def _click_password_field(self):
+    def _click_password_field(self, scene=None):
         """点击密码输入框"""
         try:
-            import pyautogui
-            import cv2
-            
             self.logger.info("尝试点击密码输入框...")
             
-            # 加载密码输入框模板
-            password_template_path = os.path.join(os.path.dirname(__file__), 'assets', 'input_password.png')
-            if not os.path.exists(password_template_path):
-                self.logger.warning(f"密码输入框模板不存在: {password_template_path}")
-                return False
-            
-            password_template = cv2.imread(password_template_path, cv2.IMREAD_COLOR)
-            if password_template is None:
-                self.logger.error("无法加载密码输入框模板")
-                return False
-            
-            # 截取屏幕
-            screenshot = self._capture_screen()
-            if screenshot is None:
-                self.logger.error("无法截取屏幕")
-                return False
-            
-            # 使用模板匹配查找密码输入框
-            top_left, bottom_right, similarity = self.find_template_in_image(
-                screenshot, password_template, threshold=0.7
-            )
+            # 没有传入场景结果时单独截屏检测
+            if scene is None:
+                scene = self.detect_scene(['input_password'])
             
-            if top_left is not None and bottom_right is not None:
-                # 计算输入框中心点
-                center_x = (top_left[0] + bottom_right[0]) // 2
-                center_y = (top_left[1] + bottom_right[1]) // 2
-                
-                self.logger.info(f"✅ 找到密码输入框！位置: ({center_x}, {center_y}), 相似度: {similarity:.3f}")
-                
-                # 点击输入框
-                pyautogui.click(center_x, center_y)
-                self.logger.info(f"✅ 已点击密码输入框: ({center_x}, {center_y})")
-                return True
-            else:
-                self.logger.debug(f"未找到密码输入框，最大相似度: {similarity:.3f}")
-                return False
+            return self._click_scene_match(scene, 'input_password', '密码输入框')
                 
         except Exception as e:
             self.logger.error(f"点击密码输入框失败: {e}")
             return False
     
-    def _click_login_button(self):
-        """点击登录按钮"""
-        try:
-            import pyautogui
-            
-            self.logger.info("尝试点击登录按钮...")
-            
-            # 这里应该使用模板匹配找到登录按钮的位置
-            # 暂时使用固定坐标（需要根据实际游戏界面调整）
-            login_button_x = 960  # 屏幕中心
-            login_button_y = 500  # 大概的登录按钮位置
-            
-            pyautogui.click(login_button_x, login_button_y)
-            self.logger.info(f"✅ 已点击登录按钮: ({login_button_x}, {login_button_y})")
-            return True
-            
-        except Exception as e:
-            self.logger.error(f"点击登录按钮失败: {e}")
-            return False
-            
-    def _detect_and_click_circle(self):
+    def _detect_and_click_circle(self, scene=None):
         """检测并点击圆圈"""
         try:
-            import pyautogui
-            import cv2
-            import numpy as np
-            
             self.logger.info("检测圆圈...")
             
-            # 加载圆圈模板
-            circle_template_path = os.path.join(os.path.dirname(__file__), 'assets', 'circle.png')
-            if not os.path.exists(circle_template_path):
-                self.logger.warning(f"圆圈模板不存在: {circle_template_path}")
-                return False
-            
-            circle_template = cv2.imread(circle_template_path, cv2.IMREAD_COLOR)
-            if circle_template is None:
-                self.logger.error("无法加载圆圈模板")
-                return False
-            
-            # 截取屏幕
-            screenshot = self._capture_screen()
-            if screenshot is None:
-                self.logger.error("无法截取屏幕")
-                return False
+            # 没有传入场景结果时单独截屏检测
+            if scene is None:
+                scene = self.detect_scene(['circle'])
             
-            # 使用模板匹配查找圆圈
-            top_left, bottom_right, similarity = self.find_template_in_image(
-                screenshot, circle_template, threshold=0.7
-            )
-            
-            if top_left is not None and bottom_right is not None:
-                # 计算圆圈中心点
-                center_x = (top_left[0] + bottom_right[0]) // 2
-                center_y = (top_left[1] + bottom_right[1]) // 2
-                
-                self.logger.info(f"✅ 找到圆圈！位置: ({center_x}, {center_y}), 相似度: {similarity:.3f}")
-                
-                # 点击圆圈
-                pyautogui.click(center_x, center_y)
-                self.logger.info(f"✅ 已点击圆圈: ({center_x}, {center_y})")
-                return True
-            else:
-                self.logger.debug(f"未找到圆圈，最大相似度: {similarity:.3f}")
-                return False
+            return self._click_scene_match(scene, 'circle', '圆圈')
                 
         except Exception as e:
             self.logger.error(f"检测和点击圆圈失败: {e}")
             return False
     
-    def _detect_and_click_agree(self):
+    def _detect_and_click_agree(self, scene=None):
         """检测并点击同意按钮"""
         try:
-            import pyautogui
-            import cv2
-            import numpy as np
-            
             self.logger.info("检测同意按钮...")
             
-            # 加载同意按钮模板
-            agree_template_path = os.path.join(os.path.dirname(__file__), 'assets', 'agree.png')
-            if not os.path.exists(agree_template_path):
-                self.logger.debug(f"同意按钮模板不存在: {agree_template_path}")
-                return False
+            # 没有传入场景结果时单独截屏检测
+            if scene is None:
+                scene = self.detect_scene(['agree'])
             
-            agree_template = cv2.imread(agree_template_path, cv2.IMREAD_COLOR)
-            if agree_template is None:
-                self.logger.error("无法加载同意按钮模板")
-                return False
-            
-            # 截取屏幕
-            screenshot = self._capture_screen()
-            if screenshot is None:
-                self.logger.error("无法截取屏幕")
-                return False
-            
-            # 使用模板匹配查找同意按钮
-            top_left, bottom_right, similarity = self.find_template_in_image(
-                screenshot, agree_template, threshold=0.7
-            )
-            
-            if top_left is not None and bottom_right is not None:
-                # 计算同意按钮中心点
-                center_x = (top_left[0] + bottom_right[0]) // 2
-                center_y = (top_left[1] + bottom_right[1]) // 2
-                
-                self.logger.info(f"✅ 找到同意按钮！位置: ({center_x}, {center_y}), 相似度: {similarity:.3f}")
-                
-                # 点击同意按钮
-                pyautogui.click(center_x, center_y)
-                self.logger.info(f"✅ 已点击同意按钮: ({center_x}, {center_y})")
-                return True
-            else:
-                self.logger.debug(f"未找到同意按钮，最大相似度: {similarity:.3f}")
-                return False
+            return self._click_scene_match(scene, 'agree', '同意按钮')
                 
         except Exception as e:
             self.logger.error(f"检测和点击同意按钮失败: {e}")
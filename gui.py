@@ -6,13 +6,62 @@ import os
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, 
                             QWidget, QLabel, QLineEdit, QPushButton, QFileDialog, 
                             QGroupBox, QInputDialog, QMessageBox)
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
 from game_manager import GameManager
 from config_manager import ConfigManager
 from account_manager import AccountManager
 from logger import get_logger
 
 
+# 登录结果对应的界面提示
+LOGIN_OUTCOME_MESSAGES = {
+    'already_logged_in': "已在游戏中，无需登录",
+    'logged_in': "自动登录完成",
+    'login_failed': "自动登录失败",
+    'manual_login': "检测到登录界面，请手动登录",
+    'no_login_ui': "未出现登录界面",
+}
+
+
+class LoginWorker(QThread):
+    """在后台线程中执行登录，避免登录期间界面失去响应"""
+    
+    progress = pyqtSignal(str)
+    # (是否成功, 登录流程是否请求退出程序)
+    completed = pyqtSignal(bool, bool)
+    
+    def __init__(self, game_manager, username, password, game_path, parent=None):
+        super().__init__(parent)
+        self.game_manager = game_manager
+        self.username = username
+        self.password = password
+        self.game_path = game_path
+        self.logger = get_logger()
+        # 在界面线程中清除上一次的取消状态，之后点击取消按钮的请求不会被登录线程覆盖
+        self.game_manager.prepare_login()
+    
+    def run(self):
+        """执行登录，进度和结果通过信号发送到界面线程"""
+        self.game_manager.progress_callback = self.progress.emit
+        try:
+            success = self.game_manager.handle_login(
+                username=self.username, password=self.password, game_path=self.game_path
+            )
+            self.completed.emit(bool(success), False)
+        except SystemExit as e:
+            # 自动登录成功后登录流程会请求退出程序，交给界面线程处理
+            self.completed.emit(e.code in (0, None), True)
+        except Exception as e:
+            self.logger.error(f"登录线程异常: {e}")
+            self.completed.emit(False, False)
+        finally:
+            self.game_manager.progress_callback = None
+    
+    def cancel(self):
+        """取消登录，正在进行的等待会立即停止"""
+        self.game_manager.cancel_login()
+
+
 class ConfigWindow(QMainWindow):
     """配置窗口类"""
     
@@ -22,6 +71,7 @@ class ConfigWindow(QMainWindow):
         self.config_manager = ConfigManager()
         self.account_manager = AccountManager()
         self.logger = get_logger()
+        self.login_worker = None
         self.init_ui()
         self.load_config()
     
@@ -81,9 +131,21 @@ class ConfigWindow(QMainWindow):
         test_layout.addLayout(password_layout)
         
         # 测试启动按钮
-        test_btn = QPushButton("测试启动")
-        test_btn.clicked.connect(self.test_launch)
-        test_layout.addWidget(test_btn)
+        launch_layout = QHBoxLayout()
+        self.test_btn = QPushButton("测试启动")
+        self.test_btn.clicked.connect(self.test_launch)
+        launch_layout.addWidget(self.test_btn)
+        
+        # 取消登录按钮，只在登录进行中可用
+        self.cancel_btn = QPushButton("取消登录")
+        self.cancel_btn.setEnabled(False)
+        self.cancel_btn.clicked.connect(self.cancel_login)
+        launch_layout.addWidget(self.cancel_btn)
+        test_layout.addLayout(launch_layout)
+        
+        # 登录进度
+        self.status_label = QLabel("")
+        test_layout.addWidget(self.status_label)
         
         # 另存为账号按钮
         save_account_btn = QPushButton("另存为账号")
@@ -179,16 +241,59 @@ class ConfigWindow(QMainWindow):
         if reply != QMessageBox.Yes:
             return
         
-        # 使用统一的登录处理方法
-        success = self.game_manager.handle_login(username=username, password=password, game_path=path)
+        # 在后台线程中使用统一的登录处理方法，界面保持响应
+        self.login_worker = LoginWorker(self.game_manager, username, password, path, self)
+        self.login_worker.progress.connect(self.update_progress)
+        self.login_worker.completed.connect(self.on_login_finished)
+        self.test_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(True)
+        self.status_label.setText("正在准备登录...")
+        self.login_worker.start()
+    
+    def update_progress(self, message):
+        """显示登录进度"""
+        self.status_label.setText(message)
+    
+    def cancel_login(self):
+        """取消正在进行的登录"""
+        if self.login_worker is not None and self.login_worker.isRunning():
+            self.cancel_btn.setEnabled(False)
+            self.status_label.setText("正在取消...")
+            self.login_worker.cancel()
+    
+    def on_login_finished(self, success, exit_requested):
+        """登录线程结束后恢复界面并显示结果"""
+        self.login_worker = None
+        self.test_btn.setEnabled(True)
+        self.cancel_btn.setEnabled(False)
         
+        if exit_requested:
+            # 自动登录完成后与命令行模式一样退出程序
+            QApplication.exit(0 if success else 1)
+            return
+        
+        if self.game_manager.cancel_token.is_cancelled():
+            self.status_label.setText("登录已取消")
+            self.logger.info("登录已取消")
+            return
+        
+        outcome = LOGIN_OUTCOME_MESSAGES.get(self.game_manager.login_outcome, "")
         if success:
-            QMessageBox.information(self, "启动成功", "游戏启动成功！")
+            self.status_label.setText(outcome or "游戏启动成功")
+            QMessageBox.information(self, "启动成功", f"游戏启动成功！{outcome}")
             self.logger.info("✅ 测试启动成功！")
         else:
+            self.status_label.setText("启动失败")
             QMessageBox.critical(self, "启动失败", "游戏启动失败，请检查配置")
             self.logger.error("❌ 测试启动失败")
     
+    def closeEvent(self, event):
+        """关闭窗口时取消正在进行的登录并等待登录线程退出"""
+        if self.login_worker is not None and self.login_worker.isRunning():
+            self.login_worker.cancel()
+            self.login_worker.wait(5000)
+        super().closeEvent(event)
+    
     def save_account(self):
         """保存账号"""
         username = self.username_input.text().strip()
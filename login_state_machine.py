@@ -0,0 +1,152 @@
+"""
+登录状态机模块 - 根据屏幕上实际出现的界面决定下一步操作
+"""
+import time
+from logger import get_logger
+from wait_utils import PollPolicy
+
+
+class LoginState:
+    """登录流程中的一个状态
+
+    Args:
+        name: 状态名称
+        label: 日志中显示的名称
+        detect: 接收SceneResult，返回当前画面是否处于该状态
+        action: 接收SceneResult执行该状态的操作，返回是否成功
+        settle: 执行操作后等待界面变化的秒数
+        max_visits: 同一状态最多执行操作的次数，超过后认为流程卡住
+        terminal: 是否为终止状态（到达即结束流程）
+        confirmations: 终止状态需要连续观察到的次数
+    """
+
+    def __init__(self, name, label, detect, action=None, settle=1.0, max_visits=3,
+                 terminal=False, confirmations=1):
+        self.name = name
+        self.label = label
+        self.detect = detect
+        self.action = action
+        self.settle = settle
+        self.max_visits = max_visits
+        self.terminal = terminal
+        self.confirmations = confirmations
+
+
+class LoginStateMachine:
+    """按优先级判定当前状态并执行对应操作，直到到达终止状态
+
+    每次观察画面后取第一个匹配的状态，只有观察到某个状态时才执行它的操作，
+    因此不适用的步骤会被自动跳过。各状态停留的时间记录在state_times中，
+    执行某个状态的操作前会调用on_state(state)通知进度。
+    """
+
+    UNKNOWN = 'unknown'
+
+    def __init__(self, states, observe, poll_policy=None, cancel_token=None, on_state=None):
+        self.logger = get_logger()
+        self.states = states
+        self.observe = observe
+        self.poll_policy = poll_policy or PollPolicy()
+        self.cancel_token = cancel_token
+        self.on_state = on_state
+        self.state_times = {}
+        self.visits = {}
+        self.history = []
+
+    def match_state(self, scene):
+        """返回画面对应的第一个状态，没有匹配时返回None"""
+        if scene is None:
+            return None
+        for state in self.states:
+            if state.detect(scene):
+                return state
+        return None
+
+    def _record(self, name, seconds):
+        """累计状态停留时间"""
+        name = name or self.UNKNOWN
+        self.state_times[name] = self.state_times.get(name, 0.0) + seconds
+        self.history.append((name, seconds))
+
+    def _sleep(self, seconds):
+        """睡眠，请求取消时立即抛出OperationCancelled"""
+        if self.cancel_token is not None:
+            self.cancel_token.sleep(seconds)
+        else:
+            time.sleep(seconds)
+
+    def run(self, timeout):
+        """运行状态机
+
+        Returns:
+            str: 到达的终止状态名称，超时或流程卡住时返回None
+        """
+        start = time.monotonic()
+        deadline = start + timeout
+        intervals = self.poll_policy.intervals()
+        observed = False
+        current = None
+        entered_at = start
+        confirmations = 0
+
+        while time.monotonic() < deadline:
+            if self.cancel_token is not None:
+                self.cancel_token.check()
+            scene = self.observe()
+            state = self.match_state(scene)
+            name = state.name if state is not None else None
+            now = time.monotonic()
+            if not observed or name != current:
+                # 第一次检测的耗时计入第一个观察到的状态
+                if observed:
+                    self._record(current, now - entered_at)
+                    entered_at = now
+                observed = True
+                current, confirmations = name, 0
+                # 界面发生变化后重新从最短间隔开始轮询
+                intervals = self.poll_policy.intervals()
+
+            if state is None or state.terminal:
+                if state is not None:
+                    confirmations += 1
+                    if confirmations >= state.confirmations:
+                        self._record(current, time.monotonic() - entered_at)
+                        self.logger.info(f"✅ 到达状态: {state.label}，用时 {time.monotonic() - start:.1f}s")
+                        return state.name
+                self._sleep(max(min(next(intervals), deadline - time.monotonic()), 0))
+                continue
+
+            visits = self.visits.get(name, 0)
+            if visits >= state.max_visits:
+                self._record(current, time.monotonic() - entered_at)
+                self.logger.error(f"❌ 状态 {state.label} 已处理 {visits} 次仍未离开，停止登录流程")
+                return None
+            self.visits[name] = visits + 1
+
+            self.logger.info(f"➡️ 当前状态: {state.label}（第 {visits + 1} 次）")
+            if self.on_state is not None:
+                self.on_state(state)
+            if state.action is not None and not state.action(scene):
+                self.logger.warning(f"⚠️ 状态 {state.label} 的操作未完成")
+            if state.settle:
+                self._sleep(state.settle)
+
+        self._record(current, time.monotonic() - entered_at)
+        self.logger.warning(f"⚠️ 登录流程超时（{timeout}s），最后状态: {self._get_label(current)}")
+        return None
+
+    def _get_label(self, name):
+        """状态名称对应的日志名称"""
+        for state in self.states:
+            if state.name == name:
+                return state.label
+        return "未知界面"
+
+    def get_state_times(self):
+        """各状态累计停留时间（秒）"""
+        return dict(self.state_times)
+
+    def log_summary(self):
+        """输出各状态耗时"""
+        parts = [f"{self._get_label(name)} {seconds:.1f}s" for name, seconds in self.state_times.items()]
+        self.logger.info(f"登录流程各状态耗时: {', '.join(parts)}")
@@ -2,6 +2,7 @@
 原神自动登录工具主程序
 """
 import sys
+import atexit
 import argparse
 from game_manager import GameManager
 from gui import show_config_window
@@ -30,6 +31,7 @@ def main():
         parser.add_argument('--username', '-u', type=str, help='用户名')
         parser.add_argument('--password', '-p', type=str, help='密码')
         parser.add_argument('--saved', type=str, help='使用保存的账号名称')
+        parser.add_argument('--timeline', action='store_true', help='登录结束后输出各步骤耗时汇总')
         
         args = parser.parse_args()
         
@@ -37,6 +39,10 @@ def main():
         game_manager = GameManager()
         account_manager = AccountManager()
         
+        # 登录成功时流程内部会直接退出，因此在退出时输出时间线汇总
+        if args.timeline:
+            atexit.register(lambda: print(game_manager.timeline.format_summary()))
+        
         # 如果有命令行参数，则不显示GUI
         if args.username or args.password or args.saved:
             logger.info("命令行模式启动")
@@ -0,0 +1,166 @@
+"""
+模板匹配后端模块
+"""
+import time
+import cv2
+import numpy as np
+from template_matcher import match_template
+
+
+# 按模板面积（像素数）选择后端的默认表：[(面积上限, 后端名称), ...]，按面积上限升序。
+# 由 calibrate_backend_table 在1080p截图上测得：OpenCV内部对大模板已使用DFT，
+# 在所有资源模板尺寸上都快于NumPy FFT，因此默认全部使用OpenCV。
+DEFAULT_BACKEND_TABLE = [
+    (None, 'opencv'),
+]
+
+
+class MatchingBackend:
+    """匹配后端基类，match返回与TM_CCOEFF_NORMED一致的 (最大相似度, 最大值位置)"""
+
+    name = 'base'
+
+    def match(self, image, template, mask=None):
+        """在图片中匹配模板，mask为模板的透明度掩码"""
+        raise NotImplementedError
+
+
+class OpenCVBackend(MatchingBackend):
+    """OpenCV空间域匹配后端"""
+
+    name = 'opencv'
+
+    def match(self, image, template, mask=None):
+        """使用cv2.matchTemplate匹配"""
+        return match_template(image, template, mask)
+
+
+class FFTBackend(MatchingBackend):
+    """基于NumPy FFT的频域归一化互相关后端
+
+    分子用频域乘积计算模板（去均值）与图片的互相关，
+    分母用积分图计算每个窗口的方差，结果等价于TM_CCOEFF_NORMED。
+    """
+
+    name = 'fft'
+
+    @staticmethod
+    def _window_sums(image, h, w):
+        """用积分图计算每个 h x w 窗口内的像素和"""
+        integral = np.zeros((image.shape[0] + 1, image.shape[1] + 1) + image.shape[2:], dtype=np.float64)
+        integral[1:, 1:] = image.cumsum(axis=0).cumsum(axis=1)
+        return integral[h:, w:] - integral[:-h, w:] - integral[h:, :-w] + integral[:-h, :-w]
+
+    def correlate(self, image, template):
+        """计算完整的归一化互相关结果图"""
+        image = image.astype(np.float64)
+        template = template.astype(np.float64)
+        if image.ndim == 2:
+            image = image[..., np.newaxis]
+            template = template[..., np.newaxis]
+
+        image_h, image_w, channels = image.shape
+        h, w = template.shape[:2]
+        if h > image_h or w > image_w:
+            raise ValueError("模板尺寸大于目标图片")
+
+        template = template - template.mean(axis=(0, 1))
+        fft_h = cv2.getOptimalDFTSize(image_h + h - 1)
+        fft_w = cv2.getOptimalDFTSize(image_w + w - 1)
+        result_h, result_w = image_h - h + 1, image_w - w + 1
+
+        # 多通道结果为各通道之和，与OpenCV一致
+        numerator = np.zeros((result_h, result_w), dtype=np.float64)
+        for channel in range(channels):
+            spectrum = np.fft.rfft2(image[..., channel], s=(fft_h, fft_w))
+            spectrum *= np.conj(np.fft.rfft2(template[..., channel], s=(fft_h, fft_w)))
+            numerator += np.fft.irfft2(spectrum, s=(fft_h, fft_w))[:result_h, :result_w]
+
+        count = h * w
+        sums = self._window_sums(image, h, w)
+        square_sums = self._window_sums(image * image, h, w)
+        window_variance = np.maximum(square_sums - sums * sums / count, 0).sum(axis=2)
+        template_norm = (template * template).sum()
+
+        denominator = np.sqrt(window_variance * template_norm)
+        result = np.zeros_like(numerator)
+        valid = denominator > 1e-6 * max(template_norm, 1.0)
+        result[valid] = numerator[valid] / denominator[valid]
+        return result
+
+    def match(self, image, template, mask=None):
+        """使用FFT互相关匹配，带掩码时交给OpenCV处理"""
+        if mask is not None:
+            return match_template(image, template, mask)
+        result = self.correlate(image, template)
+        y, x = np.unravel_index(int(np.argmax(result)), result.shape)
+        return float(result[y, x]), (int(x), int(y))
+
+
+class AutoBackend(MatchingBackend):
+    """按模板面积从校准表中自动选择后端"""
+
+    name = 'auto'
+
+    def __init__(self, table=None):
+        self.table = table or DEFAULT_BACKEND_TABLE
+        self.backends = {'opencv': OpenCVBackend(), 'fft': FFTBackend()}
+
+    def select(self, template):
+        """根据模板面积选择后端"""
+        area = template.shape[0] * template.shape[1]
+        for max_area, backend_name in self.table:
+            if max_area is None or area <= max_area:
+                return self.backends[backend_name]
+        return self.backends['opencv']
+
+    def match(self, image, template, mask=None):
+        """使用所选后端匹配"""
+        return self.select(template).match(image, template, mask)
+
+
+def get_backend(name):
+    """按名称创建匹配后端，未知名称使用OpenCV后端"""
+    if name == 'fft':
+        return FFTBackend()
+    if name == 'auto':
+        return AutoBackend()
+    return OpenCVBackend()
+
+
+def calibrate_backend_table(image, templates, rounds=3):
+    """在给定图片上测量各后端对每个模板的耗时，生成按面积选择后端的表
+
+    Args:
+        image: 用于测量的目标图片（例如一帧1080p截图）
+        templates: 模板图片列表
+        rounds: 每个组合运行的次数，取最短耗时
+
+    Returns:
+        tuple: (后端选择表, 测量结果列表 [(面积, {后端名称: 耗时})])
+    """
+    backends = [OpenCVBackend(), FFTBackend()]
+    measurements = []
+    for template in sorted(templates, key=lambda t: t.shape[0] * t.shape[1]):
+        timings = {}
+        for backend in backends:
+            best = None
+            for _ in range(rounds):
+                start = time.perf_counter()
+                backend.match(image, template)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            timings[backend.name] = best
+        measurements.append((template.shape[0] * template.shape[1], timings))
+
+    # 相邻且胜者相同的面积区间合并为一项
+    table = []
+    for area, timings in measurements:
+        winner = min(timings, key=timings.get)
+        if table and table[-1][1] == winner:
+            table[-1] = (area, winner)
+        else:
+            table.append((area, winner))
+    if table:
+        table[-1] = (None, table[-1][1])
+    return table, measurements
@@ -0,0 +1,307 @@
+"""
+场景检测结果模块
+"""
+import hashlib
+from collections import OrderedDict
+import cv2
+import numpy as np
+
+
+# 帧指纹使用的缩小倍数，1080p缩小后为240x135
+FINGERPRINT_FACTOR = 8
+
+# 缩略图亮度标准差低于该值时视为纯色画面（黑屏、白屏、纯色加载画面）
+BLANK_FRAME_STD = 4.0
+
+
+def frame_fingerprint(image, factor=FINGERPRINT_FACTOR):
+    """计算帧指纹：缩小后的像素哈希，画面不变时指纹相同"""
+    h, w = image.shape[:2]
+    small = cv2.resize(image, (max(w // factor, 1), max(h // factor, 1)), interpolation=cv2.INTER_AREA)
+    digest = hashlib.blake2b(small.tobytes(), digest_size=16)
+    digest.update(str(image.shape).encode())
+    return digest.hexdigest()
+
+
+def is_blank_frame(image, min_std=BLANK_FRAME_STD, factor=FINGERPRINT_FACTOR):
+    """画面是否几乎为纯色，游戏窗口刚创建时的黑屏和纯色加载画面都属于此类"""
+    h, w = image.shape[:2]
+    small = cv2.resize(image, (max(w // factor, 1), max(h // factor, 1)), interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    return float(small.std()) < min_std
+
+
+class TemplateMatch:
+    """单个模板的匹配结果"""
+
+    def __init__(self, name, similarity, top_left=None, bottom_right=None, threshold=0.8):
+        self.name = name
+        self.similarity = similarity
+        self.top_left = top_left
+        self.bottom_right = bottom_right
+        self.threshold = threshold
+
+    @property
+    def found(self):
+        """是否匹配成功"""
+        return self.top_left is not None and self.bottom_right is not None
+
+    @property
+    def center(self):
+        """匹配区域中心点，未匹配时返回None"""
+        if not self.found:
+            return None
+        center_x = (self.top_left[0] + self.bottom_right[0]) // 2
+        center_y = (self.top_left[1] + self.bottom_right[1]) // 2
+        return center_x, center_y
+
+    def rescale(self, factor):
+        """返回坐标乘以factor后的匹配结果，用于把缩小分辨率检测的结果换算回原始分辨率"""
+        if factor == 1.0 or not self.found:
+            return self
+        top_left = (int(round(self.top_left[0] * factor)), int(round(self.top_left[1] * factor)))
+        bottom_right = (int(round(self.bottom_right[0] * factor)), int(round(self.bottom_right[1] * factor)))
+        return TemplateMatch(self.name, self.similarity, top_left, bottom_right, self.threshold)
+
+    def to_dict(self):
+        """转换为字典，便于日志输出和序列化"""
+        return {
+            'name': self.name,
+            'similarity': float(self.similarity),
+            'threshold': self.threshold,
+            'found': self.found,
+            'top_left': self.top_left,
+            'bottom_right': self.bottom_right,
+        }
+
+    def __repr__(self):
+        return f"TemplateMatch({self.name}, similarity={self.similarity:.3f}, found={self.found})"
+
+
+class SceneResult:
+    """一次截屏上所有模板的匹配结果
+
+    匹配坐标基于截图本身，origin为截图左上角的屏幕坐标（只截取游戏窗口时不为0），
+    点击时使用screen_center换算为屏幕坐标。
+    在缩小的画面上检测时，detection_scale为缩小比例，匹配坐标已换算回原始分辨率，
+    template_scale为原始分辨率下的模板缩放比例，用于点击前精确定位。
+    直接截图时screenshot引用截图后端复用的缓冲区，再截取几帧后会被覆盖，
+    截图之后还要继续使用画面时需先调用keep_screenshot。
+    """
+
+    def __init__(self, screenshot=None, timestamp=None, origin=(0, 0), detection_scale=1.0, template_scale=1.0):
+        self.screenshot = screenshot
+        self.timestamp = timestamp
+        self.origin = origin
+        self.detection_scale = detection_scale
+        self.template_scale = template_scale
+        self.matches = {}
+
+    def keep_screenshot(self):
+        """复制截图，之后继续截图也不会覆盖本次检测使用的画面"""
+        if self.screenshot is not None:
+            self.screenshot = self.screenshot.copy()
+
+    def add(self, match):
+        """添加单个模板的匹配结果"""
+        self.matches[match.name] = match
+
+    def get(self, name):
+        """获取指定模板的匹配结果，不存在时返回None"""
+        return self.matches.get(name)
+
+    def found(self, name):
+        """指定模板是否匹配成功"""
+        match = self.matches.get(name)
+        return match is not None and match.found
+
+    def center(self, name):
+        """指定模板的匹配中心点"""
+        match = self.matches.get(name)
+        return match.center if match is not None else None
+
+    def screen_center(self, name):
+        """指定模板的匹配中心点在屏幕上的坐标"""
+        center = self.center(name)
+        if center is None:
+            return None
+        return center[0] + self.origin[0], center[1] + self.origin[1]
+
+    def similarity(self, name):
+        """指定模板的最大相似度"""
+        match = self.matches.get(name)
+        return match.similarity if match is not None else 0.0
+
+    def found_names(self):
+        """所有匹配成功的模板名称"""
+        return [name for name, match in self.matches.items() if match.found]
+
+    def to_dict(self):
+        """转换为字典"""
+        return {name: match.to_dict() for name, match in self.matches.items()}
+
+    def summary(self):
+        """生成简短的日志摘要"""
+        parts = []
+        for name, match in self.matches.items():
+            status = "✅" if match.found else "❌"
+            parts.append(f"{name}{status}{match.similarity:.3f}")
+        return ", ".join(parts)
+
+
+class SceneCache:
+    """按帧指纹和模板集合缓存检测结果的LRU缓存"""
+
+    def __init__(self, max_size=32):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """获取缓存的匹配结果，未命中时返回None"""
+        matches = self.entries.get(key)
+        if matches is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return matches
+
+    def put(self, key, matches):
+        """保存匹配结果，超出容量时淘汰最久未使用的项"""
+        self.entries[key] = matches
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        """清空缓存"""
+        self.entries.clear()
+
+    def get_stats(self):
+        """获取缓存命中统计"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'size': len(self.entries),
+        }
+
+
+class ChangeGate:
+    """帧差分门控
+
+    把每帧缩小为低分辨率灰度缩略图，与各模板上次匹配时的缩略图比较：
+    - 整帧几乎是纯色（加载画面）时不可能出现界面元素，跳过所有匹配
+    - 已找到的模板所在区域没有变化时直接复用上次结果
+    - 未找到的模板只在发生变化的区域内重新搜索，画面没有变化时直接复用
+    """
+
+    def __init__(self, factor=FINGERPRINT_FACTOR, diff_threshold=12, uniform_std=2.0):
+        self.factor = factor
+        self.diff_threshold = diff_threshold
+        self.uniform_std = uniform_std
+        self.entries = {}
+        self.options = None
+        self.full_times = {}
+        self.skipped = 0
+        self.partial = 0
+        self.full = 0
+        self.uniform_frames = 0
+        self.time_saved = 0.0
+
+    def reset(self, options=None):
+        """清除所有参考帧，匹配选项变化后旧结果不再可用"""
+        self.entries.clear()
+        self.options = options
+
+    def thumbnail(self, image):
+        """生成低分辨率灰度缩略图"""
+        h, w = image.shape[:2]
+        small = cv2.resize(image, (max(w // self.factor, 1), max(h // self.factor, 1)),
+                           interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small
+
+    def is_uniform(self, thumb):
+        """缩略图是否几乎为纯色"""
+        return float(thumb.std()) < self.uniform_std
+
+    def get_previous(self, key, thumb):
+        """获取模板上次的匹配结果，分辨率变化时返回None"""
+        entry = self.entries.get(key)
+        if entry is None or entry[0].shape != thumb.shape:
+            return None
+        return entry[1]
+
+    def get_changed_box(self, key, thumb, image_shape, box=None):
+        """与模板上次匹配时的画面比较，返回发生变化区域的外接矩形 (x0, y0, x1, y1)
+
+        Args:
+            box: 只检查该区域（原图坐标），为None时检查整帧
+
+        Returns:
+            tuple: 原图坐标下的变化区域，没有变化时返回None
+        """
+        reference = self.entries[key][0]
+        changed = cv2.absdiff(thumb, reference) > self.diff_threshold
+
+        image_h, image_w = image_shape[:2]
+        thumb_h, thumb_w = thumb.shape[:2]
+        scale_x, scale_y = image_w / thumb_w, image_h / thumb_h
+
+        offset_x, offset_y = 0, 0
+        if box is not None:
+            # 多取一格缩略图像素，避免区域边缘的变化被缩小后漏掉
+            x0 = max(int(box[0] / scale_x) - 1, 0)
+            y0 = max(int(box[1] / scale_y) - 1, 0)
+            x1 = min(int(box[2] / scale_x) + 2, thumb_w)
+            y1 = min(int(box[3] / scale_y) + 2, thumb_h)
+            changed = changed[y0:y1, x0:x1]
+            offset_x, offset_y = x0, y0
+
+        ys, xs = np.nonzero(changed)
+        if len(xs) == 0:
+            return None
+        return (
+            int((xs.min() + offset_x) * scale_x),
+            int((ys.min() + offset_y) * scale_y),
+            min(int((xs.max() + offset_x + 1) * scale_x), image_w),
+            min(int((ys.max() + offset_y + 1) * scale_y), image_h),
+        )
+
+    def remember(self, key, thumb, match):
+        """记录模板在当前画面上的匹配结果，作为之后比较的参考"""
+        self.entries[key] = (thumb, match)
+
+    def record_full(self, key, seconds):
+        """记录一次全量匹配，用于估算跳过匹配节省的时间"""
+        self.full += 1
+        previous = self.full_times.get(key)
+        self.full_times[key] = seconds if previous is None else previous * 0.7 + seconds * 0.3
+
+    def record_partial(self, key, seconds):
+        """记录一次只在变化区域内的匹配"""
+        self.partial += 1
+        self.time_saved += max(self.full_times.get(key, seconds) - seconds, 0.0)
+
+    def record_skip(self, key):
+        """记录一次跳过的匹配"""
+        self.skipped += 1
+        self.time_saved += self.full_times.get(key, 0.0)
+
+    def get_stats(self):
+        """获取门控统计"""
+        total = self.skipped + self.partial + self.full
+        return {
+            'skipped': self.skipped,
+            'partial': self.partial,
+            'full': self.full,
+            'uniform_frames': self.uniform_frames,
+            'skip_rate': self.skipped / total if total else 0.0,
+            'time_saved': self.time_saved,
+        }
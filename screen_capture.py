@@ -0,0 +1,406 @@
+"""
+屏幕截图后端模块
+"""
+import os
+import threading
+import time
+import cv2
+import numpy as np
+from logger import get_logger
+
+
+# 每个截图后端轮流复用的帧缓冲区数量
+FRAME_BUFFER_COUNT = 2
+
+
+class FrameBufferPool:
+    """轮流复用的帧缓冲区
+
+    截图转换直接写入预先分配的缓冲区，尺寸不变时转换步骤不再分配新的整帧内存
+    （mss后端的原始帧也是复用的，整个截图过程没有新的整帧分配；pyautogui后端读取PIL图片时仍会复制一整帧）。
+    返回的帧在之后再截取 count 帧后会被覆盖，需要长期保留时应自行复制。
+    """
+
+    def __init__(self, count=FRAME_BUFFER_COUNT):
+        self.count = count
+        self.buffers = []
+        self.index = 0
+        self.allocations = 0
+
+    def next(self, shape, dtype=np.uint8):
+        """获取下一个可写入的缓冲区，尺寸变化时重新分配"""
+        if len(self.buffers) < self.count:
+            buffer = np.empty(shape, dtype=dtype)
+            self.buffers.append(buffer)
+            self.allocations += 1
+        else:
+            buffer = self.buffers[self.index]
+            if buffer.shape != tuple(shape) or buffer.dtype != dtype:
+                buffer = np.empty(shape, dtype=dtype)
+                self.buffers[self.index] = buffer
+                self.allocations += 1
+        self.index = (self.index + 1) % self.count
+        return buffer
+
+
+class CaptureBackend:
+    """截图后端基类，grab返回BGR格式（grayscale=True时为单通道灰度）的图片
+
+    设置截图区域后只截取该区域（例如游戏窗口客户区），
+    区域为屏幕坐标 (left, top, width, height)，未设置时截取整个屏幕。
+    """
+
+    name = 'base'
+
+    def __init__(self):
+        self.region = None
+        self.color_buffers = FrameBufferPool()
+        self.gray_buffers = FrameBufferPool()
+
+    def set_region(self, region):
+        """设置截图区域，传入None恢复整屏截图"""
+        self.region = tuple(int(v) for v in region) if region is not None else None
+
+    def get_origin(self):
+        """截图左上角在屏幕上的坐标，用于把匹配坐标换算回屏幕坐标"""
+        if self.region is None:
+            return 0, 0
+        return self.region[0], self.region[1]
+
+    def grab(self, grayscale=False):
+        """截取一帧
+
+        Args:
+            grayscale: 是否直接从原始像素格式转换为灰度图，跳过中间的BGR帧
+        """
+        raise NotImplementedError
+
+    def get_buffer_allocations(self):
+        """帧缓冲区累计分配次数，稳定截图时不应增长"""
+        return self.color_buffers.allocations + self.gray_buffers.allocations
+
+    def _convert(self, native, color_code, gray_code, grayscale=False):
+        """把原始像素格式的帧转换到复用的缓冲区中"""
+        height, width = native.shape[:2]
+        if grayscale:
+            return cv2.cvtColor(native, gray_code, dst=self.gray_buffers.next((height, width)))
+        return cv2.cvtColor(native, color_code, dst=self.color_buffers.next((height, width, 3)))
+
+    def release_thread(self):
+        """释放当前线程占用的截图资源，截图线程退出前调用"""
+        pass
+
+    def close(self):
+        """释放截图资源"""
+        pass
+
+
+class PyAutoGUICapture(CaptureBackend):
+    """通过pyautogui（PIL）截图，兼容性最好但速度较慢
+
+    PIL图片通过tobytes()导出像素，每帧都会额外分配一整帧（1080p约12.5MB），需要减少分配时使用mss后端。
+    """
+
+    name = 'pyautogui'
+
+    def grab(self, grayscale=False):
+        """截取整个屏幕或截图区域"""
+        import pyautogui
+
+        screenshot = pyautogui.screenshot(region=self.region)
+        # asarray会通过PIL的tobytes()复制一整帧像素，只有颜色转换的结果写入复用的缓冲区
+        return self._convert(np.asarray(screenshot), cv2.COLOR_RGB2BGR, cv2.COLOR_RGB2GRAY, grayscale)
+
+
+class MssCapture(CaptureBackend):
+    """通过mss直接读取桌面帧缓冲截图，比PIL快数倍
+
+    mss实例在部分平台上不能跨线程使用，因此每个线程各自创建实例。
+    """
+
+    name = 'mss'
+
+    def __init__(self, monitor=1):
+        import mss
+
+        super().__init__()
+        self._mss_module = mss
+        self.monitor_index = monitor
+        self._instances = {}
+        # 立即创建一个实例，没有可用桌面时在这里就会失败
+        self._get_instance()
+
+    def _get_instance(self):
+        """获取当前线程的mss实例"""
+        thread_id = threading.get_ident()
+        instance = self._instances.get(thread_id)
+        if instance is None:
+            instance = self._mss_module.mss()
+            self._instances[thread_id] = instance
+        return instance
+
+    def grab(self, grayscale=False):
+        """截取截图区域，未设置时截取指定显示器（默认主显示器）"""
+        instance = self._get_instance()
+        if self.region is not None:
+            left, top, width, height = self.region
+            area = {'left': left, 'top': top, 'width': width, 'height': height}
+        else:
+            area = instance.monitors[self.monitor_index]
+        shot = instance.grab(area)
+        # mss返回BGRA，asarray直接引用mss的像素数据，去掉透明通道后写入复用的缓冲区
+        return self._convert(np.asarray(shot), cv2.COLOR_BGRA2BGR, cv2.COLOR_BGRA2GRAY, grayscale)
+
+    def release_thread(self):
+        """关闭当前线程的mss实例"""
+        instance = self._instances.pop(threading.get_ident(), None)
+        if instance is not None:
+            try:
+                instance.close()
+            except Exception:
+                pass
+
+    def close(self):
+        """关闭所有mss实例"""
+        for instance in list(self._instances.values()):
+            try:
+                instance.close()
+            except Exception:
+                pass
+        self._instances.clear()
+
+
+class FileCapture(CaptureBackend):
+    """从磁盘回放PNG帧，用于在没有桌面的环境下运行和测量识别流程
+
+    帧在创建时一次性解码，grab按顺序返回，播放到最后一帧后循环或停在最后一帧。
+    """
+
+    name = 'file'
+
+    def __init__(self, paths, loop=True):
+        super().__init__()
+        self.logger = get_logger()
+        self.paths = self._expand_paths(paths)
+        self.loop = loop
+        self.index = 0
+        self.frames = []
+        self.gray_frames = []
+        for path in self.paths:
+            frame = cv2.imread(path, cv2.IMREAD_COLOR)
+            if frame is None:
+                self.logger.warning(f"无法加载回放帧: {path}")
+                continue
+            gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            frame.setflags(write=False)
+            gray_frame.setflags(write=False)
+            self.frames.append(frame)
+            self.gray_frames.append(gray_frame)
+
+        if not self.frames:
+            raise ValueError(f"没有可回放的帧: {paths}")
+        self.logger.info(f"回放截图后端已加载 {len(self.frames)} 帧")
+
+    @staticmethod
+    def _expand_paths(paths):
+        """展开路径列表，相对路径基于程序目录，目录按文件名顺序展开为其中的PNG文件"""
+        if isinstance(paths, str):
+            paths = [paths]
+        expanded = []
+        for path in paths:
+            if not os.path.isabs(path):
+                path = os.path.join(os.path.dirname(os.path.abspath(__file__)), path)
+            if os.path.isdir(path):
+                for filename in sorted(os.listdir(path)):
+                    if filename.lower().endswith('.png'):
+                        expanded.append(os.path.join(path, filename))
+            else:
+                expanded.append(path)
+        return expanded
+
+    def grab(self, grayscale=False):
+        """返回下一帧，设置了截图区域时返回该区域的视图（不复制像素）"""
+        frame = (self.gray_frames if grayscale else self.frames)[self.index]
+        if self.index + 1 < len(self.frames):
+            self.index += 1
+        elif self.loop:
+            self.index = 0
+        if self.region is not None:
+            left, top, width, height = self.region
+            frame = frame[top:top + height, left:left + width]
+        return frame
+
+
+class CapturedFrame:
+    """后台截图线程截取的一帧"""
+
+    def __init__(self, image, timestamp, origin=(0, 0), sequence=0):
+        self.image = image
+        self.timestamp = timestamp
+        self.origin = origin
+        self.sequence = sequence
+
+    def copy(self):
+        """复制像素数据，返回的帧不再受截图线程覆盖的影响"""
+        return CapturedFrame(self.image.copy(), self.timestamp, self.origin, self.sequence)
+
+
+class BackgroundCapture:
+    """后台截图线程，按固定帧率截图并保存到环形缓冲区
+
+    检测时直接读取最新一帧，不必在关键路径上等待截图；点击后可以等待一帧截取时间晚于点击的画面。
+    环形缓冲区的槽位预先分配，截图线程把帧复制进槽位，读取时再复制一份给调用方，
+    因此截图线程继续写入不会影响正在匹配的帧。
+    """
+
+    def __init__(self, backend, fps=10, ring_size=4, grayscale=False, before_grab=None):
+        self.logger = get_logger()
+        self.backend = backend
+        self.fps = fps
+        self.ring_size = max(int(ring_size), 1)
+        self.grayscale = grayscale
+        self.before_grab = before_grab
+        self.slots = [None] * self.ring_size
+        self.frames = [None] * self.ring_size
+        self.write_index = 0
+        self.sequence = 0
+        self.condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """启动截图线程"""
+        if self.is_running():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='background-capture', daemon=True)
+        self._thread.start()
+        self.logger.info(f"✅ 后台截图线程已启动: {self.fps} 帧/秒, 缓冲 {self.ring_size} 帧")
+
+    def stop(self, timeout=2.0):
+        """停止截图线程"""
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        with self.condition:
+            self.condition.notify_all()
+        self._thread.join(timeout)
+        self._thread = None
+        self.logger.info("后台截图线程已停止")
+
+    def is_running(self):
+        """截图线程是否在运行"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        """截图线程主循环，退出时释放本线程占用的截图资源"""
+        interval = 1.0 / self.fps if self.fps and self.fps > 0 else 0.0
+        try:
+            while not self._stop_event.is_set():
+                started = time.perf_counter()
+                try:
+                    if self.before_grab is not None:
+                        self.before_grab()
+                    # 以开始截图的时间作为帧时间，晚于点击时间的帧一定是点击之后截取的
+                    timestamp = time.time()
+                    image = self.backend.grab(self.grayscale)
+                    self._store(image, timestamp, self.backend.get_origin())
+                except Exception as e:
+                    self.logger.debug(f"后台截图失败: {e}")
+                remaining = interval - (time.perf_counter() - started)
+                if remaining > 0:
+                    self._stop_event.wait(remaining)
+        finally:
+            self.backend.release_thread()
+
+    def _store(self, image, timestamp, origin):
+        """把帧复制到环形缓冲区的下一个槽位"""
+        with self.condition:
+            slot = self.slots[self.write_index]
+            if slot is None or slot.shape != image.shape:
+                slot = np.empty(image.shape, dtype=image.dtype)
+                self.slots[self.write_index] = slot
+            np.copyto(slot, image)
+            self.sequence += 1
+            self.frames[self.write_index] = CapturedFrame(slot, timestamp, origin, self.sequence)
+            self.write_index = (self.write_index + 1) % self.ring_size
+            self.condition.notify_all()
+
+    def _latest_locked(self):
+        """最新一帧（需持有锁）"""
+        return self.frames[(self.write_index - 1) % self.ring_size]
+
+    def latest(self, newer_than=None):
+        """不阻塞地获取最新一帧的副本
+
+        Args:
+            newer_than: 只接受截取时间晚于该时间戳的帧
+
+        Returns:
+            CapturedFrame: 最新一帧，没有满足条件的帧时返回None
+        """
+        with self.condition:
+            frame = self._latest_locked()
+            if frame is None or (newer_than is not None and frame.timestamp <= newer_than):
+                return None
+            return frame.copy()
+
+    def wait_for_frame(self, newer_than=None, timeout=2.0):
+        """等待一帧截取时间晚于newer_than的画面
+
+        Returns:
+            CapturedFrame: 满足条件的最新一帧，超时或截图线程已停止时返回None
+        """
+        deadline = time.time() + timeout
+        with self.condition:
+            while True:
+                frame = self._latest_locked()
+                if frame is not None and (newer_than is None or frame.timestamp > newer_than):
+                    return frame.copy()
+                remaining = deadline - time.time()
+                if remaining <= 0 or not self.is_running():
+                    return None
+                self.condition.wait(remaining)
+
+    def recent(self, count=None):
+        """获取缓冲区中最近的若干帧副本，最新的在前"""
+        with self.condition:
+            count = self.ring_size if count is None else min(count, self.ring_size)
+            frames = []
+            for offset in range(1, count + 1):
+                frame = self.frames[(self.write_index - offset) % self.ring_size]
+                if frame is None:
+                    break
+                frames.append(frame.copy())
+            return frames
+
+
+def create_capture_backend(name='auto', files=None):
+    """按名称创建截图后端
+
+    Args:
+        name: auto / mss / pyautogui / file，auto在安装了mss时使用mss，否则使用pyautogui
+        files: file后端回放的PNG文件或目录列表，没有可回放的帧时改用桌面截图
+
+    Returns:
+        CaptureBackend: 截图后端实例
+    """
+    logger = get_logger()
+
+    if name == 'file':
+        try:
+            return FileCapture(files or [])
+        except ValueError as e:
+            logger.warning(f"⚠️ 回放截图后端不可用，改用桌面截图: {e}")
+            name = 'auto'
+
+    if name in ('auto', 'mss'):
+        try:
+            return MssCapture()
+        except ImportError:
+            if name == 'mss':
+                logger.warning("❌ 需要安装mss库来使用快速截图，改用pyautogui截图")
+        except Exception as e:
+            logger.warning(f"初始化mss截图失败，改用pyautogui截图: {e}")
+
+    return PyAutoGUICapture()
@@ -3,20 +3,19 @@
 """
 import time
 import cv2
-import numpy as np
-import pyautogui
-from PIL import Image
 import os
 from logger import get_logger
+from screen_capture import create_capture_backend
 
 
 class ScreenRecognition:
     """屏幕识别类"""
     
-    def __init__(self):
+    def __init__(self, capture_backend=None):
         self.logger = get_logger()
         self.enter_game_template = None
         self.template_path = None
+        self.capture_backend = capture_backend or create_capture_backend()
         
     def load_template(self, template_path):
         """加载模板图片"""
@@ -40,14 +39,20 @@ class ScreenRecognition:
             self.logger.error(f"加载模板图片失败: {e}")
             return False
     
+    def set_template(self, template, template_path=None):
+        """直接使用已解码的模板图片（例如来自模板注册表）"""
+        if template is None:
+            self.logger.error("模板图片为空")
+            return False
+        self.template_path = template_path
+        self.enter_game_template = template
+        return True
+    
     def capture_screen(self):
         """截取屏幕"""
         try:
-            # 使用pyautogui截取屏幕
-            screenshot = pyautogui.screenshot()
-            # 转换为OpenCV格式
-            screenshot_cv = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
-            return screenshot_cv
+            # 使用配置的截图后端截取屏幕
+            return self.capture_backend.grab()
         except Exception as e:
             self.logger.error(f"截取屏幕失败: {e}")
             return None
@@ -116,15 +121,18 @@ class ScreenRecognition:
     def click_enter_game_button(self, threshold=0.8):
         """点击进入游戏按钮"""
         try:
+            import pyautogui
+            
             self.logger.info("尝试点击进入游戏按钮...")
             
             # 查找按钮位置
             top_left, bottom_right = self.find_template_in_screen(threshold=threshold)
             
             if top_left is not None and bottom_right is not None:
-                # 计算按钮中心点
-                center_x = (top_left[0] + bottom_right[0]) // 2
-                center_y = (top_left[1] + bottom_right[1]) // 2
+                # 计算按钮中心点（只截取游戏窗口时加上窗口位置换算为屏幕坐标）
+                origin_x, origin_y = self.capture_backend.get_origin()
+                center_x = (top_left[0] + bottom_right[0]) // 2 + origin_x
+                center_y = (top_left[1] + bottom_right[1]) // 2 + origin_y
                 
                 self.logger.info(f"点击按钮中心位置: ({center_x}, {center_y})")
                 
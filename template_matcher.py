@@ -0,0 +1,246 @@
+"""
+模板匹配算法模块
+"""
+import cv2
+import numpy as np
+
+
+# 金字塔最高层数
+MAX_PYRAMID_LEVELS = 3
+# 金字塔顶层模板的最小边长，太小会丢失特征
+MIN_PYRAMID_TEMPLATE_SIZE = 12
+
+
+def to_grayscale(image):
+    """转换为单通道灰度图，已经是单通道时直接返回"""
+    if image.ndim == 2:
+        return image
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+
+def match_template(image, template, mask=None):
+    """全图穷举匹配，返回 (最大相似度, 最大值位置)
+
+    mask为模板的透明度掩码，透明像素不参与相似度计算。
+    """
+    if mask is None:
+        result = cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED)
+    else:
+        result = cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED, mask=mask)
+        # 带掩码时窗口方差为0的位置会得到inf/nan
+        result[~np.isfinite(result)] = 0
+    _, max_val, _, max_loc = cv2.minMaxLoc(result)
+    return max_val, max_loc
+
+
+def get_pyramid_levels(template, max_levels=MAX_PYRAMID_LEVELS):
+    """根据模板尺寸计算可用的金字塔层数（每层缩小一半）"""
+    h, w = template.shape[:2]
+    levels = 0
+    while levels < max_levels and min(h, w) / (2 ** (levels + 1)) >= MIN_PYRAMID_TEMPLATE_SIZE:
+        levels += 1
+    return levels
+
+
+def pyramid_match(image, template, levels=None, match_func=match_template, mask=None):
+    """由粗到精的金字塔匹配
+
+    先在缩小后的图片上用缩小后的模板找到粗略峰值，
+    再回到原始分辨率，只在峰值附近的小窗口内精确匹配。
+    这是一种启发式搜索：粗略峰值可能偏离真实峰值，此时返回的相似度低于穷举匹配
+    （例如缩放到720p的need_login.png上circle为0.392，穷举匹配为0.428）。
+    在自带的模板和截图上结果通常与穷举匹配相同，需要精确结果时不使用金字塔匹配。
+
+    Args:
+        image: 目标图片
+        template: 模板图片
+        levels: 金字塔层数，为None时根据模板尺寸自动选择
+        match_func: 每一层使用的匹配函数，默认为OpenCV全图匹配
+        mask: 模板的透明度掩码，为None时不使用掩码
+
+    Returns:
+        tuple: (最大相似度, 最大值位置)
+    """
+    if levels is None:
+        levels = get_pyramid_levels(template)
+    if levels <= 0:
+        return match_func(image, template, mask)
+
+    image_h, image_w = image.shape[:2]
+    template_h, template_w = template.shape[:2]
+    factor = 2 ** levels
+    small_image_size = (image_w // factor, image_h // factor)
+    small_template_size = (template_w // factor, template_h // factor)
+    if (small_template_size[0] > small_image_size[0] or
+            small_template_size[1] > small_image_size[1]):
+        return match_func(image, template, mask)
+
+    # 粗匹配：INTER_AREA缩小能保留较多的纹理信息
+    small_image = cv2.resize(image, small_image_size, interpolation=cv2.INTER_AREA)
+    small_template = cv2.resize(template, small_template_size, interpolation=cv2.INTER_AREA)
+    small_mask = None
+    if mask is not None:
+        small_mask = cv2.resize(mask, small_template_size, interpolation=cv2.INTER_NEAREST)
+    _, coarse_loc = match_func(small_image, small_template, small_mask)
+
+    # 精匹配：在粗略峰值映射回原图后的邻域内搜索
+    pad = factor * 2
+    x0 = max(coarse_loc[0] * factor - pad, 0)
+    y0 = max(coarse_loc[1] * factor - pad, 0)
+    x1 = min(coarse_loc[0] * factor + template_w + pad, image_w)
+    y1 = min(coarse_loc[1] * factor + template_h + pad, image_h)
+    window = image[y0:y1, x0:x1]
+    if window.shape[0] < template_h or window.shape[1] < template_w:
+        return match_func(image, template, mask)
+
+    max_val, max_loc = match_func(window, template, mask)
+    return max_val, (max_loc[0] + x0, max_loc[1] + y0)
+
+
+class RoiTracker:
+    """按模板记录上次命中位置的感兴趣区域（ROI）
+
+    匹配时先在上次命中位置加上边距的区域内搜索，失败后再全图搜索，
+    并统计ROI快速路径的命中与未命中次数。
+    """
+
+    def __init__(self, margin=50):
+        self.margin = margin
+        self.rois = {}
+        self.hits = {}
+        self.misses = {}
+
+    def get_roi(self, name, image_shape):
+        """获取模板的ROI (x0, y0, x1, y1)，没有记录或超出图片范围时返回None"""
+        roi = self.rois.get(name)
+        if roi is None:
+            return None
+        image_h, image_w = image_shape[:2]
+        x0, y0, x1, y1 = roi
+        x0, y0 = max(x0, 0), max(y0, 0)
+        x1, y1 = min(x1, image_w), min(y1, image_h)
+        if x1 <= x0 or y1 <= y0:
+            return None
+        return x0, y0, x1, y1
+
+    def learn(self, name, top_left, bottom_right):
+        """根据命中位置更新模板的ROI"""
+        self.rois[name] = (
+            top_left[0] - self.margin,
+            top_left[1] - self.margin,
+            bottom_right[0] + self.margin,
+            bottom_right[1] + self.margin,
+        )
+
+    def forget(self, name=None):
+        """清除指定模板（或全部模板）的ROI"""
+        if name is None:
+            self.rois.clear()
+        else:
+            self.rois.pop(name, None)
+
+    def record(self, name, hit):
+        """记录一次ROI快速路径的命中或未命中"""
+        counter = self.hits if hit else self.misses
+        counter[name] = counter.get(name, 0) + 1
+
+    def get_stats(self):
+        """获取各模板的ROI命中统计"""
+        stats = {}
+        for name in set(self.hits) | set(self.misses):
+            hits = self.hits.get(name, 0)
+            misses = self.misses.get(name, 0)
+            stats[name] = {
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': hits / (hits + misses),
+            }
+        return stats
+
+
+def scale_image(image, scale):
+    """按比例缩放图片，比例为1时直接返回原图"""
+    if scale == 1.0:
+        return image
+    h, w = image.shape[:2]
+    size = (max(int(round(w * scale)), 1), max(int(round(h * scale)), 1))
+    interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+    return cv2.resize(image, size, interpolation=interpolation)
+
+
+def scale_mask(mask, scale):
+    """按比例缩放透明度掩码，使用最近邻插值保持二值"""
+    if mask is None or scale == 1.0:
+        return mask
+    h, w = mask.shape[:2]
+    size = (max(int(round(w * scale)), 1), max(int(round(h * scale)), 1))
+    return cv2.resize(mask, size, interpolation=cv2.INTER_NEAREST)
+
+
+def get_candidate_scales(base_scale, min_scale=0.5, max_scale=2.0, step=0.05):
+    """生成候选缩放比例，按与基准比例的接近程度排序"""
+    scales = []
+    count = int(round((max_scale - min_scale) / step))
+    for i in range(count + 1):
+        scales.append(round(min_scale + i * step, 3))
+    if base_scale not in scales:
+        scales.append(round(base_scale, 3))
+    return sorted(scales, key=lambda scale: abs(scale - base_scale))
+
+
+def search_template_scale(image, template, scales, search_factor=0.25):
+    """在缩小后的图片上搜索模板的最佳缩放比例
+
+    每个候选比例都只在缩小后的图片上匹配一次，代价很低，
+    得到的比例需要调用方在原始分辨率上再确认。
+
+    Returns:
+        tuple: (最佳比例, 缩小图片上的相似度)，没有可用比例时返回 (None, 0.0)
+    """
+    small_image = scale_image(image, search_factor)
+    image_h, image_w = small_image.shape[:2]
+    best_scale, best_val = None, 0.0
+    for scale in scales:
+        small_template = scale_image(template, scale * search_factor)
+        template_h, template_w = small_template.shape[:2]
+        if min(template_h, template_w) < MIN_PYRAMID_TEMPLATE_SIZE // 2:
+            continue
+        if template_h > image_h or template_w > image_w:
+            continue
+        max_val, _ = match_template(small_image, small_template)
+        if max_val > best_val:
+            best_scale, best_val = scale, max_val
+    return best_scale, best_val
+
+
+def refine_template_scale(image, template, coarse_scale, step=0.05, fine_step=0.01):
+    """在原始分辨率上围绕粗略比例细化缩放比例
+
+    先用粗略比例在全图定位，再在该位置附近用更细的步长比较相邻比例。
+
+    Returns:
+        tuple: (最佳比例, 相似度, 最大值位置)
+    """
+    scaled_template = scale_image(template, coarse_scale)
+    best_val, best_loc = pyramid_match(image, scaled_template)
+    best_scale = coarse_scale
+
+    image_h, image_w = image.shape[:2]
+    count = int(round(step / fine_step))
+    for i in range(-count, count + 1):
+        scale = round(coarse_scale + i * fine_step, 3)
+        if i == 0 or scale <= 0:
+            continue
+        candidate = scale_image(template, scale)
+        template_h, template_w = candidate.shape[:2]
+        pad = max(abs(template_w - scaled_template.shape[1]), abs(template_h - scaled_template.shape[0])) + 8
+        x0 = max(best_loc[0] - pad, 0)
+        y0 = max(best_loc[1] - pad, 0)
+        x1 = min(best_loc[0] + template_w + pad, image_w)
+        y1 = min(best_loc[1] + template_h + pad, image_h)
+        if x1 - x0 < template_w or y1 - y0 < template_h:
+            continue
+        max_val, max_loc = match_template(image[y0:y1, x0:x1], candidate)
+        if max_val > best_val:
+            best_scale, best_val, best_loc = scale, max_val, (max_loc[0] + x0, max_loc[1] + y0)
+    return best_scale, best_val, best_loc
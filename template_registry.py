@@ -0,0 +1,179 @@
+"""
+模板注册表模块
+"""
+import os
+import hashlib
+import time
+import cv2
+import numpy as np
+from logger import get_logger
+from template_matcher import scale_image, scale_mask
+
+
+# 模板图片截取自该高度的屏幕截图（1920x1080）
+TEMPLATE_BASE_HEIGHT = 1080
+
+
+def get_assets_dir():
+    """获取模板图片目录"""
+    return os.path.join(os.path.dirname(__file__), 'assets')
+
+
+class TemplateRegistry:
+    """模板注册表类
+
+    启动时一次性加载并解码assets目录下的所有模板图片，
+    之后按名称（文件名去掉扩展名）返回只读数组，检测路径不再访问磁盘。
+    加载时同时生成灰度版本，供单通道匹配模式使用；
+    带透明通道的模板会同时生成掩码，完全不透明的模板不需要掩码。
+    """
+
+    def __init__(self, assets_dir=None):
+        self.logger = get_logger()
+        self.assets_dir = assets_dir or get_assets_dir()
+        self.templates = {}
+        self.gray_templates = {}
+        self.masks = {}
+        self.template_paths = {}
+        self.template_hashes = {}
+        self.load_times = {}
+        self.scaled_templates = {}
+        self.scaled_masks = {}
+
+    def load_all(self):
+        """加载模板目录下的所有PNG模板，返回成功加载的数量"""
+        if not os.path.isdir(self.assets_dir):
+            self.logger.warning(f"⚠️ 模板目录不存在: {self.assets_dir}")
+            return 0
+
+        count = 0
+        for filename in sorted(os.listdir(self.assets_dir)):
+            if not filename.lower().endswith('.png'):
+                continue
+            name = os.path.splitext(filename)[0]
+            if self.load(name, os.path.join(self.assets_dir, filename)):
+                count += 1
+
+        total_ms = sum(self.load_times.values()) * 1000
+        self.logger.info(f"✅ 模板注册表加载完成: {count} 个模板, 总耗时 {total_ms:.1f}ms")
+        return count
+
+    def load(self, name, template_path):
+        """加载单个模板并以只读数组形式保存"""
+        try:
+            start = time.perf_counter()
+            image = cv2.imread(template_path, cv2.IMREAD_UNCHANGED)
+            elapsed = time.perf_counter() - start
+
+            if image is None:
+                self.logger.error(f"无法加载模板图片: {template_path}")
+                return False
+
+            template, mask = self._split_alpha(image)
+            gray_template = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
+
+            # 禁止写入，防止调用方意外修改共享的模板数据
+            template.setflags(write=False)
+            gray_template.setflags(write=False)
+            if mask is not None:
+                mask.setflags(write=False)
+
+            self.templates[name] = template
+            self.gray_templates[name] = gray_template
+            self.masks[name] = mask
+            self.template_paths[name] = template_path
+            self.template_hashes[name] = self._hash_image(image)
+            self.load_times[name] = elapsed
+
+            h, w = template.shape[:2]
+            mask_info = "带透明掩码" if mask is not None else "不透明"
+            self.logger.debug(f"已加载模板 {name}: 尺寸={w}x{h}, {mask_info}, 耗时={elapsed * 1000:.2f}ms")
+            return True
+
+        except Exception as e:
+            self.logger.error(f"加载模板图片失败 {template_path}: {e}")
+            return False
+
+    @staticmethod
+    def _hash_image(image):
+        """计算模板像素内容的哈希，图片内容变化时哈希随之变化"""
+        digest = hashlib.blake2b(image.tobytes(), digest_size=8)
+        digest.update(str(image.shape).encode())
+        return digest.hexdigest()
+
+    @staticmethod
+    def _split_alpha(image):
+        """拆分为BGR模板和透明度掩码，没有透明像素时掩码为None"""
+        if image.ndim == 2:
+            return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR), None
+        if image.shape[2] != 4:
+            return image, None
+
+        template = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+        alpha = image[:, :, 3]
+        if alpha.min() == 255:
+            return template, None
+
+        # 半透明的边缘像素按50%阈值归为前景或背景
+        mask = np.where(alpha >= 128, 255, 0).astype(np.uint8)
+        return template, mask
+
+    def get(self, name):
+        """按名称获取模板，不存在时返回None"""
+        return self.templates.get(name)
+
+    def get_gray(self, name):
+        """按名称获取灰度模板，不存在时返回None"""
+        return self.gray_templates.get(name)
+
+    def get_scaled(self, name, scale, grayscale=False):
+        """按名称获取缩放后的模板，每个比例只缩放一次"""
+        template = self.get_gray(name) if grayscale else self.get(name)
+        if template is None or scale == 1.0:
+            return template
+
+        key = (name, round(scale, 3), grayscale)
+        scaled = self.scaled_templates.get(key)
+        if scaled is None:
+            scaled = scale_image(template, scale)
+            scaled.setflags(write=False)
+            self.scaled_templates[key] = scaled
+        return scaled
+
+    def get_mask(self, name):
+        """按名称获取模板的透明度掩码，不透明模板返回None"""
+        return self.masks.get(name)
+
+    def get_scaled_mask(self, name, scale):
+        """按名称获取缩放后的透明度掩码"""
+        mask = self.get_mask(name)
+        if mask is None or scale == 1.0:
+            return mask
+
+        key = (name, round(scale, 3))
+        scaled = self.scaled_masks.get(key)
+        if scaled is None:
+            scaled = scale_mask(mask, scale)
+            scaled.setflags(write=False)
+            self.scaled_masks[key] = scaled
+        return scaled
+
+    def get_path(self, name):
+        """按名称获取模板文件路径"""
+        return self.template_paths.get(name)
+
+    def get_hash(self, name):
+        """按名称获取模板内容哈希，不存在时返回None"""
+        return self.template_hashes.get(name)
+
+    def has(self, name):
+        """检查模板是否已加载"""
+        return name in self.templates
+
+    def names(self):
+        """获取所有已加载模板的名称"""
+        return list(self.templates.keys())
+
+    def get_load_times(self):
+        """获取每个模板的加载耗时（秒）"""
+        return dict(self.load_times)
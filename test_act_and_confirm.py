@@ -0,0 +1,97 @@
+"""
+操作确认测试脚本 - 操作后一旦观察到预期的界面变化立即返回
+"""
+import sys
+import os
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from testing_utils import create_game_manager
+from screen_capture import FileCapture
+from logger import get_logger
+import cv2
+
+
+def test_act_and_confirm():
+    """按钮消失时立即确认，画面不变时超时返回False"""
+    try:
+        logger = get_logger()
+        logger.info("=== 操作确认测试 ===")
+
+        target_path = os.path.join(os.path.dirname(__file__), 'test_data', 'need_login.png')
+        target_image = cv2.imread(target_path, cv2.IMREAD_COLOR)
+        if target_image is None:
+            logger.error("无法加载目标图片")
+            return False
+
+        game_manager = create_game_manager()
+        game_manager.detection_config['scene_cache'] = False
+        scene = game_manager.detect_scene(['enter_game', 'input_username'], screenshot=target_image)
+        if not scene.found('enter_game'):
+            logger.error("❌ 未检测到进入游戏按钮")
+            return False
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # 点击后的画面：进入游戏按钮消失，账号输入框出现输入内容
+            clicked_image = target_image.copy()
+            enter_game = scene.get('enter_game')
+            cv2.rectangle(clicked_image, enter_game.top_left, enter_game.bottom_right, (30, 30, 30), -1)
+            username = scene.get('input_username')
+            cv2.putText(clicked_image, "user", (username.top_left[0] + 10, username.bottom_right[1] - 8),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 2)
+            clicked_path = os.path.join(temp_dir, 'clicked.png')
+            cv2.imwrite(clicked_path, clicked_image)
+
+            # 第一帧仍是点击前的画面，第二帧起按钮消失
+            game_manager.capture_backend = FileCapture([target_path, clicked_path], loop=False)
+            actions = []
+            start = time.perf_counter()
+            confirmed = game_manager._act_and_confirm(
+                lambda: actions.append('click') or True,
+                lambda: not game_manager._is_template_visible(scene, 'enter_game'),
+                timeout=2.0, description="进入游戏按钮消失",
+            )
+            elapsed = time.perf_counter() - start
+            logger.info(f"按钮消失确认: {confirmed}, 耗时 {elapsed * 1000:.0f}ms")
+            if not confirmed or actions != ['click'] or elapsed >= 2.0:
+                logger.error("❌ 按钮消失后未立即确认")
+                return False
+
+            # 输入框内容变化
+            reference = game_manager._crop_match_region(target_image, username)
+            if not game_manager._is_region_changed(scene, 'input_username', reference):
+                logger.error("❌ 未检测到输入框变化")
+                return False
+
+        # 画面一直不变：点击未生效，超时后返回False
+        game_manager.capture_backend = FileCapture([target_path])
+        start = time.perf_counter()
+        confirmed = game_manager._act_and_confirm(
+            lambda: True,
+            lambda: not game_manager._is_template_visible(scene, 'enter_game'),
+            timeout=0.5, description="进入游戏按钮消失",
+        )
+        elapsed = time.perf_counter() - start
+        logger.info(f"点击未生效: {confirmed}, 耗时 {elapsed * 1000:.0f}ms")
+        if confirmed:
+            logger.error("❌ 画面未变化时不应确认成功")
+            return False
+
+        # 操作本身失败时不等待
+        if game_manager._act_and_confirm(lambda: False, lambda: True):
+            logger.error("❌ 操作失败时不应确认成功")
+            return False
+
+        logger.info("✅ 操作确认测试通过")
+        return True
+
+    except Exception as e:
+        logger = get_logger()
+        logger.critical(f"操作确认测试失败: {e}")
+        print(f"操作确认测试失败: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    test_act_and_confirm()
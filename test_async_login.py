@@ -0,0 +1,132 @@
+"""
+异步登录测试脚本 - 等待期间事件循环不被阻塞，取消后立即停止
+"""
+import sys
+import os
+import asyncio
+import tempfile
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from testing_utils import create_game_manager
+from screen_capture import FileCapture
+from logger import get_logger
+import cv2
+import numpy as np
+
+
+def make_game_manager(frame_path, temp_dir):
+    """游戏已运行、窗口切换成功，画面来自回放文件，时间线保存到临时目录"""
+    game_manager = create_game_manager()
+    game_manager.timeline.log_dir = temp_dir
+    game_manager.detection_config['background_capture'] = False
+    game_manager.capture_backend = FileCapture([frame_path])
+    game_manager.is_game_running = lambda: True
+    game_manager.switch_to_game_window = lambda: True
+    return game_manager
+
+
+async def run_with_ticker(game_manager, cancel_after):
+    """登录的同时运行计时协程，cancel_after秒后取消登录任务"""
+    ticks = []
+
+    async def ticker():
+        while True:
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.01)
+
+    ticker_task = asyncio.create_task(ticker())
+    login_task = asyncio.create_task(game_manager.handle_login_async())
+    await asyncio.sleep(cancel_after)
+    login_task.cancel()
+    cancelled_at = time.monotonic()
+    try:
+        await login_task
+        cancelled = False
+    except asyncio.CancelledError:
+        cancelled = True
+    stopped_at = time.monotonic()
+    ticker_task.cancel()
+    return cancelled, stopped_at - cancelled_at, len(ticks)
+
+
+def test_async_login():
+    """同步封装、事件循环并发和两种取消方式"""
+    try:
+        logger = get_logger()
+        logger.info("=== 异步登录测试 ===")
+
+        login_path = os.path.join(os.path.dirname(__file__), 'test_data', 'need_login.png')
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # 同步接口：登录界面出现后立即返回
+            game_manager = make_game_manager(login_path, temp_dir)
+            if not game_manager.handle_login() or game_manager.login_outcome != 'manual_login':
+                logger.error(f"❌ 同步登录结果不正确: {game_manager.login_outcome}")
+                return False
+
+            # 登录开始前收到的取消请求不会被清除，prepare_login之后才能再次登录
+            game_manager = make_game_manager(login_path, temp_dir)
+            game_manager.cancel_login()
+            if game_manager.handle_login():
+                logger.error("❌ 登录开始前的取消请求被忽略")
+                return False
+            game_manager.prepare_login()
+            if not game_manager.handle_login() or game_manager.login_outcome != 'manual_login':
+                logger.error(f"❌ prepare_login后应能再次登录: {game_manager.login_outcome}")
+                return False
+
+            # 一直是黑屏：登录会一直等待，直到被取消
+            black_path = os.path.join(temp_dir, 'black.png')
+            cv2.imwrite(black_path, np.zeros((1080, 1920, 3), dtype=np.uint8))
+
+            game_manager = make_game_manager(black_path, temp_dir)
+            # 开启后台截图，记录停止截图线程时所在的线程
+            game_manager.detection_config['background_capture'] = True
+            stop_threads = []
+            stop_background_capture = game_manager.stop_background_capture
+            game_manager.stop_background_capture = lambda: (
+                stop_threads.append(threading.current_thread().name), stop_background_capture())
+            cancelled, stop_delay, ticks = asyncio.run(run_with_ticker(game_manager, 1.5))
+            logger.info(f"取消任务: cancelled={cancelled}, 停止耗时 {stop_delay:.2f}s, 计时协程运行 {ticks} 次")
+            if not cancelled or stop_delay >= 1.5:
+                logger.error("❌ 取消任务后登录未及时停止")
+                return False
+            if ticks < 50:
+                logger.error("❌ 登录期间事件循环被阻塞")
+                return False
+            if not stop_threads or not all(name.startswith('login') for name in stop_threads) \
+                    or game_manager.background_capture is not None:
+                logger.error(f"❌ 停止后台截图应在登录线程中执行: {stop_threads}")
+                return False
+            steps = {entry['step']: entry['outcome'] for entry in game_manager.timeline.to_dict()['steps']}
+            if steps.get('handle_login') != 'cancelled':
+                logger.error(f"❌ 时间线未记录取消: {steps}")
+                return False
+
+            # 在其它线程中调用cancel_login：同步接口返回False
+            game_manager = make_game_manager(black_path, temp_dir)
+            timer = threading.Timer(1.0, game_manager.cancel_login)
+            timer.start()
+            start = time.monotonic()
+            result = game_manager.handle_login()
+            elapsed = time.monotonic() - start
+            timer.join()
+            logger.info(f"cancel_login: 结果={result}, 耗时 {elapsed:.2f}s")
+            if result or elapsed >= 3.0:
+                logger.error("❌ cancel_login后同步登录应立即返回False")
+                return False
+
+        logger.info("✅ 异步登录测试通过")
+        return True
+
+    except Exception as e:
+        logger = get_logger()
+        logger.critical(f"异步登录测试失败: {e}")
+        print(f"异步登录测试失败: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    test_async_login()
@@ -6,7 +6,7 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from logger import get_logger
-from game_manager import GameManager
+from testing_utils import create_game_manager
 
 
 def test_auto_login():
@@ -16,7 +16,7 @@ def test_auto_login():
     
     try:
         # 创建游戏管理器实例
-        game_manager = GameManager()
+        game_manager = create_game_manager()
         
         # 测试输入法切换
         logger.info("测试输入法切换...")
@@ -44,10 +44,6 @@ def test_auto_login():
         result2 = game_manager._click_password_field()
         logger.info(f"密码输入框点击结果: {result2}")
         
-        logger.info("测试登录按钮点击...")
-        result3 = game_manager._click_login_button()
-        logger.info(f"登录按钮点击结果: {result3}")
-        
         logger.info("✅ 自动登录功能测试完成")
         logger.info("所有方法都可以正常调用")
         
@@ -0,0 +1,149 @@
+"""
+后台截图测试脚本 - 检测直接读取后台线程截取的最新一帧
+"""
+import sys
+import os
+import time
+import types
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from testing_utils import create_game_manager
+from screen_capture import BackgroundCapture, FileCapture, MssCapture
+from logger import get_logger
+import numpy as np
+
+
+class FakeMssInstance:
+    """记录是否已关闭的mss实例，截图返回BGRA格式的空白帧"""
+
+    def __init__(self, created):
+        self.monitors = [None, {'left': 0, 'top': 0, 'width': 64, 'height': 48}]
+        self.closed = False
+        created.append(self)
+
+    def grab(self, area):
+        return np.zeros((area['height'], area['width'], 4), dtype=np.uint8)
+
+    def close(self):
+        self.closed = True
+
+
+def test_background_capture():
+    """后台截图启动后检测结果应与直接截图一致，并且能等待点击之后的新帧"""
+    try:
+        logger = get_logger()
+        logger.info("=== 后台截图测试 ===")
+
+        game_manager = create_game_manager()
+        game_manager.capture_backend = FileCapture(['test_data/need_login.png'])
+        game_manager.detection_config['scene_cache'] = False
+        game_manager.detection_config['capture_fps'] = 20
+
+        direct_scene = game_manager.detect_scene(['enter_game', 'input_username'])
+
+        if not game_manager.start_background_capture():
+            logger.error("❌ 后台截图线程启动失败")
+            return False
+
+        try:
+            background = game_manager.background_capture
+            first = background.wait_for_frame(timeout=2.0)
+            if first is None:
+                logger.error("❌ 未获取到后台截图")
+                return False
+
+            # 直接读取缓冲区不需要等待截图
+            start = time.perf_counter()
+            frame = background.latest()
+            read_time = time.perf_counter() - start
+            logger.info(f"读取最新一帧耗时: {read_time * 1000:.2f}ms")
+
+            background_scene = game_manager.detect_scene(['enter_game', 'input_username'])
+            for name in ['enter_game', 'input_username']:
+                if background_scene.screen_center(name) != direct_scene.screen_center(name):
+                    logger.error(f"❌ {name} 后台截图检测结果与直接截图不一致")
+                    return False
+
+            # 点击之后只使用点击之后截取的帧
+            game_manager._last_click_time = time.time()
+            scene = game_manager.detect_scene(['enter_game'])
+            newest = background.latest()
+            if scene is None or newest is None or newest.timestamp <= game_manager._last_click_time:
+                logger.error("❌ 点击之后未等待新的截图")
+                return False
+
+            recent = background.recent()
+            logger.info(f"缓冲区帧数: {len(recent)}, 最新帧序号: {recent[0].sequence}, "
+                        f"读取的帧序号: {frame.sequence}")
+        finally:
+            game_manager.stop_background_capture()
+
+        if game_manager.background_capture is not None:
+            logger.error("❌ 后台截图线程未停止")
+            return False
+
+        logger.info("✅ 后台截图测试通过")
+        return True
+
+    except Exception as e:
+        logger = get_logger()
+        logger.critical(f"后台截图测试失败: {e}")
+        print(f"后台截图测试失败: {e}")
+        return False
+
+
+def test_background_capture_releases_mss():
+    """截图线程退出时关闭本线程创建的mss实例"""
+    try:
+        logger = get_logger()
+        logger.info("=== 后台截图mss实例释放测试 ===")
+
+        # 测试环境不一定有桌面和mss，用记录实例的模块代替
+        created = []
+        fake_mss = types.ModuleType('mss')
+        fake_mss.mss = lambda: FakeMssInstance(created)
+        original = sys.modules.get('mss')
+        sys.modules['mss'] = fake_mss
+        try:
+            backend = MssCapture()
+        finally:
+            if original is None:
+                sys.modules.pop('mss', None)
+            else:
+                sys.modules['mss'] = original
+
+        background = BackgroundCapture(backend, fps=50)
+        for _ in range(2):
+            background.start()
+            if background.wait_for_frame(timeout=2.0) is None:
+                logger.error("❌ 未获取到后台截图")
+                return False
+            background.stop()
+
+        thread_instances = created[1:]
+        logger.info(f"创建的mss实例: {len(created)}, 剩余实例: {len(backend._instances)}")
+        if len(thread_instances) != 2 or not all(instance.closed for instance in thread_instances):
+            logger.error("❌ 截图线程退出后未关闭其mss实例")
+            return False
+        if list(backend._instances.values()) != created[:1] or created[0].closed:
+            logger.error("❌ 截图线程退出后不应影响其它线程的mss实例")
+            return False
+
+        backend.close()
+        if not created[0].closed or backend._instances:
+            logger.error("❌ close后仍有未关闭的mss实例")
+            return False
+
+        logger.info("✅ 截图线程退出时已关闭其mss实例")
+        return True
+
+    except Exception as e:
+        logger = get_logger()
+        logger.critical(f"后台截图mss实例释放测试失败: {e}")
+        print(f"后台截图mss实例释放测试失败: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    test_background_capture()
+    test_background_capture_releases_mss()
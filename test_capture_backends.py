@@ -0,0 +1,118 @@
+"""
+截图后端测试脚本 - 使用回放后端在没有桌面的环境下运行完整识别流程
+"""
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from testing_utils import create_game_manager
+from screen_capture import FileCapture, create_capture_backend
+from logger import get_logger
+
+
+def test_file_capture_pipeline():
+    """回放need_login.png，检测流程应识别出登录界面"""
+    try:
+        logger = get_logger()
+        logger.info("=== 回放截图后端测试 ===")
+
+        capture = FileCapture(['test_data/need_login.png'])
+
+        game_manager = create_game_manager()
+        game_manager.capture_backend = capture
+        game_manager.detection_config['scene_cache'] = False
+
+        rounds = 3
+        start = time.perf_counter()
+        for _ in range(rounds):
+            frame = game_manager._capture_screen()
+        capture_time = (time.perf_counter() - start) / rounds
+        logger.info(f"回放截图耗时: {capture_time * 1000:.3f}ms/帧, 尺寸={frame.shape}")
+
+        start = time.perf_counter()
+        scene = game_manager.detect_scene()
+        detect_time = time.perf_counter() - start
+        logger.info(f"场景检测（含截图）耗时: {detect_time * 1000:.1f}ms, 结果: {scene.summary()}")
+
+        if not game_manager._detect_enter_game_button():
+            logger.error("❌ 回放帧中未检测到进入游戏按钮")
+            return False
+
+        # 没有配置回放文件时改用桌面截图，不影响程序启动
+        fallback = create_capture_backend('file', [])
+        fallback.close()
+        if isinstance(fallback, FileCapture):
+            logger.error("❌ 没有回放文件时应改用桌面截图后端")
+            return False
+
+        logger.info("✅ 回放截图后端测试通过")
+        return True
+
+    except Exception as e:
+        logger = get_logger()
+        logger.critical(f"回放截图后端测试失败: {e}")
+        print(f"回放截图后端测试失败: {e}")
+        return False
+
+
+def test_window_region_capture():
+    """只截取窗口区域时，点击坐标换算回屏幕坐标后应与整屏截图一致"""
+    try:
+        logger = get_logger()
+        logger.info("=== 窗口区域截图测试 ===")
+
+        capture = FileCapture(['test_data/need_login.png'])
+        game_manager = create_game_manager()
+        game_manager.capture_backend = capture
+        game_manager.detection_config['scene_cache'] = False
+        game_manager.detection_config['roi'] = False
+
+        names = ['enter_game', 'input_username', 'input_password']
+        full_scene = game_manager.detect_scene(names)
+
+        # 模拟位于 (400, 200) 的 1280x720 窗口化客户端
+        capture.set_region((400, 200, 1280, 720))
+        start = time.perf_counter()
+        window_scene = game_manager.detect_scene(names)
+        elapsed = time.perf_counter() - start
+        logger.info(f"窗口区域检测耗时: {elapsed * 1000:.1f}ms, 截图尺寸={window_scene.screenshot.shape}, "
+                    f"结果: {window_scene.summary()}")
+
+        for name in names:
+            if window_scene.screen_center(name) != full_scene.screen_center(name):
+                logger.error(f"❌ {name} 屏幕坐标不一致: {window_scene.screen_center(name)} != "
+                             f"{full_scene.screen_center(name)}")
+                return False
+
+        logger.info("✅ 窗口区域截图测试通过")
+        return True
+
+    except Exception as e:
+        logger = get_logger()
+        logger.critical(f"窗口区域截图测试失败: {e}")
+        print(f"窗口区域截图测试失败: {e}")
+        return False
+
+
+def benchmark_desktop_capture(rounds=10):
+    """测量桌面截图后端的耗时（需要桌面环境）"""
+    logger = get_logger()
+    for name in ['mss', 'pyautogui']:
+        try:
+            backend = create_capture_backend(name)
+            backend.grab()
+            start = time.perf_counter()
+            for _ in range(rounds):
+                backend.grab()
+            elapsed = (time.perf_counter() - start) / rounds
+            logger.info(f"{backend.name} 截图耗时: {elapsed * 1000:.1f}ms/帧")
+            backend.close()
+        except Exception as e:
+            logger.warning(f"{name} 截图不可用: {e}")
+
+
+if __name__ == "__main__":
+    test_file_capture_pipeline()
+    test_window_region_capture()
+    benchmark_desktop_capture()
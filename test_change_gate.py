@@ -0,0 +1,93 @@
+"""
+帧差分门控测试脚本 - 画面未变化的区域跳过匹配
+"""
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from testing_utils import create_game_manager
+from logger import get_logger
+import cv2
+import numpy as np
+
+
+def timed_detect(game_manager, screenshot):
+    """检测一帧，返回 (结果, 耗时)"""
+    start = time.perf_counter()
+    scene = game_manager.detect_scene(screenshot=screenshot)
+    return scene, time.perf_counter() - start
+
+
+def test_change_gate():
+    """未变化的画面复用结果，变化区域重新匹配，纯色画面跳过匹配"""
+    try:
+        logger = get_logger()
+        logger.info("=== 帧差分门控测试 ===")
+
+        game_manager = create_game_manager()
+        # 关闭检测结果缓存，相同画面也交给门控处理
+        game_manager.detection_config['scene_cache'] = False
+
+        target_path = os.path.join(os.path.dirname(__file__), 'test_data', 'need_login.png')
+        target_image = cv2.imread(target_path, cv2.IMREAD_COLOR)
+        if target_image is None:
+            logger.error("无法加载目标图片")
+            return False
+
+        first_scene, first_time = timed_detect(game_manager, target_image)
+
+        # 1. 画面完全相同：所有模板跳过匹配
+        same_scene, same_time = timed_detect(game_manager, target_image.copy())
+        logger.info(f"首次检测: {first_time * 1000:.1f}ms, 相同画面: {same_time * 1000:.1f}ms")
+        if same_scene.found_names() != first_scene.found_names():
+            logger.error("❌ 相同画面的检测结果不一致")
+            return False
+
+        # 2. 与界面元素无关的区域变化：已找到的模板复用结果，未找到的模板只搜索变化区域
+        changed_image = target_image.copy()
+        cv2.rectangle(changed_image, (1500, 50), (1800, 200), (0, 0, 255), -1)
+        partial_scene, partial_time = timed_detect(game_manager, changed_image)
+        logger.info(f"局部变化: {partial_time * 1000:.1f}ms, 结果: {partial_scene.summary()}")
+        for name in first_scene.found_names():
+            if partial_scene.center(name) != first_scene.center(name):
+                logger.error(f"❌ {name} 在局部变化后位置不一致")
+                return False
+
+        # 3. 界面元素所在区域变化：重新匹配该模板
+        covered_image = changed_image.copy()
+        top_left, bottom_right = first_scene.get('enter_game').top_left, first_scene.get('enter_game').bottom_right
+        cv2.rectangle(covered_image, top_left, bottom_right, (40, 40, 40), -1)
+        covered_scene, covered_time = timed_detect(game_manager, covered_image)
+        logger.info(f"元素被遮挡: {covered_time * 1000:.1f}ms, 结果: {covered_scene.summary()}")
+        if covered_scene.found('enter_game'):
+            logger.error("❌ 进入游戏按钮被遮挡后仍复用了旧结果")
+            return False
+
+        # 4. 纯色加载画面：跳过所有匹配
+        loading_image = np.full_like(target_image, 255)
+        loading_scene, loading_time = timed_detect(game_manager, loading_image)
+        logger.info(f"纯色画面: {loading_time * 1000:.1f}ms, 结果: {loading_scene.summary()}")
+        if loading_scene.found_names():
+            logger.error("❌ 纯色画面中不应找到界面元素")
+            return False
+
+        stats = game_manager.get_change_gate_stats()
+        logger.info(f"门控统计: 跳过={stats['skipped']}, 局部匹配={stats['partial']}, 全图匹配={stats['full']}, "
+                    f"纯色帧={stats['uniform_frames']}, 节省={stats['time_saved'] * 1000:.1f}ms")
+        if stats['skipped'] == 0 or stats['partial'] == 0 or stats['uniform_frames'] != 1:
+            logger.error("❌ 门控统计不符合预期")
+            return False
+
+        logger.info("✅ 帧差分门控测试通过")
+        return True
+
+    except Exception as e:
+        logger = get_logger()
+        logger.critical(f"帧差分门控测试失败: {e}")
+        print(f"帧差分门控测试失败: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    test_change_gate()
@@ -0,0 +1,83 @@
+"""
+缩小分辨率检测测试脚本 - 对比原始分辨率与半分辨率检测的结果和耗时
+"""
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from testing_utils import create_game_manager
+from logger import get_logger
+import cv2
+
+
+def run_detection(game_manager, target_image, rounds=3):
+    """多次检测同一帧，返回最后一次结果和最短耗时"""
+    best = None
+    scene = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        scene = game_manager.detect_scene(screenshot=target_image)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return scene, best
+
+
+def test_detection_scale():
+    """半分辨率检测应找到相同的界面元素，精确定位后的点击位置与原始分辨率一致"""
+    try:
+        logger = get_logger()
+        logger.info("=== 缩小分辨率检测测试 ===")
+
+        game_manager = create_game_manager()
+        # 关闭ROI、检测结果缓存和帧差分门控，每次都完整匹配
+        game_manager.detection_config['roi'] = False
+        game_manager.detection_config['scene_cache'] = False
+        game_manager.detection_config['change_gate'] = False
+
+        target_path = os.path.join(os.path.dirname(__file__), 'test_data', 'need_login.png')
+        target_image = cv2.imread(target_path, cv2.IMREAD_COLOR)
+        if target_image is None:
+            logger.error("无法加载目标图片")
+            return False
+
+        results = {}
+        for grayscale in (False, True):
+            game_manager.detection_config['grayscale'] = grayscale
+            for detection_scale in (1.0, 0.5):
+                game_manager.detection_config['detection_scale'] = detection_scale
+                scene, elapsed = run_detection(game_manager, target_image)
+                results[(grayscale, detection_scale)] = (scene, elapsed)
+                mode = "灰度" if grayscale else "彩色"
+                logger.info(f"{mode} 检测比例={detection_scale}: {elapsed * 1000:.1f}ms, 结果: {scene.summary()}")
+
+        for grayscale in (False, True):
+            full_scene, full_time = results[(grayscale, 1.0)]
+            half_scene, half_time = results[(grayscale, 0.5)]
+            logger.info(f"{'灰度' if grayscale else '彩色'}半分辨率加速: {full_time / half_time:.2f}x")
+
+            if half_scene.found_names() != full_scene.found_names():
+                logger.error(f"❌ 半分辨率检测结果不一致: {half_scene.found_names()} != {full_scene.found_names()}")
+                return False
+
+            # 点击前在原始分辨率上精确定位
+            for name in full_scene.found_names():
+                approx = half_scene.center(name)
+                refined = game_manager._refine_scene_match(half_scene, name)
+                if refined.center != full_scene.center(name):
+                    logger.error(f"❌ {name} 精确定位位置 {refined.center} 与原始分辨率 {full_scene.center(name)} 不一致")
+                    return False
+                logger.debug(f"{name}: 半分辨率位置={approx}, 精确定位={refined.center}")
+
+        logger.info("✅ 缩小分辨率检测测试通过")
+        return True
+
+    except Exception as e:
+        logger = get_logger()
+        logger.critical(f"缩小分辨率检测测试失败: {e}")
+        print(f"缩小分辨率检测测试失败: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    test_detection_scale()
@@ -0,0 +1,135 @@
+"""
+帧缓冲区复用测试脚本 - 确认稳定截图时不再分配新的整帧内存
+"""
+import sys
+import os
+import time
+import tracemalloc
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from screen_capture import CaptureBackend
+from scene_detection import SceneResult
+from logger import get_logger
+import cv2
+import numpy as np
+
+
+class BgraReplayCapture(CaptureBackend):
+    """回放BGRA格式的原始帧，模拟mss返回的像素格式"""
+
+    name = 'bgra-replay'
+
+    def __init__(self, frame):
+        super().__init__()
+        self.native = cv2.cvtColor(frame, cv2.COLOR_BGR2BGRA)
+
+    def grab(self, grayscale=False):
+        return self._convert(self.native, cv2.COLOR_BGRA2BGR, cv2.COLOR_BGRA2GRAY, grayscale)
+
+
+def measure_polling(capture, grayscale, rounds=20):
+    """预热后连续截图，返回 (新增的缓冲区分配次数, tracemalloc峰值字节数, 平均耗时)"""
+    for _ in range(3):
+        capture.grab(grayscale)
+    allocations = capture.get_buffer_allocations()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        capture.grab(grayscale)
+    elapsed = (time.perf_counter() - start) / rounds
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return capture.get_buffer_allocations() - allocations, peak, elapsed
+
+
+def test_frame_buffer_reuse():
+    """稳定截图时既不新建缓冲区，也不分配整帧大小的内存"""
+    try:
+        logger = get_logger()
+        logger.info("=== 帧缓冲区复用测试 ===")
+
+        target_path = os.path.join(os.path.dirname(__file__), 'test_data', 'need_login.png')
+        frame = cv2.imread(target_path, cv2.IMREAD_COLOR)
+        if frame is None:
+            logger.error("无法加载目标图片")
+            return False
+
+        capture = BgraReplayCapture(frame)
+        gray_frame_size = frame.shape[0] * frame.shape[1]
+
+        # 原来的转换方式：每帧复制一份再转换为新的数组
+        start = time.perf_counter()
+        for _ in range(20):
+            cv2.cvtColor(np.array(capture.native), cv2.COLOR_BGRA2BGR)
+        legacy_time = (time.perf_counter() - start) / 20
+
+        for grayscale in (False, True):
+            new_buffers, peak, elapsed = measure_polling(capture, grayscale)
+            mode = "灰度" if grayscale else "彩色"
+            logger.info(f"{mode}截图: 新增缓冲区={new_buffers}, 内存峰值={peak / 1024:.1f}KB, "
+                        f"转换耗时={elapsed * 1000:.2f}ms (原方式 {legacy_time * 1000:.2f}ms)")
+
+            if new_buffers != 0 or peak >= gray_frame_size:
+                logger.error(f"❌ {mode}截图仍在分配整帧内存")
+                return False
+
+        # 复用的缓冲区内容应与直接转换一致
+        expected = cv2.cvtColor(capture.native, cv2.COLOR_BGRA2BGR)
+        if not np.array_equal(capture.grab(), expected):
+            logger.error("❌ 缓冲区中的帧与直接转换的结果不一致")
+            return False
+
+        logger.info("✅ 稳定截图时不再分配新的整帧缓冲区")
+        return True
+
+    except Exception as e:
+        logger = get_logger()
+        logger.critical(f"帧缓冲区复用测试失败: {e}")
+        print(f"帧缓冲区复用测试失败: {e}")
+        return False
+
+
+def test_scene_keeps_screenshot():
+    """复用的缓冲区会被之后的截图覆盖，keep_screenshot后的画面保持不变"""
+    try:
+        logger = get_logger()
+        logger.info("=== 检测画面保留测试 ===")
+
+        target_path = os.path.join(os.path.dirname(__file__), 'test_data', 'need_login.png')
+        frame = cv2.imread(target_path, cv2.IMREAD_COLOR)
+        if frame is None:
+            logger.error("无法加载目标图片")
+            return False
+
+        capture = BgraReplayCapture(frame)
+        pooled = SceneResult(capture.grab())
+        kept = SceneResult(capture.grab())
+        kept.keep_screenshot()
+
+        # 画面变化后再截取两帧，缓冲区轮换回到检测时使用的缓冲区
+        capture.native[:] = 0
+        capture.grab()
+        capture.grab()
+
+        if np.array_equal(pooled.screenshot, frame):
+            logger.error("❌ 未复制的画面应已被之后的截图覆盖")
+            return False
+        if not np.array_equal(kept.screenshot, frame):
+            logger.error("❌ keep_screenshot后的画面被之后的截图覆盖")
+            return False
+
+        logger.info("✅ keep_screenshot后的画面不受之后截图的影响")
+        return True
+
+    except Exception as e:
+        logger = get_logger()
+        logger.critical(f"检测画面保留测试失败: {e}")
+        print(f"检测画面保留测试失败: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    test_frame_buffer_reuse()
+    test_scene_keeps_screenshot()
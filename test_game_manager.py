@@ -5,7 +5,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from game_manager import GameManager
+from testing_utils import create_game_manager
 from logger import get_logger
 
 
@@ -16,7 +16,7 @@ def test_game_manager_screen_recognition():
         logger.info("=== 测试GameManager screen_recognition属性 ===")
         
         # 创建游戏管理器实例
-        game_manager = GameManager()
+        game_manager = create_game_manager()
         
         # 检查screen_recognition属性是否存在
         if hasattr(game_manager, 'screen_recognition'):
@@ -0,0 +1,117 @@
+"""
+游戏就绪检测测试脚本 - 窗口出现并渲染出第一帧画面后立即开始检测登录界面
+"""
+import sys
+import os
+import subprocess
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from testing_utils import create_game_manager
+from screen_capture import FileCapture
+from scene_detection import is_blank_frame
+from wait_utils import PollPolicy
+from logger import get_logger
+import cv2
+import numpy as np
+
+
+def launch_fake_game(game_manager, code):
+    """用Python子进程代替游戏进程"""
+    game_manager.game_process = subprocess.Popen([sys.executable, '-c', code])
+    game_manager.launch_time = time.monotonic()
+    game_manager.launch_metrics = {}
+
+
+def test_game_readiness():
+    """黑屏阶段继续等待，首帧画面出现后就绪；进程退出时立即返回"""
+    try:
+        logger = get_logger()
+        logger.info("=== 游戏就绪检测测试 ===")
+
+        target_path = os.path.join(os.path.dirname(__file__), 'test_data', 'need_login.png')
+        target_image = cv2.imread(target_path, cv2.IMREAD_COLOR)
+        if target_image is None:
+            logger.error("无法加载目标图片")
+            return False
+
+        black_image = np.zeros_like(target_image)
+        if not is_blank_frame(black_image) or is_blank_frame(target_image):
+            logger.error("❌ 纯色画面判断不正确")
+            return False
+
+        policy = PollPolicy(initial=0.01, max_interval=0.02)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            black_path = os.path.join(temp_dir, 'black.png')
+            cv2.imwrite(black_path, black_image)
+
+            game_manager = create_game_manager()
+            game_manager.timeline.reset()
+            # 前两帧是窗口刚创建时的黑屏
+            game_manager.capture_backend = FileCapture([black_path, black_path, target_path], loop=False)
+            game_manager.get_game_window_rect = lambda: None
+            # 第3次查找时窗口出现
+            lookups = []
+            game_manager._find_launched_window = lambda: lookups.append(1) or (12345 if len(lookups) >= 3 else None)
+
+            launch_fake_game(game_manager, 'import time; time.sleep(10)')
+            try:
+                ready = game_manager._wait_for_game_ready(5, policy)
+            finally:
+                game_manager.game_process.kill()
+                game_manager.game_process.wait()
+            metrics = game_manager.launch_metrics
+            logger.info(f"游戏就绪: {ready}, 指标: {metrics}")
+            if not ready or len(lookups) != 3 or metrics['first_frame'] < metrics['window']:
+                logger.error("❌ 窗口出现并渲染画面后应立即就绪")
+                return False
+            if 'launch_to_ready' not in game_manager.timeline.to_dict()['metrics']:
+                logger.error("❌ 时间线中缺少启动到就绪的耗时")
+                return False
+
+        # 游戏进程启动后立即退出：不等待窗口出现
+        game_manager = create_game_manager()
+        game_manager.is_game_running = lambda: False
+        game_manager._find_launched_window = lambda: None
+        launch_fake_game(game_manager, 'import sys; sys.exit(3)')
+        game_manager.game_process.wait()
+        start = time.monotonic()
+        ready = game_manager._wait_for_game_ready(5, policy)
+        elapsed = time.monotonic() - start
+        logger.info(f"进程退出: {ready}, 指标: {game_manager.launch_metrics}, 耗时 {elapsed:.2f}s")
+        if ready or game_manager.launch_metrics.get('exit_code') != 3 or elapsed >= 1.0:
+            logger.error("❌ 进程退出后应立即返回")
+            return False
+
+        # 没有安装pywin32：不轮询到超时，立即改为直接等待登录界面
+        def missing_win32gui():
+            raise ImportError("No module named 'win32gui'")
+
+        game_manager = create_game_manager()
+        game_manager._find_launched_window = missing_win32gui
+        launch_fake_game(game_manager, 'import time; time.sleep(10)')
+        try:
+            start = time.monotonic()
+            ready = game_manager._wait_for_game_ready(5, policy)
+            elapsed = time.monotonic() - start
+        finally:
+            game_manager.game_process.kill()
+            game_manager.game_process.wait()
+        logger.info(f"缺少pywin32: {ready}, 耗时 {elapsed:.2f}s")
+        if ready or elapsed >= 1.0:
+            logger.error("❌ 缺少pywin32时应立即返回")
+            return False
+
+        logger.info("✅ 游戏就绪检测测试通过")
+        return True
+
+    except Exception as e:
+        logger = get_logger()
+        logger.critical(f"游戏就绪检测测试失败: {e}")
+        print(f"游戏就绪检测测试失败: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    test_game_readiness()
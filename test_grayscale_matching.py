@@ -0,0 +1,76 @@
+"""
+灰度匹配测试脚本 - 对比彩色匹配和灰度匹配的准确度与耗时
+"""
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from logger import get_logger
+from template_registry import TemplateRegistry
+from template_matcher import match_template, to_grayscale
+import cv2
+
+
+def test_grayscale_matching():
+    """灰度匹配的位置应与彩色匹配一致，相似度差异很小"""
+    try:
+        logger = get_logger()
+        logger.info("=== 灰度匹配对比测试 ===")
+
+        target_path = os.path.join(os.path.dirname(__file__), 'test_data', 'need_login.png')
+        target_image = cv2.imread(target_path, cv2.IMREAD_COLOR)
+        if target_image is None:
+            logger.error("无法加载目标图片")
+            return False
+
+        registry = TemplateRegistry()
+        registry.load_all()
+
+        # 每帧只转换一次
+        start = time.perf_counter()
+        gray_image = to_grayscale(target_image)
+        convert_time = time.perf_counter() - start
+        logger.info(f"整帧灰度转换耗时: {convert_time * 1000:.2f}ms")
+
+        all_match = True
+        total_color = 0.0
+        total_gray = convert_time
+        logger.info(f"{'模板':<16}{'彩色相似度':>12}{'灰度相似度':>12}{'位置一致':>10}{'彩色ms':>10}{'灰度ms':>10}")
+        for name in registry.names():
+            start = time.perf_counter()
+            color_val, color_loc = match_template(target_image, registry.get(name))
+            color_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            gray_val, gray_loc = match_template(gray_image, registry.get_gray(name))
+            gray_time = time.perf_counter() - start
+
+            total_color += color_time
+            total_gray += gray_time
+
+            same = color_loc == gray_loc and abs(color_val - gray_val) < 0.01
+            all_match = all_match and same
+            logger.info(
+                f"{name:<16}{color_val:>12.4f}{gray_val:>12.4f}{'✅' if same else '❌':>10}"
+                f"{color_time * 1000:>10.1f}{gray_time * 1000:>10.1f}"
+            )
+
+        logger.info(f"总耗时: 彩色={total_color * 1000:.1f}ms, 灰度(含转换)={total_gray * 1000:.1f}ms, "
+                    f"加速={total_color / total_gray:.1f}x")
+
+        if all_match:
+            logger.info("✅ 灰度匹配结果与彩色匹配一致")
+        else:
+            logger.error("❌ 灰度匹配结果与彩色匹配不一致")
+        return all_match
+
+    except Exception as e:
+        logger = get_logger()
+        logger.critical(f"灰度匹配测试失败: {e}")
+        print(f"灰度匹配测试失败: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    test_grayscale_matching()
@@ -0,0 +1,107 @@
+"""
+游戏内状态检测测试脚本 - 已在游戏中时立即结束等待，不再等到超时
+"""
+import sys
+import os
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import game_manager as game_manager_module
+from testing_utils import create_game_manager
+from screen_capture import FileCapture
+from wait_utils import PollPolicy
+from logger import get_logger
+import cv2
+import numpy as np
+
+
+def make_in_game_frame(shape):
+    """生成没有登录界面元素、带纹理的游戏画面"""
+    rng = np.random.default_rng(7)
+    frame = rng.integers(0, 255, shape, dtype=np.uint8)
+    frame = cv2.GaussianBlur(frame, (9, 9), 0)
+    # 左上角的HUD图标
+    cv2.circle(frame, (80, 80), 40, (240, 220, 200), -1)
+    cv2.putText(frame, "UID 100000001", (1650, 1060), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+    return frame
+
+
+def test_in_game_detection():
+    """HUD模板命中时立即返回，没有模板时画面稳定后返回，登录界面不受影响"""
+    try:
+        logger = get_logger()
+        logger.info("=== 游戏内状态检测测试 ===")
+
+        login_path = os.path.join(os.path.dirname(__file__), 'test_data', 'need_login.png')
+        login_image = cv2.imread(login_path, cv2.IMREAD_COLOR)
+        if login_image is None:
+            logger.error("无法加载目标图片")
+            return False
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            frame = make_in_game_frame(login_image.shape)
+            frame_path = os.path.join(temp_dir, 'in_game.png')
+            cv2.imwrite(frame_path, frame)
+            hud_path = os.path.join(temp_dir, 'hud_test.png')
+            cv2.imwrite(hud_path, frame[30:130, 30:130])
+
+            # 有HUD模板：第一次检测就结束
+            game_manager = create_game_manager()
+            game_manager.detection_config['scene_cache'] = False
+            game_manager.template_registry.load('hud_test', hud_path)
+            game_manager.capture_backend = FileCapture([frame_path])
+            start = time.monotonic()
+            outcome = game_manager._check_and_handle_login('user', 'pass', timeout=30)
+            elapsed = time.monotonic() - start
+            logger.info(f"HUD模板: 结果={outcome}, 耗时 {elapsed:.2f}s")
+            if outcome != 'already_logged_in' or elapsed >= 5:
+                logger.error("❌ 出现HUD元素时应立即判定为已登录")
+                return False
+            if game_manager.timeline.to_dict()['metrics'].get('login_outcome') != 'already_logged_in':
+                logger.error("❌ 时间线中缺少登录结果")
+                return False
+
+            # 登录界面不会被误判为游戏内
+            game_manager.capture_backend = FileCapture([login_path])
+            outcome = game_manager._check_and_handle_login(timeout=30)
+            logger.info(f"登录界面: 结果={outcome}")
+            if outcome != 'manual_login':
+                logger.error("❌ 登录界面不应判定为已在游戏中")
+                return False
+
+            # 没有HUD模板：只有允许时才按画面稳定判断
+            game_manager = create_game_manager()
+            game_manager.detection_config['scene_cache'] = False
+            game_manager.capture_backend = FileCapture([frame_path])
+            policy = PollPolicy(initial=0.05, max_interval=0.05)
+            settle_time = game_manager_module.IN_GAME_SETTLE_TIME
+            game_manager_module.IN_GAME_SETTLE_TIME = 0.2
+            try:
+                scene = game_manager._wait_for_login_ui(1.0, policy, detect_in_game=True)
+                if scene is not None:
+                    logger.error("❌ 未允许按画面判断时不应提前结束")
+                    return False
+                start = time.monotonic()
+                scene = game_manager._wait_for_login_ui(10, policy, detect_in_game=True,
+                                                        allow_in_game_heuristic=True)
+                elapsed = time.monotonic() - start
+            finally:
+                game_manager_module.IN_GAME_SETTLE_TIME = settle_time
+            logger.info(f"画面稳定判断: 耗时 {elapsed:.2f}s")
+            if scene is None or game_manager._is_login_ui(scene) or elapsed >= 5:
+                logger.error("❌ 画面稳定后应判定为已在游戏中")
+                return False
+
+        logger.info("✅ 游戏内状态检测测试通过")
+        return True
+
+    except Exception as e:
+        logger = get_logger()
+        logger.critical(f"游戏内状态检测测试失败: {e}")
+        print(f"游戏内状态检测测试失败: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    test_in_game_detection()
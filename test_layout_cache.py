@@ -0,0 +1,95 @@
+"""
+界面布局缓存测试脚本 - 新进程优先在上次运行记录的位置附近搜索
+"""
+import sys
+import os
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from testing_utils import create_game_manager
+from detection_cache import LayoutCache
+from logger import get_logger
+import cv2
+
+
+def make_game_manager(cache_path):
+    """使用临时布局缓存文件、每次检测都真正执行匹配的游戏管理器"""
+    game_manager = create_game_manager()
+    game_manager.detection_config['roi'] = True
+    game_manager.detection_config['layout_cache'] = True
+    game_manager.detection_config['scene_cache'] = False
+    game_manager.detection_config['change_gate'] = False
+    game_manager.layout_cache = LayoutCache(cache_path)
+    return game_manager
+
+
+def test_layout_cache():
+    """记录位置、下次启动命中缓存位置、模板变化后缓存失效"""
+    try:
+        logger = get_logger()
+        logger.info("=== 界面布局缓存测试 ===")
+
+        target_path = os.path.join(os.path.dirname(__file__), 'test_data', 'need_login.png')
+        target_image = cv2.imread(target_path, cv2.IMREAD_COLOR)
+        if target_image is None:
+            logger.error("无法加载目标图片")
+            return False
+
+        names = ['enter_game', 'input_username', 'input_password']
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache_path = os.path.join(temp_dir, 'layout_cache.yaml')
+
+            # 第一次运行：全图搜索并记录位置
+            first_run = make_game_manager(cache_path)
+            start = time.perf_counter()
+            first = first_run.detect_scene(names, screenshot=target_image)
+            full_time = time.perf_counter() - start
+            if not all(first.found(name) for name in names) or not os.path.exists(cache_path):
+                logger.error("❌ 第一次检测未记录界面布局")
+                return False
+
+            # 模拟新进程：从文件加载缓存，直接在记录的位置附近搜索
+            second_run = make_game_manager(cache_path)
+            start = time.perf_counter()
+            second = second_run.detect_scene(names, screenshot=target_image)
+            cached_time = time.perf_counter() - start
+            stats = second_run.get_roi_stats()
+            logger.info(f"全图搜索={full_time * 1000:.1f}ms, 使用布局缓存={cached_time * 1000:.1f}ms, ROI统计: {stats}")
+            for name in names:
+                if second.get(name).top_left != first.get(name).top_left:
+                    logger.error(f"❌ {name} 使用布局缓存的匹配位置不一致")
+                    return False
+                if stats.get(name, {}).get('hits', 0) != 1:
+                    logger.error(f"❌ {name} 新进程未使用缓存的位置")
+                    return False
+
+            # 模板图片变化：旧位置失效，重新全图搜索
+            changed_path = os.path.join(temp_dir, 'enter_game.png')
+            template = cv2.imread(second_run.template_registry.get_path('enter_game'), cv2.IMREAD_UNCHANGED)
+            template[0, 0] = 255 - template[0, 0]
+            cv2.imwrite(changed_path, template)
+            third_run = make_game_manager(cache_path)
+            third_run.template_registry.load('enter_game', changed_path)
+            third = third_run.detect_scene(['enter_game'], screenshot=target_image)
+            stats = third_run.get_roi_stats()
+            if not third.found('enter_game') or 'enter_game' in stats:
+                logger.error(f"❌ 模板变化后不应使用旧位置: {stats}")
+                return False
+            entry = LayoutCache(cache_path).data['1920x1080']['enter_game']
+            if entry['hash'] != third_run.template_registry.get_hash('enter_game'):
+                logger.error("❌ 模板变化后未更新布局缓存")
+                return False
+
+        logger.info("✅ 界面布局缓存测试通过")
+        return True
+
+    except Exception as e:
+        logger = get_logger()
+        logger.critical(f"界面布局缓存测试失败: {e}")
+        print(f"界面布局缓存测试失败: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    test_layout_cache()
@@ -0,0 +1,71 @@
+"""
+登录进度测试脚本 - 在后台线程中登录时逐步通知进度，并能从界面线程立即取消
+"""
+import sys
+import os
+import tempfile
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from testing_utils import create_game_manager
+from screen_capture import FileCapture
+from logger import get_logger
+import cv2
+import numpy as np
+
+
+def test_login_progress():
+    """后台线程登录：收到各步骤的进度，取消后线程立即结束"""
+    try:
+        logger = get_logger()
+        logger.info("=== 登录进度测试 ===")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # 一直是黑屏：登录会一直等待登录界面，直到被取消
+            black_path = os.path.join(temp_dir, 'black.png')
+            cv2.imwrite(black_path, np.zeros((1080, 1920, 3), dtype=np.uint8))
+
+            game_manager = create_game_manager()
+            game_manager.timeline.log_dir = temp_dir
+            game_manager.detection_config['background_capture'] = False
+            game_manager.capture_backend = FileCapture([black_path])
+            game_manager.is_game_running = lambda: True
+            game_manager.switch_to_game_window = lambda: True
+
+            messages = []
+            results = []
+            game_manager.progress_callback = messages.append
+            worker = threading.Thread(target=lambda: results.append(game_manager.handle_login('user', 'pass')))
+            worker.start()
+
+            # 界面线程在等待期间保持响应，可以随时取消
+            time.sleep(1.0)
+            if not worker.is_alive():
+                logger.error("❌ 登录线程提前结束")
+                return False
+            start = time.monotonic()
+            game_manager.cancel_login()
+            worker.join(5)
+            elapsed = time.monotonic() - start
+
+        logger.info(f"进度: {messages}, 结果: {results}, 取消耗时 {elapsed:.2f}s")
+        if messages != ["正在切换到游戏窗口...", "正在检测登录界面..."]:
+            logger.error("❌ 未按步骤通知进度")
+            return False
+        if worker.is_alive() or results != [False] or elapsed >= 2.0:
+            logger.error("❌ 取消后登录线程未立即结束")
+            return False
+
+        logger.info("✅ 登录进度测试通过")
+        return True
+
+    except Exception as e:
+        logger = get_logger()
+        logger.critical(f"登录进度测试失败: {e}")
+        print(f"登录进度测试失败: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    test_login_progress()
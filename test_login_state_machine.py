@@ -0,0 +1,116 @@
+"""
+登录状态机测试脚本 - 按画面上实际出现的界面执行对应步骤
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from testing_utils import create_game_manager
+from login_state_machine import LoginStateMachine
+from scene_detection import SceneResult, TemplateMatch
+from wait_utils import PollPolicy
+from logger import get_logger
+
+
+def make_scene(*found_names):
+    """构造只包含指定已找到模板的检测结果"""
+    scene = SceneResult()
+    for name in ['agree', 'circle', 'enter_game', 'input_username', 'input_password']:
+        if name in found_names:
+            scene.add(TemplateMatch(name, 1.0, (100, 100), (200, 150)))
+        else:
+            scene.add(TemplateMatch(name, 0.2))
+    return scene
+
+
+def run_login_flow(screens, confirmed=True):
+    """依次回放画面运行登录状态机，返回 (终止状态, 执行的操作, 各状态耗时)
+
+    confirmed为False时模拟操作后的界面变化在确认超时之后才出现
+    """
+    game_manager = create_game_manager()
+    actions = []
+
+    def record(name):
+        def action(scene=None, *args, **kwargs):
+            actions.append(name)
+            return True
+        return action
+
+    # 用记录操作代替真实的鼠标键盘操作
+    game_manager._detect_and_click_agree = record('agree')
+    game_manager._fill_login_form = record('login_form')
+    game_manager._click_enter_game_button = record('enter_game')
+    # 回放的画面不会因点击而变化，只执行操作不等待确认
+    game_manager._act_and_confirm = lambda action, confirm, *args, **kwargs: action() and confirmed
+
+    observations = iter(screens)
+    last = [screens[-1]]
+
+    def observe():
+        last[0] = next(observations, last[0])
+        return last[0]
+
+    machine = LoginStateMachine(game_manager._build_login_states('user', 'pass'), observe,
+                                PollPolicy(initial=0.01, max_interval=0.01))
+    for state in machine.states:
+        state.settle = 0
+    final_state = machine.run(timeout=5)
+    machine.log_summary()
+    return final_state, actions, machine.get_state_times()
+
+
+def test_login_state_machine():
+    """完整登录和已登录两种画面序列"""
+    try:
+        logger = get_logger()
+        logger.info("=== 登录状态机测试 ===")
+
+        # 需要登录：同意协议 -> 填写表单 -> 进入游戏 -> 画面离开登录界面
+        final_state, actions, state_times = run_login_flow([
+            make_scene('agree'),
+            make_scene('input_username', 'input_password', 'circle', 'enter_game'),
+            make_scene('enter_game'),
+            make_scene(),
+        ])
+        logger.info(f"完整登录: 终止状态={final_state}, 操作={actions}")
+        if final_state != 'in_game' or actions != ['agree', 'login_form', 'enter_game']:
+            logger.error("❌ 完整登录流程的步骤不正确")
+            return False
+        if 'in_game' not in state_times or 'agree' not in state_times:
+            logger.error(f"❌ 未记录各状态耗时: {state_times}")
+            return False
+
+        # 已登录：直接点击进入游戏
+        final_state, actions, _ = run_login_flow([make_scene('enter_game'), make_scene()])
+        logger.info(f"已登录: 终止状态={final_state}, 操作={actions}")
+        if final_state != 'in_game' or actions != ['enter_game']:
+            logger.error("❌ 已登录的客户端应直接点击进入游戏")
+            return False
+
+        # 按钮在确认超时之后才消失：点击已成功，离开登录界面后仍判定为进入游戏
+        final_state, actions, _ = run_login_flow([make_scene('enter_game'), make_scene()], confirmed=False)
+        logger.info(f"按钮延迟消失: 终止状态={final_state}, 操作={actions}")
+        if final_state != 'in_game' or actions != ['enter_game']:
+            logger.error("❌ 按钮在确认超时之后消失时应判定为已进入游戏")
+            return False
+
+        # 表单一直无法填写时停止流程
+        final_state, actions, _ = run_login_flow([make_scene('input_username', 'input_password')])
+        logger.info(f"表单卡住: 终止状态={final_state}, 操作={actions}")
+        if final_state is not None or actions != ['login_form', 'login_form']:
+            logger.error("❌ 表单卡住时应在重试次数用完后停止")
+            return False
+
+        logger.info("✅ 登录状态机测试通过")
+        return True
+
+    except Exception as e:
+        logger = get_logger()
+        logger.critical(f"登录状态机测试失败: {e}")
+        print(f"登录状态机测试失败: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    test_login_state_machine()
@@ -0,0 +1,87 @@
+"""
+透明掩码匹配测试脚本 - 透明区域与背景不同时也应能匹配成功
+"""
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from testing_utils import create_game_manager
+from template_registry import TemplateRegistry
+from logger import get_logger
+import cv2
+import numpy as np
+
+
+def create_transparent_template(target_image, path):
+    """从目标图片截取圆圈区域，四周加一圈透明且内容随机的边框"""
+    crop = target_image[604:655, 666:726]
+    border = 12
+    h, w = crop.shape[:2]
+    rng = np.random.default_rng(0)
+    template = rng.integers(0, 256, (h + border * 2, w + border * 2, 4), dtype=np.uint8)
+    template[:, :, 3] = 0
+    template[border:border + h, border:border + w, :3] = crop
+    template[border:border + h, border:border + w, 3] = 255
+    cv2.imwrite(path, template)
+    return (666 - border, 604 - border)
+
+
+def test_masked_matching():
+    """带透明通道的模板使用掩码匹配后相似度应接近1"""
+    try:
+        logger = get_logger()
+        logger.info("=== 透明掩码匹配测试 ===")
+
+        target_path = os.path.join(os.path.dirname(__file__), 'test_data', 'need_login.png')
+        target_image = cv2.imread(target_path, cv2.IMREAD_COLOR)
+        if target_image is None:
+            logger.error("无法加载目标图片")
+            return False
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            expected_loc = create_transparent_template(target_image, os.path.join(temp_dir, 'circle_alpha.png'))
+
+            registry = TemplateRegistry(temp_dir)
+            registry.load_all()
+            if registry.get_mask('circle_alpha') is None:
+                logger.error("❌ 未生成透明度掩码")
+                return False
+
+            game_manager = create_game_manager()
+            game_manager.template_registry = registry
+            game_manager.detection_config['roi'] = False
+
+            game_manager.detection_config['masked'] = False
+            unmasked = game_manager.detect_scene(['circle_alpha'], screenshot=target_image)
+            game_manager.detection_config['masked'] = True
+            masked = game_manager.detect_scene(['circle_alpha'], screenshot=target_image)
+
+            logger.info(f"不使用掩码: {unmasked.summary()}")
+            logger.info(f"使用掩码: {masked.summary()}, 位置={masked.get('circle_alpha').top_left}")
+
+            if not masked.found('circle_alpha') or masked.get('circle_alpha').top_left != expected_loc:
+                logger.error("❌ 掩码匹配未找到正确位置")
+                return False
+            if masked.similarity('circle_alpha') <= unmasked.similarity('circle_alpha'):
+                logger.error("❌ 掩码匹配没有提高相似度")
+                return False
+
+        # 资源目录中完全不透明的模板不需要掩码，匹配路径不变
+        assets_registry = TemplateRegistry()
+        assets_registry.load_all()
+        opaque = [name for name in assets_registry.names() if assets_registry.get_mask(name) is None]
+        logger.info(f"完全不透明的模板（不使用掩码）: {opaque}")
+
+        logger.info("✅ 透明掩码匹配测试通过")
+        return True
+
+    except Exception as e:
+        logger = get_logger()
+        logger.critical(f"透明掩码匹配测试失败: {e}")
+        print(f"透明掩码匹配测试失败: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    test_masked_matching()
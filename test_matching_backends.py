@@ -0,0 +1,67 @@
+"""
+匹配后端测试脚本 - 对比OpenCV与FFT后端的结果和耗时，并生成后端选择表
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from logger import get_logger
+from template_registry import TemplateRegistry
+from matching_backends import OpenCVBackend, FFTBackend, AutoBackend, calibrate_backend_table
+import cv2
+
+
+def test_matching_backends():
+    """FFT后端与OpenCV后端的匹配位置应一致"""
+    try:
+        logger = get_logger()
+        logger.info("=== 匹配后端对比测试 ===")
+
+        target_path = os.path.join(os.path.dirname(__file__), 'test_data', 'need_login.png')
+        target_image = cv2.imread(target_path, cv2.IMREAD_COLOR)
+        if target_image is None:
+            logger.error("无法加载目标图片")
+            return False
+
+        registry = TemplateRegistry()
+        registry.load_all()
+
+        opencv_backend = OpenCVBackend()
+        fft_backend = FFTBackend()
+        all_match = True
+        for name in registry.names():
+            template = registry.get(name)
+            opencv_val, opencv_loc = opencv_backend.match(target_image, template)
+            fft_val, fft_loc = fft_backend.match(target_image, template)
+            same = opencv_loc == fft_loc and abs(opencv_val - fft_val) < 1e-3
+            all_match = all_match and same
+            logger.info(f"{'✅' if same else '❌'} {name}: opencv={opencv_val:.4f}@{opencv_loc}, "
+                        f"fft={fft_val:.4f}@{fft_loc}")
+
+        # 按模板尺寸测量两个后端的耗时
+        templates = [registry.get(name) for name in registry.names()]
+        table, measurements = calibrate_backend_table(target_image, templates, rounds=2)
+        for area, timings in measurements:
+            logger.info(f"模板面积={area}: " + ", ".join(
+                f"{backend}={elapsed * 1000:.1f}ms" for backend, elapsed in timings.items()))
+        logger.info(f"校准后的后端选择表: {table}")
+
+        auto_backend = AutoBackend(table)
+        for name in registry.names():
+            logger.info(f"{name}: 自动选择后端 {auto_backend.select(registry.get(name)).name}")
+
+        if all_match:
+            logger.info("✅ FFT后端与OpenCV后端结果一致")
+        else:
+            logger.error("❌ FFT后端与OpenCV后端结果不一致")
+        return all_match
+
+    except Exception as e:
+        logger = get_logger()
+        logger.critical(f"匹配后端测试失败: {e}")
+        print(f"匹配后端测试失败: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    test_matching_backends()
@@ -0,0 +1,134 @@
+"""
+多尺度匹配测试脚本 - 模拟不同分辨率下的登录界面
+"""
+import sys
+import os
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import game_manager as game_manager_module
+from testing_utils import create_game_manager
+from detection_cache import ScaleCache
+from logger import get_logger
+import cv2
+import numpy as np
+
+
+def test_multi_scale_matching():
+    """在缩放后的截图上应能找到登录界面元素，并复用缓存的缩放比例"""
+    try:
+        logger = get_logger()
+        logger.info("=== 多尺度匹配测试 ===")
+
+        game_manager = create_game_manager()
+        game_manager.detection_config['multi_scale'] = True
+        game_manager.detection_config['scene_cache'] = False
+        game_manager.detection_config['change_gate'] = False
+
+        target_path = os.path.join(os.path.dirname(__file__), 'test_data', 'need_login.png')
+        target_image = cv2.imread(target_path, cv2.IMREAD_COLOR)
+        if target_image is None:
+            logger.error("无法加载目标图片")
+            return False
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache_path = os.path.join(temp_dir, 'scale_cache.yaml')
+            game_manager.scale_cache = ScaleCache(cache_path)
+
+            for width, height in [(2560, 1440), (1280, 720)]:
+                screenshot = cv2.resize(target_image, (width, height))
+                expected_scale = round(height / 1080, 2)
+
+                start = time.perf_counter()
+                scene = game_manager.detect_scene(['enter_game', 'input_username'], screenshot=screenshot)
+                first_time = time.perf_counter() - start
+
+                start = time.perf_counter()
+                scene = game_manager.detect_scene(['enter_game', 'input_username'], screenshot=screenshot)
+                second_time = time.perf_counter() - start
+
+                scale = game_manager.scale_cache.get(f"{width}x{height}")
+                logger.info(f"{width}x{height}: 缩放比例={scale}, 首次={first_time:.2f}s, 复用缓存={second_time:.2f}s, "
+                            f"结果: {scene.summary()}")
+
+                if scale is None or abs(scale - expected_scale) > 0.02:
+                    logger.error(f"❌ 缩放比例不正确，期望约为 {expected_scale}")
+                    return False
+                if not scene.found('enter_game') or not scene.found('input_username'):
+                    logger.error("❌ 缩放后未找到登录界面元素")
+                    return False
+
+            # 重新加载缓存文件，比例应已持久化
+            reloaded = ScaleCache(cache_path)
+            if reloaded.get('2560x1440') is None:
+                logger.error("❌ 缩放比例未保存到缓存文件")
+                return False
+
+        logger.info("✅ 多尺度匹配测试通过")
+        return True
+
+    except Exception as e:
+        logger = get_logger()
+        logger.critical(f"多尺度匹配测试失败: {e}")
+        print(f"多尺度匹配测试失败: {e}")
+        return False
+
+
+
+def test_scale_search_backoff():
+    """纯色画面不搜索缩放比例，搜索失败后一段时间内不再重复搜索"""
+    try:
+        logger = get_logger()
+        logger.info("=== 缩放比例搜索退避测试 ===")
+
+        game_manager = create_game_manager()
+        game_manager.detection_config['multi_scale'] = True
+        game_manager.detection_config['scene_cache'] = False
+
+        searches = []
+        search_template_scale = game_manager_module.search_template_scale
+
+        def counting_search(*args, **kwargs):
+            searches.append(1)
+            return search_template_scale(*args, **kwargs)
+
+        game_manager_module.search_template_scale = counting_search
+        try:
+            # 纯色加载画面
+            start = time.perf_counter()
+            for _ in range(3):
+                game_manager.detect_scene(['enter_game'], screenshot=np.zeros((1440, 2560, 3), dtype=np.uint8))
+            blank_time = time.perf_counter() - start
+            if searches:
+                logger.error(f"❌ 纯色画面上不应搜索缩放比例: {len(searches)} 次")
+                return False
+
+            # 没有登录界面的画面：第一次搜索失败后不再每次都搜索
+            rng = np.random.default_rng(3)
+            frame = cv2.GaussianBlur(rng.integers(0, 255, (1440, 2560, 3), dtype=np.uint8), (9, 9), 0)
+            for _ in range(3):
+                game_manager.detect_scene(['enter_game'], screenshot=frame)
+            logger.info(f"纯色画面3次检测={blank_time:.2f}s, 无登录界面画面搜索次数={len(searches)}")
+            if len(searches) != 1:
+                logger.error("❌ 搜索失败后应等待一段时间再重试")
+                return False
+            if game_manager.scale_cache.get('2560x1440') is not None:
+                logger.error("❌ 搜索失败时不应记录缩放比例")
+                return False
+        finally:
+            game_manager_module.search_template_scale = search_template_scale
+
+        logger.info("✅ 缩放比例搜索退避测试通过")
+        return True
+
+    except Exception as e:
+        logger = get_logger()
+        logger.critical(f"缩放比例搜索退避测试失败: {e}")
+        print(f"缩放比例搜索退避测试失败: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    test_multi_scale_matching()
+    test_scale_search_backoff()
@@ -0,0 +1,74 @@
+"""
+并行匹配测试脚本 - 对比串行与线程池并行匹配所有模板的耗时
+"""
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from testing_utils import create_game_manager
+from logger import get_logger
+import cv2
+
+
+def run_scene(game_manager, target_image, rounds=3):
+    """多次运行场景检测，返回最后一次结果和最短耗时"""
+    best = None
+    scene = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        scene = game_manager.detect_scene(screenshot=target_image)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return scene, best
+
+
+def test_parallel_matching():
+    """并行匹配结果应与串行一致，并报告墙钟耗时"""
+    try:
+        logger = get_logger()
+        logger.info("=== 并行匹配测试 ===")
+        logger.info(f"CPU核心数: {os.cpu_count()}")
+
+        game_manager = create_game_manager()
+        # 关闭ROI、检测结果缓存和帧差分门控，保证每次都是全图匹配
+        game_manager.detection_config['roi'] = False
+        game_manager.detection_config['scene_cache'] = False
+        game_manager.detection_config['change_gate'] = False
+
+        target_path = os.path.join(os.path.dirname(__file__), 'test_data', 'need_login.png')
+        target_image = cv2.imread(target_path, cv2.IMREAD_COLOR)
+        if target_image is None:
+            logger.error("无法加载目标图片")
+            return False
+
+        game_manager.detection_config['parallel'] = False
+        serial_scene, serial_time = run_scene(game_manager, target_image)
+
+        game_manager.detection_config['parallel'] = True
+        parallel_scene, parallel_time = run_scene(game_manager, target_image)
+
+        logger.info(f"模板数量: {len(serial_scene.matches)}")
+        logger.info(f"串行耗时: {serial_time * 1000:.1f}ms")
+        logger.info(f"并行耗时: {parallel_time * 1000:.1f}ms "
+                    f"(线程数={game_manager._get_match_executor()._max_workers}, "
+                    f"加速={serial_time / parallel_time:.2f}x)")
+
+        for name, match in serial_scene.matches.items():
+            other = parallel_scene.get(name)
+            if other is None or other.top_left != match.top_left:
+                logger.error(f"❌ {name} 并行匹配结果与串行不一致")
+                return False
+
+        logger.info("✅ 并行匹配结果与串行一致")
+        return True
+
+    except Exception as e:
+        logger = get_logger()
+        logger.critical(f"并行匹配测试失败: {e}")
+        print(f"并行匹配测试失败: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    test_parallel_matching()
@@ -0,0 +1,79 @@
+"""
+金字塔匹配测试脚本 - 对比穷举匹配的结果和耗时
+"""
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from logger import get_logger
+from template_registry import TemplateRegistry
+from template_matcher import match_template, pyramid_match, get_pyramid_levels
+import cv2
+
+
+def benchmark(func, image, template, rounds=5):
+    """多次运行取最短耗时"""
+    best = None
+    result = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = func(image, template)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def test_pyramid_matching():
+    """在自带的测试图片上，金字塔匹配与穷举匹配的结果应一致，并且更快"""
+    try:
+        logger = get_logger()
+        logger.info("=== 金字塔匹配测试 ===")
+
+        target_path = os.path.join(os.path.dirname(__file__), 'test_data', 'need_login.png')
+        target_image = cv2.imread(target_path, cv2.IMREAD_COLOR)
+        if target_image is None:
+            logger.error("无法加载目标图片")
+            return False
+
+        registry = TemplateRegistry()
+        registry.load_all()
+
+        all_match = True
+        total_full = 0.0
+        total_pyramid = 0.0
+        for name in registry.names():
+            template = registry.get(name)
+            (full_val, full_loc), full_time = benchmark(match_template, target_image, template)
+            (pyr_val, pyr_loc), pyr_time = benchmark(pyramid_match, target_image, template)
+            total_full += full_time
+            total_pyramid += pyr_time
+
+            same = full_loc == pyr_loc and abs(full_val - pyr_val) < 1e-3
+            all_match = all_match and same
+            status = "✅" if same else "❌"
+            logger.info(
+                f"{status} {name}: 层数={get_pyramid_levels(template)}, "
+                f"穷举={full_val:.4f}@{full_loc} {full_time * 1000:.1f}ms, "
+                f"金字塔={pyr_val:.4f}@{pyr_loc} {pyr_time * 1000:.1f}ms, "
+                f"加速={full_time / pyr_time:.1f}x"
+            )
+
+        logger.info(f"总耗时: 穷举={total_full * 1000:.1f}ms, 金字塔={total_pyramid * 1000:.1f}ms, "
+                    f"加速={total_full / total_pyramid:.1f}x")
+
+        if all_match:
+            logger.info("✅ 金字塔匹配结果与穷举匹配一致")
+        else:
+            logger.error("❌ 金字塔匹配结果与穷举匹配不一致")
+        return all_match
+
+    except Exception as e:
+        logger = get_logger()
+        logger.critical(f"金字塔匹配测试失败: {e}")
+        print(f"金字塔匹配测试失败: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    test_pyramid_matching()
@@ -0,0 +1,152 @@
+"""
+测试单次截屏的多模板场景检测
+"""
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from testing_utils import create_game_manager
+from logger import get_logger
+import cv2
+
+
+def test_detect_scene():
+    """测试detect_scene在一帧图片上匹配所有模板"""
+    try:
+        logger = get_logger()
+        logger.info("=== 测试场景检测 ===")
+
+        game_manager = create_game_manager()
+
+        # 加载目标图片
+        target_path = os.path.join(os.path.dirname(__file__), 'test_data', 'need_login.png')
+        target_image = cv2.imread(target_path, cv2.IMREAD_COLOR)
+        if target_image is None:
+            logger.error("无法加载目标图片")
+            return False
+
+        # 传入已有截图，不再截屏
+        scene = game_manager.detect_scene(screenshot=target_image)
+        if scene is None:
+            logger.error("❌ 场景检测失败")
+            return False
+
+        for name, match in scene.matches.items():
+            logger.info(f"{name}: 相似度={match.similarity:.3f}, 找到={match.found}, 中心={match.center}")
+
+        # need_login.png 是登录界面，应检测到进入游戏按钮和账号密码输入框
+        for name in ['enter_game', 'input_username', 'input_password']:
+            if not scene.found(name):
+                logger.error(f"❌ 未检测到 {name}")
+                return False
+
+        # 只检测指定模板
+        partial = game_manager.detect_scene(['enter_game'], screenshot=target_image)
+        if list(partial.matches.keys()) != ['enter_game']:
+            logger.error("❌ 指定模板检测结果不正确")
+            return False
+
+        logger.info("✅ 场景检测测试通过")
+        return True
+
+    except Exception as e:
+        logger = get_logger()
+        logger.critical(f"场景检测测试失败: {e}")
+        print(f"场景检测测试失败: {e}")
+        return False
+
+
+def test_roi_fast_path():
+    """测试第二次检测优先在上次命中的ROI内搜索"""
+    try:
+        logger = get_logger()
+        logger.info("=== 测试ROI快速路径 ===")
+
+        game_manager = create_game_manager()
+        game_manager.detection_config['roi'] = True
+        # 关闭检测结果缓存和帧差分门控，确保第二次检测真正执行匹配
+        game_manager.detection_config['scene_cache'] = False
+        game_manager.detection_config['change_gate'] = False
+
+        target_path = os.path.join(os.path.dirname(__file__), 'test_data', 'need_login.png')
+        target_image = cv2.imread(target_path, cv2.IMREAD_COLOR)
+
+        names = ['enter_game', 'input_username', 'input_password']
+        first = game_manager.detect_scene(names, screenshot=target_image)
+        second = game_manager.detect_scene(names, screenshot=target_image)
+
+        for name in names:
+            if first.get(name).top_left != second.get(name).top_left:
+                logger.error(f"❌ {name} ROI匹配位置与全图匹配不一致")
+                return False
+
+        stats = game_manager.get_roi_stats()
+        logger.info(f"ROI命中统计: {stats}")
+        if any(stats.get(name, {}).get('hits', 0) != 1 for name in names):
+            logger.error("❌ 第二次检测未命中ROI")
+            return False
+
+        logger.info("✅ ROI快速路径测试通过")
+        return True
+
+    except Exception as e:
+        logger = get_logger()
+        logger.critical(f"ROI快速路径测试失败: {e}")
+        print(f"ROI快速路径测试失败: {e}")
+        return False
+
+
+def test_scene_cache():
+    """测试画面未变化时直接返回缓存的检测结果"""
+    try:
+        logger = get_logger()
+        logger.info("=== 测试检测结果缓存 ===")
+
+        game_manager = create_game_manager()
+        game_manager.detection_config['scene_cache'] = True
+
+        target_path = os.path.join(os.path.dirname(__file__), 'test_data', 'need_login.png')
+        target_image = cv2.imread(target_path, cv2.IMREAD_COLOR)
+
+        start = time.perf_counter()
+        first = game_manager.detect_scene(screenshot=target_image)
+        first_time = time.perf_counter() - start
+
+        # 内容相同的另一帧
+        start = time.perf_counter()
+        second = game_manager.detect_scene(screenshot=target_image.copy())
+        second_time = time.perf_counter() - start
+
+        # 画面变化后应重新匹配
+        changed_image = target_image.copy()
+        cv2.rectangle(changed_image, (659, 654), (1260, 767), (0, 0, 0), -1)
+        third = game_manager.detect_scene(screenshot=changed_image)
+
+        stats = game_manager.get_scene_cache_stats()
+        logger.info(f"首次检测={first_time * 1000:.1f}ms, 缓存命中={second_time * 1000:.1f}ms, 缓存统计: {stats}")
+
+        if first.summary() != second.summary():
+            logger.error("❌ 缓存结果与首次检测不一致")
+            return False
+        if stats['hits'] != 1 or stats['misses'] != 2:
+            logger.error("❌ 缓存命中次数不正确")
+            return False
+        if third.found('enter_game'):
+            logger.error("❌ 画面变化后仍返回了旧结果")
+            return False
+
+        logger.info("✅ 检测结果缓存测试通过")
+        return True
+
+    except Exception as e:
+        logger = get_logger()
+        logger.critical(f"检测结果缓存测试失败: {e}")
+        print(f"检测结果缓存测试失败: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    test_detect_scene()
+    test_roi_fast_path()
+    test_scene_cache()
@@ -6,7 +6,7 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from logger import get_logger
-from game_manager import GameManager
+from testing_utils import create_game_manager
 import cv2
 import numpy as np
 
@@ -18,7 +18,7 @@ def multi_template_matching_test():
         logger.info("=== 多模板匹配测试 ===")
         
         # 创建游戏管理器实例
-        game_manager = GameManager()
+        game_manager = create_game_manager()
         
         # 定义要测试的模板
         templates = [
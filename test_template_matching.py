@@ -5,7 +5,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from game_manager import GameManager
+from testing_utils import create_game_manager
 from logger import get_logger
 import cv2
 
@@ -17,7 +17,7 @@ def test_find_template_in_image():
         logger.info("=== 测试find_template_in_image方法 ===")
         
         # 创建游戏管理器实例
-        game_manager = GameManager()
+        game_manager = create_game_manager()
         
         # 测试1: 使用enter_game.png模板在need_login.png中匹配
         logger.info("测试1: 使用enter_game.png模板在need_login.png中匹配")
@@ -0,0 +1,59 @@
+"""
+测试模板注册表：启动时一次性加载，之后按名称返回只读模板
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from template_registry import TemplateRegistry
+from logger import get_logger
+
+
+def test_template_registry():
+    """测试模板注册表加载和只读访问"""
+    try:
+        logger = get_logger()
+        logger.info("=== 测试模板注册表 ===")
+
+        registry = TemplateRegistry()
+        count = registry.load_all()
+        logger.info(f"已加载模板数量: {count}")
+
+        # 每个模板的加载耗时
+        for name, elapsed in registry.get_load_times().items():
+            template = registry.get(name)
+            h, w = template.shape[:2]
+            logger.info(f"{name}: 尺寸={w}x{h}, 加载耗时={elapsed * 1000:.2f}ms")
+
+        # 检查登录流程需要的模板是否都已加载
+        required = ['enter_game', 'circle', 'agree', 'input_username', 'input_password']
+        missing = [name for name in required if not registry.has(name)]
+        if missing:
+            logger.error(f"❌ 缺少模板: {missing}")
+            return False
+
+        # 同一名称多次获取应返回同一个数组，不会重新解码
+        if registry.get('enter_game') is not registry.get('enter_game'):
+            logger.error("❌ 模板被重复加载")
+            return False
+
+        # 模板应为只读
+        try:
+            registry.get('circle')[0, 0, 0] = 0
+            logger.error("❌ 模板可以被修改")
+            return False
+        except ValueError:
+            logger.info("✅ 模板为只读")
+
+        logger.info("✅ 模板注册表测试通过")
+        return True
+
+    except Exception as e:
+        logger = get_logger()
+        logger.critical(f"模板注册表测试失败: {e}")
+        print(f"模板注册表测试失败: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    test_template_registry()
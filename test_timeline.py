@@ -0,0 +1,73 @@
+"""
+登录时间线测试脚本 - 记录截图、匹配、检测各步骤的耗时并保存为JSON
+"""
+import sys
+import os
+import json
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from testing_utils import create_game_manager
+from screen_capture import FileCapture
+from logger import get_logger
+
+
+def test_timeline():
+    """用测试图片运行一次场景检测，检查时间线内容和汇总"""
+    try:
+        logger = get_logger()
+        logger.info("=== 登录时间线测试 ===")
+
+        game_manager = create_game_manager()
+        game_manager.detection_config['scene_cache'] = False
+        game_manager.capture_backend = FileCapture(['test_data/need_login.png'])
+        game_manager.timeline.reset()
+
+        scene = game_manager.detect_scene(['enter_game', 'input_username'])
+        if scene is None or not scene.found('enter_game'):
+            logger.error("❌ 未检测到进入游戏按钮")
+            return False
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = game_manager.timeline.save(temp_dir)
+            if path is None:
+                logger.error("❌ 时间线保存失败")
+                return False
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+
+        steps = {entry['step'] for entry in data['steps']}
+        logger.info(f"时间线步骤: {sorted(steps)}")
+        for step in ('capture', 'match', 'detect_scene'):
+            if step not in steps:
+                logger.error(f"❌ 时间线缺少步骤: {step}")
+                return False
+
+        matches = {entry['template']: entry for entry in data['steps'] if entry['step'] == 'match'}
+        if matches.get('enter_game', {}).get('outcome') != 'found' or 'similarity' not in matches['enter_game']:
+            logger.error(f"❌ 匹配步骤缺少结果或相似度: {matches}")
+            return False
+
+        detect = next(entry for entry in data['steps'] if entry['step'] == 'detect_scene')
+        if 'enter_game' not in detect.get('found', []):
+            logger.error(f"❌ 检测步骤未记录找到的模板: {detect}")
+            return False
+
+        summary = game_manager.timeline.format_summary()
+        print(summary)
+        if 'detect_scene' not in summary:
+            logger.error("❌ 汇总中缺少检测步骤")
+            return False
+
+        logger.info("✅ 登录时间线测试通过")
+        return True
+
+    except Exception as e:
+        logger = get_logger()
+        logger.critical(f"登录时间线测试失败: {e}")
+        print(f"登录时间线测试失败: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    test_timeline()
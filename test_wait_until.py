@@ -0,0 +1,70 @@
+"""
+轮询等待测试脚本 - 条件满足时立即返回，超过截止时间时返回None
+"""
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from testing_utils import create_game_manager
+from screen_capture import FileCapture
+from wait_utils import PollPolicy, wait_until
+from logger import get_logger
+
+
+def test_wait_until():
+    """测试退避轮询、提前返回和超时"""
+    try:
+        logger = get_logger()
+        logger.info("=== 轮询等待测试 ===")
+
+        policy = PollPolicy(initial=0.01, max_interval=0.04, backoff=2.0)
+        intervals = policy.intervals()
+        sequence = [next(intervals) for _ in range(5)]
+        if sequence != [0.01, 0.02, 0.04, 0.04, 0.04]:
+            logger.error(f"❌ 退避间隔不正确: {sequence}")
+            return False
+
+        # 第3次检查时条件满足，应立即返回检查结果
+        calls = []
+
+        def ready_on_third_call():
+            calls.append(time.monotonic())
+            return "ready" if len(calls) >= 3 else None
+
+        result = wait_until(ready_on_third_call, timeout=5, poll_policy=policy, description="测试条件")
+        if result != "ready" or len(calls) != 3:
+            logger.error(f"❌ 条件满足后未立即返回: result={result}, 检查次数={len(calls)}")
+            return False
+
+        # 条件一直不满足时在截止时间附近返回None
+        start = time.monotonic()
+        result = wait_until(lambda: None, timeout=0.2, poll_policy=policy, description="不会满足的条件")
+        elapsed = time.monotonic() - start
+        if result is not None or not 0.2 <= elapsed < 0.5:
+            logger.error(f"❌ 超时处理不正确: result={result}, 耗时={elapsed:.2f}s")
+            return False
+
+        # 登录界面已在屏幕上时第一次检测就返回
+        game_manager = create_game_manager()
+        game_manager.capture_backend = FileCapture(['test_data/need_login.png'])
+        start = time.monotonic()
+        scene = game_manager._wait_for_login_ui(timeout=30)
+        elapsed = time.monotonic() - start
+        logger.info(f"登录界面就绪耗时: {elapsed:.2f}s（原先固定等待 30-60 秒）")
+        if scene is None or not scene.found('enter_game'):
+            logger.error("❌ 未检测到登录界面")
+            return False
+
+        logger.info("✅ 轮询等待测试通过")
+        return True
+
+    except Exception as e:
+        logger = get_logger()
+        logger.critical(f"轮询等待测试失败: {e}")
+        print(f"轮询等待测试失败: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    test_wait_until()
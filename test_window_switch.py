@@ -5,7 +5,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from game_manager import GameManager
+from testing_utils import create_game_manager
 from logger import get_logger
 from admin_utils import check_and_request_admin
 
@@ -23,7 +23,7 @@ def test_window_switch():
         
         logger.info("✅ 已获取管理员权限")
         
-        game_manager = GameManager()
+        game_manager = create_game_manager()
         
         # 检查游戏是否运行
         if game_manager.is_game_running():
@@ -0,0 +1,20 @@
+"""
+测试辅助模块 - 测试中使用临时的缓存文件，不读写程序目录下的缓存
+"""
+import os
+import tempfile
+from game_manager import GameManager
+from detection_cache import ScaleCache, LayoutCache
+
+
+# 测试进程退出时自动删除
+_CACHE_ROOT = tempfile.TemporaryDirectory(prefix='genshin-test-cache-')
+
+
+def create_game_manager():
+    """创建游戏管理器，缩放比例和界面布局缓存使用各自独立的空临时文件"""
+    game_manager = GameManager()
+    cache_dir = tempfile.mkdtemp(dir=_CACHE_ROOT.name)
+    game_manager.scale_cache = ScaleCache(os.path.join(cache_dir, 'scale_cache.yaml'))
+    game_manager.layout_cache = LayoutCache(os.path.join(cache_dir, 'layout_cache.yaml'))
+    return game_manager
@@ -0,0 +1,187 @@
+"""
+登录耗时时间线模块 - 记录每一步的开始时间、耗时和结果，并保存为JSON
+"""
+import asyncio
+import functools
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from logger import get_logger
+
+
+# logs目录下最多保留的时间线文件数
+MAX_TIMELINE_FILES = 30
+
+
+class Timeline:
+    """一次登录过程的步骤时间线"""
+
+    def __init__(self, log_dir=None):
+        self.logger = get_logger()
+        # 为None时保存到日志目录
+        self.log_dir = log_dir
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """开始新的一次记录"""
+        with self._lock:
+            self.started_at = datetime.now()
+            self.started = time.perf_counter()
+            self.steps = []
+            self.metrics = {}
+
+    def record(self, step, start, duration, outcome='ok', **details):
+        """记录一个步骤
+
+        Args:
+            step: 步骤名称
+            start: 步骤开始时的time.perf_counter()
+            duration: 耗时（秒）
+            outcome: 结果，如 ok / failed / error / found / not_found
+            details: 匹配相似度等附加信息
+        """
+        entry = {
+            'step': step,
+            'start': round(start - self.started, 4),
+            'duration': round(duration, 4),
+            'outcome': outcome,
+            'thread': threading.current_thread().name,
+        }
+        entry.update(details)
+        with self._lock:
+            self.steps.append(entry)
+
+    def add_metrics(self, **values):
+        """记录整次登录的指标，如启动到游戏就绪的耗时"""
+        with self._lock:
+            self.metrics.update(values)
+
+    def to_dict(self):
+        """转换为可序列化的字典"""
+        with self._lock:
+            steps = sorted(self.steps, key=lambda entry: entry['start'])
+            metrics = dict(self.metrics)
+        return {
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'duration': round(time.perf_counter() - self.started, 4),
+            'metrics': metrics,
+            'steps': steps,
+        }
+
+    def save(self, log_dir=None):
+        """保存为logs目录下的JSON文件，返回文件路径，失败时返回None"""
+        try:
+            log_dir = log_dir or self.log_dir or self.logger.log_dir
+            os.makedirs(log_dir, exist_ok=True)
+            filename = f"timeline_{self.started_at.strftime('%Y%m%d_%H%M%S')}.json"
+            path = os.path.join(log_dir, filename)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+            self.logger.info(f"登录时间线已保存: {path}")
+            self._cleanup(log_dir)
+            return path
+        except Exception as e:
+            self.logger.error(f"保存登录时间线失败: {e}")
+            return None
+
+    @staticmethod
+    def _cleanup(log_dir, keep=MAX_TIMELINE_FILES):
+        """只保留最新的若干个时间线文件"""
+        files = sorted(f for f in os.listdir(log_dir) if f.startswith('timeline_') and f.endswith('.json'))
+        for filename in files[:-keep]:
+            os.remove(os.path.join(log_dir, filename))
+
+    def get_summary(self):
+        """按步骤汇总: {步骤: {count, total, max, failed}}，按首次出现顺序排列"""
+        summary = {}
+        for entry in self.to_dict()['steps']:
+            item = summary.setdefault(entry['step'], {'count': 0, 'total': 0.0, 'max': 0.0, 'failed': 0})
+            item['count'] += 1
+            item['total'] += entry['duration']
+            item['max'] = max(item['max'], entry['duration'])
+            if entry['outcome'] in ('failed', 'error'):
+                item['failed'] += 1
+        return summary
+
+    def format_summary(self):
+        """生成汇总表格文本"""
+        lines = [
+            f"登录时间线汇总（总耗时 {time.perf_counter() - self.started:.2f}s）",
+            f"{'step':<28}{'count':>7}{'total(s)':>11}{'avg(ms)':>10}{'max(ms)':>10}{'failed':>8}",
+        ]
+        for step, item in self.get_summary().items():
+            average = item['total'] / item['count'] * 1000
+            lines.append(f"{step:<28}{item['count']:>7}{item['total']:>11.2f}{average:>10.1f}"
+                         f"{item['max'] * 1000:>10.1f}{item['failed']:>8}")
+        for name, value in self.metrics.items():
+            lines.append(f"{name}: {value}")
+        return "\n".join(lines)
+
+
+def timeline_step(step, describe=None):
+    """把方法调用记录到self.timeline的装饰器，同时支持普通方法和协程方法
+
+    Args:
+        step: 步骤名称
+        describe: describe(result, *args, **kwargs) 返回附加信息字典，
+            其中的outcome会覆盖按返回值真假判断的默认结果
+    """
+    def finish(timeline, start, result, args, kwargs):
+        details = {}
+        if describe is not None:
+            try:
+                details = describe(result, *args, **kwargs)
+            except Exception:
+                details = {}
+        outcome = details.pop('outcome', 'ok' if result else 'failed')
+        timeline.record(step, start, time.perf_counter() - start, outcome, **details)
+
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(self, *args, **kwargs):
+                timeline = getattr(self, 'timeline', None)
+                if timeline is None:
+                    return await func(self, *args, **kwargs)
+
+                start = time.perf_counter()
+                try:
+                    result = await func(self, *args, **kwargs)
+                except asyncio.CancelledError:
+                    timeline.record(step, start, time.perf_counter() - start, 'cancelled')
+                    raise
+                except SystemExit:
+                    timeline.record(step, start, time.perf_counter() - start, 'exit')
+                    raise
+                except Exception as e:
+                    timeline.record(step, start, time.perf_counter() - start, 'error', error=str(e))
+                    raise
+                finish(timeline, start, result, args, kwargs)
+                return result
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            timeline = getattr(self, 'timeline', None)
+            if timeline is None:
+                return func(self, *args, **kwargs)
+
+            start = time.perf_counter()
+            try:
+                result = func(self, *args, **kwargs)
+            except SystemExit:
+                timeline.record(step, start, time.perf_counter() - start, 'exit')
+                raise
+            except Exception as e:
+                timeline.record(step, start, time.perf_counter() - start, 'error', error=str(e))
+                raise
+            except BaseException:
+                timeline.record(step, start, time.perf_counter() - start, 'cancelled')
+                raise
+            finish(timeline, start, result, args, kwargs)
+            return result
+        return wrapper
+    return decorator
@@ -0,0 +1,108 @@
+"""
+轮询等待模块 - 按退避策略反复检查条件，条件满足时立即返回
+"""
+import threading
+import time
+from logger import get_logger
+
+
+class OperationCancelled(BaseException):
+    """等待被取消
+
+    与asyncio.CancelledError一样继承BaseException，流程中的 except Exception 不会吞掉取消请求。
+    """
+
+
+class CancelToken:
+    """跨线程的取消标记：等待中的流程会在下一次检查或睡眠时立即停止"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        """请求取消"""
+        self._event.set()
+
+    def reset(self):
+        """清除取消请求，开始新的流程前调用"""
+        self._event.clear()
+
+    def is_cancelled(self):
+        """是否已请求取消"""
+        return self._event.is_set()
+
+    def check(self):
+        """已请求取消时抛出OperationCancelled"""
+        if self._event.is_set():
+            raise OperationCancelled()
+
+    def sleep(self, seconds):
+        """睡眠指定时间，期间请求取消时立即抛出OperationCancelled"""
+        if self._event.wait(max(seconds, 0)):
+            raise OperationCancelled()
+
+
+class PollPolicy:
+    """轮询间隔策略：从initial开始，每次未满足条件后乘以backoff，最多max_interval秒"""
+
+    def __init__(self, initial=0.5, max_interval=5.0, backoff=1.5):
+        self.initial = initial
+        self.max_interval = max_interval
+        self.backoff = backoff
+
+    def intervals(self):
+        """依次生成每次检查之间的等待时间"""
+        interval = self.initial
+        while True:
+            yield interval
+            interval = min(interval * self.backoff, self.max_interval)
+
+
+def wait_until(predicate, timeout, poll_policy=None, description="条件", cancel_token=None):
+    """反复调用predicate直到返回真值或超过截止时间
+
+    Args:
+        predicate: 无参数的检查函数，返回真值表示条件已满足
+        timeout: 最长等待时间（秒）
+        poll_policy: 轮询间隔策略，为None时使用默认的PollPolicy
+        description: 日志中使用的条件描述
+        cancel_token: 取消标记，请求取消时抛出OperationCancelled
+
+    Returns:
+        predicate最后一次返回的真值，超时返回None；predicate的其它异常视为条件未满足，
+        但ImportError会直接抛出
+    """
+    logger = get_logger()
+    poll_policy = poll_policy or PollPolicy()
+    start = time.monotonic()
+    deadline = start + timeout
+    attempts = 0
+
+    for interval in poll_policy.intervals():
+        if cancel_token is not None:
+            cancel_token.check()
+        attempts += 1
+        try:
+            result = predicate()
+        except ImportError:
+            # 缺少依赖时重试也不会成功，交给调用方处理
+            raise
+        except Exception as e:
+            logger.debug(f"检查{description}失败: {e}")
+            result = None
+
+        elapsed = time.monotonic() - start
+        if result:
+            logger.info(f"✅ {description}已就绪，用时 {elapsed:.1f}s（第 {attempts} 次检查）")
+            return result
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        if cancel_token is not None:
+            cancel_token.sleep(min(interval, remaining))
+        else:
+            time.sleep(min(interval, remaining))
+
+    logger.warning(f"⚠️ 等待{description}超时，已等待 {time.monotonic() - start:.1f}s（共检查 {attempts} 次）")
+    return None